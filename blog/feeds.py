@@ -0,0 +1,49 @@
+from django.contrib.syndication.views import Feed
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from main.context_processors import personal_info_snapshot
+
+from .models import BlogPost
+
+FEED_ITEMS = 20
+
+
+class LatestPostsFeed(Feed):
+    """RSS feed of the latest published posts"""
+
+    description = 'Latest posts on cybersecurity, system administration and IT.'
+
+    def title(self):
+        return f"{personal_info_snapshot()['PERSONAL_NAME']} - Blog"
+
+    def link(self):
+        return reverse('blog:blog_list')
+
+    def items(self):
+        return (BlogPost.objects.filter(status='published')
+                .select_related('author', 'category').prefetch_related('tags')
+                .order_by('-published_at', '-created_at')[:FEED_ITEMS])
+
+    def item_title(self, post):
+        return post.title
+
+    def item_description(self, post):
+        return post.excerpt
+
+    def item_pubdate(self, post):
+        return post.published_at or post.created_at
+
+    def item_updateddate(self, post):
+        return post.updated_at
+
+    def item_author_name(self, post):
+        return post.author.get_full_name() or post.author.username
+
+    def item_categories(self, post):
+        return [post.category.name, *(tag.name for tag in post.tags.all())]
+
+
+class LatestPostsAtomFeed(LatestPostsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestPostsFeed.description
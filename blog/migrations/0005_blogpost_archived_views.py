@@ -0,0 +1,18 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_remove_blogcategory_blog_blogca_name_d96d44_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blogpost',
+            name='archived_views',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
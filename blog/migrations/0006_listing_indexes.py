@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:52
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_blogpost_archived_views'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['-published_at', '-created_at'], name='blog_post_published_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['category', '-published_at'], name='blog_post_category_pub_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='blogpost',
+            index=models.Index(condition=models.Q(('is_featured', True), ('status', 'published')), fields=['-published_at', '-created_at'], name='blog_post_featured_idx'),
+        ),
+    ]
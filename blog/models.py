@@ -68,6 +68,9 @@ class BlogPost(models.Model):
     # Reading time (calculated automatically)
     reading_time = models.IntegerField(default=0, help_text='Estimated reading time in minutes')
     
+    # Views already pruned from PostView by the retention job (main.retention)
+    archived_views = models.PositiveIntegerField(default=0, editable=False)
+    
     # Timestamps
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -75,6 +78,24 @@ class BlogPost(models.Model):
     
     class Meta:
         ordering = ['-published_at', '-created_at']
+        indexes = [
+            # Listing, related posts and search: published only, newest first
+            models.Index(
+                fields=['-published_at', '-created_at'],
+                condition=models.Q(status='published'),
+                name='blog_post_published_idx',
+            ),
+            models.Index(
+                fields=['category', '-published_at'],
+                condition=models.Q(status='published'),
+                name='blog_post_category_pub_idx',
+            ),
+            models.Index(
+                fields=['-published_at', '-created_at'],
+                condition=models.Q(status='published', is_featured=True),
+                name='blog_post_featured_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
@@ -112,7 +133,7 @@ class BlogPost(models.Model):
     
     @property
     def total_views(self):
-        return self.post_views.count()
+        return self.archived_views + self.post_views.count()
 
 
 class Comment(models.Model):
@@ -0,0 +1,22 @@
+from django.contrib.sitemaps import Sitemap
+from django.db.models import Max
+
+from portfolio_site.syndication import SITEMAP_PAGE_SIZE
+
+from .models import BlogPost
+
+
+class BlogPostSitemap(Sitemap):
+    changefreq = 'monthly'
+    priority = 0.7
+    limit = SITEMAP_PAGE_SIZE
+
+    def items(self):
+        return BlogPost.objects.filter(status='published').only('slug', 'updated_at').order_by('-published_at', 'pk')
+
+    def lastmod(self, post):
+        return post.updated_at
+
+    def get_latest_lastmod(self):
+        # One query rather than a lastmod() call per post
+        return self.items().aggregate(latest=Max('updated_at'))['latest']
@@ -1 +1,209 @@
-# Empty tests file
\ No newline at end of file
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import AsyncClient, AsyncRequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog import views
+from blog.models import PostLike, PostView
+from blog.sitemaps import BlogPostSitemap
+from main.cache_warmer import public_urls
+from main.content_fixtures import create_post, create_tag
+from main.retention import run_retention
+from main.static_export import MANIFEST_NAME, export_site
+from portfolio_site.asgi_support import view_for_server
+from portfolio_site.syndication import STATE_CACHE_KEY, content_state
+
+
+class PostViewRetentionTest(TestCase):
+    def setUp(self):
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, True)
+
+    def test_pruned_post_views_are_kept_in_view_count(self):
+        post = create_post()
+        for i in range(3):
+            PostView.objects.create(post=post, ip_address=f'10.0.0.{i}')
+            PostLike.objects.create(post=post, ip_address=f'10.0.0.{i}', is_like=True)
+        long_ago = timezone.now() - timedelta(days=400)
+        PostView.objects.exclude(ip_address='10.0.0.2').update(viewed_at=long_ago)
+        PostLike.objects.update(created_at=long_ago)
+
+        with override_settings(RETENTION_ARCHIVE_DIR=self.archive_dir):
+            results = run_retention(archive=False)
+
+        self.assertEqual(results['post_views'], 2)
+        self.assertEqual(results['post_likes'], 0)  # likes have no TTL by default
+        post.refresh_from_db()
+        self.assertEqual(post.archived_views, 2)
+        self.assertEqual(post.total_views, 3)
+        self.assertEqual(os.listdir(self.archive_dir), [])
+
+
+class BlogAsyncViewTest(TestCase):
+    def setUp(self):
+        create_post('firewall-rules', 'Firewall rules')
+
+    def test_urls_pick_the_async_view_in_asgi_mode(self):
+        self.assertIs(view_for_server(views.search_posts, views.asearch_posts), views.search_posts)
+        with override_settings(ASGI_MODE=True):
+            self.assertIs(view_for_server(views.search_posts, views.asearch_posts), views.asearch_posts)
+
+    async def test_async_views_answer_like_the_sync_ones(self):
+        factory = AsyncRequestFactory()
+        response = await views.asearch_posts(factory.get('/blog/search/', {'q': 'firewall'}))
+        self.assertEqual([result['slug'] for result in json.loads(response.content)['results']], ['firewall-rules'])
+
+        request = factory.post('/blog/firewall-rules/like/', '{"is_like": true}', content_type='application/json')
+        response = await views.apost_like(request, slug='firewall-rules')
+        self.assertEqual(json.loads(response.content)['likes'], 1)
+        response = await views.apost_like(request, slug='firewall-rules')
+        self.assertEqual(json.loads(response.content)['message'], 'Removed your feedback!')
+
+    async def test_requests_through_the_async_chain_are_measured(self):
+        with override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0):
+            response = await AsyncClient().get(reverse('blog:blog_list'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+        timing = response['Server-Timing']
+        # Queries run in a worker thread and are still attributed to the request
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn('mw-SecurityHeaders;dur=', timing)
+        self.assertIn('mw-RateLimit;dur=', timing)
+
+
+class BlogCacheWarmerTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        create_post('hardening-ssh', 'Hardening SSH', tags=[create_tag()])
+        create_post('draft', status='draft')
+
+    def test_public_urls_cover_posts_and_filters(self):
+        urls = public_urls()
+        self.assertIn(reverse('blog:post_detail', kwargs={'slug': 'hardening-ssh'}), urls)
+        self.assertIn(reverse('blog:blog_list') + '?category=security', urls)
+        self.assertIn(reverse('blog:blog_list') + '?tag=linux', urls)
+        self.assertNotIn(reverse('blog:post_detail', kwargs={'slug': 'draft'}), urls)
+        self.assertEqual(len(urls), len(set(urls)))
+
+    def test_warm_cache_requests_every_page_without_rate_limiting(self):
+        out, err = StringIO(), StringIO()
+        # One thread: the test's transaction is not visible to other connections
+        call_command('warm_cache', concurrency=1, skip_resume_pdf=True, stdout=out, stderr=err)
+        self.assertEqual(err.getvalue(), '')
+        self.assertIn('Warmed', out.getvalue())
+        self.assertIsNone(cache.get('rate_limit_general_127.0.0.1'))
+
+    def test_warm_cache_does_not_count_post_views(self):
+        call_command('warm_cache', concurrency=1, skip_resume_pdf=True, stdout=StringIO(), stderr=StringIO())
+        self.assertFalse(PostView.objects.exists())
+
+
+class StaticExportTest(TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir, True)
+        self.post = create_post('hardening-ssh', 'Hardening SSH')
+
+    def _read(self, relative):
+        with open(os.path.join(self.output_dir, relative), encoding='utf-8') as f:
+            return f.read()
+
+    def _manifest(self):
+        return json.loads(self._read(MANIFEST_NAME))
+
+    def test_export_writes_pages_with_hashed_assets(self):
+        summary = export_site(self.output_dir)
+        self.assertEqual(summary.failed, [])
+        home = self._read('index.html')
+        self.assertRegex(home, r'/static/css/style\.[0-9a-f]{12}\.css')
+        self.assertNotIn('csrfmiddlewaretoken', home)
+        self.assertIn('Hardening SSH', self._read('blog/hardening-ssh/index.html'))
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, 'contact', 'index.html')))
+
+        pages = self._manifest()['pages']
+        self.assertIn('blog.BlogPost', pages['/blog/hardening-ssh/']['depends'])
+        self.assertNotIn('blog.PostView', pages['/blog/hardening-ssh/']['depends'])
+        self.assertFalse(self.post.post_views.exists())
+
+    def test_only_pages_reading_changed_tables_are_rendered_again(self):
+        first = export_site(self.output_dir)
+        self.assertEqual(export_site(self.output_dir).rendered, 0)
+
+        self.post.title = 'Hardening OpenSSH'
+        self.post.save()
+        second = export_site(self.output_dir)
+        self.assertIn('Hardening OpenSSH', self._read('blog/hardening-ssh/index.html'))
+        self.assertLess(second.rendered, first.rendered)
+        self.assertGreater(second.unchanged, 0)
+
+        self.post.status = 'draft'
+        self.post.save()
+        self.assertEqual(export_site(self.output_dir).removed, 1)
+        self.assertFalse(os.path.exists(os.path.join(self.output_dir, 'blog', 'hardening-ssh')))
+        self.assertNotIn('/blog/hardening-ssh/', self._manifest()['pages'])
+
+
+class BlogSyndicationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.posts = [create_post(f'post-{i}') for i in range(2)]
+
+    def test_sitemaps_and_feeds_list_posts(self):
+        index = self.client.get(reverse('sitemap')).content.decode()
+        self.assertIn('http://testserver/sitemap-blog.xml', index)
+        self.assertIn('<lastmod>', index)
+
+        blog = self.client.get(reverse('sitemap_section', kwargs={'section': 'blog'})).content.decode()
+        self.assertIn('http://testserver/blog/post-0/', blog)
+
+        self.assertContains(self.client.get(reverse('blog_feed')), 'Post 1')
+        self.assertContains(self.client.get(reverse('blog_atom_feed')), '<updated>')
+        self.assertContains(self.client.get(reverse('robots_txt')), 'Sitemap: http://testserver/sitemap.xml')
+
+    def test_sitemap_index_is_paginated(self):
+        with mock.patch.object(BlogPostSitemap, 'limit', 1):
+            index = self.client.get(reverse('sitemap')).content.decode()
+            self.assertIn('/sitemap-blog.xml?p=2', index)
+            page = self.client.get(reverse('sitemap_section', kwargs={'section': 'blog'}), {'p': 2})
+        self.assertEqual(page.content.decode().count('<url>'), 1)
+
+    def test_conditional_get_and_cache_follow_content_changes(self):
+        url = reverse('blog_feed')
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            self.assertEqual(self.client.get(url).content, response.content)
+
+        self.posts[0].title = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[0].save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertContains(response, 'Renamed')
+
+        # A deletion must not leave crawlers with the old version either
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.posts[1].delete()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_state_is_refreshed_only_after_the_save_commits(self):
+        state = content_state()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.posts[0].save()
+            # Still inside the transaction: nothing was recomputed from uncommitted rows
+            self.assertEqual(cache.get(STATE_CACHE_KEY), state)
+        self.assertEqual(len(callbacks), 1)
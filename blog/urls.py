@@ -1,11 +1,12 @@
 from django.urls import path
+from portfolio_site.asgi_support import view_for_server
 from . import views
 
 app_name = 'blog'
 
 urlpatterns = [
     path('', views.blog_list, name='blog_list'),
-    path('search/', views.search_posts, name='search_posts'),
+    path('search/', view_for_server(views.search_posts, views.asearch_posts), name='search_posts'),
     path('<slug:slug>/', views.post_detail, name='post_detail'),
-    path('<slug:slug>/like/', views.post_like, name='post_like'),
+    path('<slug:slug>/like/', view_for_server(views.post_like, views.apost_like), name='post_like'),
 ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from django.shortcuts import render, get_object_or_404
+from django.shortcuts import render, get_object_or_404, aget_object_or_404
 from django.core.paginator import Paginator
 from django.db.models import Q, Count
 from django.http import JsonResponse
@@ -6,8 +6,11 @@ from django.views.decorators.http import require_POST
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 import json
+from main.cache_warmer import WARMER_ENVIRON_KEY
 from .models import BlogPost, BlogCategory, Tag, PostLike, PostView
 
+POSTS_PER_PAGE = 6
+
 
 def get_client_ip(request):
     """Get client IP address"""
@@ -46,7 +49,7 @@ def blog_list(request):
         ).distinct()
     
     # Pagination
-    paginator = Paginator(posts, 6)  # Show 6 posts per page
+    paginator = Paginator(posts, POSTS_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
@@ -74,12 +77,13 @@ def post_detail(request, slug):
         status='published'
     )
     
-    # Track view (only count unique IPs)
-    client_ip = get_client_ip(request)
-    PostView.objects.get_or_create(
-        post=post,
-        ip_address=client_ip
-    )
+    # Track view (only count unique IPs); cache warming and static exports are not visitors
+    if not request.META.get(WARMER_ENVIRON_KEY):
+        client_ip = get_client_ip(request)
+        PostView.objects.get_or_create(
+            post=post,
+            ip_address=client_ip
+        )
     
     # Get related posts (same category or tags, exclude current post)
     related_posts = BlogPost.objects.filter(
@@ -153,6 +157,43 @@ def post_like(request, slug):
         })
 
 
+@require_POST
+@csrf_exempt
+async def apost_like(request, slug):
+    """post_like for ASGI mode, on the async ORM"""
+    try:
+        post = await aget_object_or_404(BlogPost, slug=slug, status='published')
+        client_ip = get_client_ip(request)
+        is_like = json.loads(request.body).get('is_like', True)
+        
+        post_like, created = await PostLike.objects.aget_or_create(
+            post=post,
+            ip_address=client_ip,
+            defaults={'is_like': is_like}
+        )
+        if created:
+            message = "Thank you for your feedback!"
+        elif post_like.is_like != is_like:
+            post_like.is_like = is_like
+            await post_like.asave()
+            message = "Updated your feedback!"
+        else:
+            await post_like.adelete()
+            message = "Removed your feedback!"
+        
+        return JsonResponse({
+            'success': True,
+            'message': message,
+            'likes': await post.post_likes.filter(is_like=True).acount(),
+            'dislikes': await post.post_likes.filter(is_like=False).acount(),
+        })
+    except Exception as e:
+        return JsonResponse({
+            'success': False,
+            'message': 'An error occurred. Please try again.'
+        })
+
+
 def search_posts(request):
     """AJAX endpoint for searching blog posts"""
     query = request.GET.get('q', '')
@@ -160,22 +201,36 @@ def search_posts(request):
     if len(query) < 3:
         return JsonResponse({'results': []})
     
-    posts = BlogPost.objects.filter(
+    results = [_search_result(post) for post in _search_queryset(query)]
+    return JsonResponse({'results': results})
+
+
+async def asearch_posts(request):
+    """search_posts for ASGI mode, on the async ORM"""
+    query = request.GET.get('q', '')
+    
+    if len(query) < 3:
+        return JsonResponse({'results': []})
+    
+    results = [_search_result(post) async for post in _search_queryset(query)]
+    return JsonResponse({'results': results})
+
+
+def _search_queryset(query):
+    return BlogPost.objects.filter(
         Q(title__icontains=query) |
         Q(excerpt__icontains=query) |
         Q(content__icontains=query),
         status='published'
     ).select_related('category')[:5]
-    
-    results = []
-    for post in posts:
-        results.append({
-            'title': post.title,
-            'slug': post.slug,
-            'excerpt': post.excerpt,
-            'category': post.category.name,
-            'published_at': post.published_at.strftime('%B %d, %Y') if post.published_at else '',
-            'url': post.get_absolute_url(),
-        })
-    
-    return JsonResponse({'results': results})
\ No newline at end of file
+
+
+def _search_result(post):
+    return {
+        'title': post.title,
+        'slug': post.slug,
+        'excerpt': post.excerpt,
+        'category': post.category.name,
+        'published_at': post.published_at.strftime('%B %d, %Y') if post.published_at else '',
+        'url': post.get_absolute_url(),
+    }
\ No newline at end of file
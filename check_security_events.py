@@ -10,26 +10,30 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_site.settings')
 django.setup()
 
 from django.utils import timezone
-from datetime import timedelta
+
+# Upper bound on rows read per check; the rest is picked up on the next run
+MAX_EVENTS_PER_RUN = 500
 
 def check_rate_limit_events():
     """Check recent rate limit events"""
     try:
         # Import here to ensure Django is set up
         from main.models import SecurityEvent
+        from main.rollups import new_rows_since_last_run, rollup_total
         
-        # Get events from the last hour
-        one_hour_ago = timezone.now() - timedelta(hours=1)
-        rate_limit_events = SecurityEvent.objects.filter(
-            event_type='rate_limit',
-            created_at__gte=one_hour_ago
-        ).order_by('-created_at')
+        # Only events added since the previous run (tracked by a watermark)
+        rate_limit_events = new_rows_since_last_run(
+            'check:rate_limit_events',
+            SecurityEvent.objects.filter(event_type='rate_limit'),
+            limit=MAX_EVENTS_PER_RUN,
+        )
         
-        print("📊 Rate Limit Events (Last Hour)")
+        print("📊 Rate Limit Events (New Since Last Check)")
         print("=" * 35)
+        print(f"Today: {rollup_total('event:rate_limit', timezone.now())}")
         
-        if rate_limit_events.exists():
-            for event in rate_limit_events:
+        if rate_limit_events:
+            for event in reversed(rate_limit_events):
                 print(f"⏰ {event.created_at.strftime('%Y-%m-%d %H:%M:%S')} UTC")
                 print(f"📍 IP: {event.ip_address}")
                 print(f"📝 Description: {event.description}")
@@ -37,7 +41,7 @@ def check_rate_limit_events():
                 print(f"🔧 Method: {event.method}")
                 print("-" * 30)
         else:
-            print("✅ No rate limit events found in the last hour")
+            print("✅ No new rate limit events since the last check")
             
     except Exception as e:
         print(f"❌ Error checking rate limit events: {e}")
@@ -47,15 +51,19 @@ def check_all_recent_events():
     try:
         # Import here to ensure Django is set up
         from main.models import SecurityEvent
+        from main.rollups import new_rows_since_last_run, rollup_total
         
-        # Get events from the last hour
-        one_hour_ago = timezone.now() - timedelta(hours=1)
-        recent_events = SecurityEvent.objects.filter(
-            created_at__gte=one_hour_ago
-        ).order_by('-created_at')[:20]  # Limit to 20 most recent
+        # Only events added since the previous run (tracked by a watermark)
+        recent_events = new_rows_since_last_run(
+            'check:all_events',
+            SecurityEvent.objects.all(),
+            limit=MAX_EVENTS_PER_RUN,
+        )
+        recent_events = list(reversed(recent_events))[:20]  # Show the 20 most recent
         
-        print("📊 Recent Security Events (Last Hour)")
+        print("📊 Recent Security Events (New Since Last Check)")
         print("=" * 35)
+        print(f"Today: {rollup_total('events', timezone.now())}")
         
         event_type_labels = {
             'login_failed': 'Failed Login',
@@ -68,7 +76,7 @@ def check_all_recent_events():
             'security_scan': 'Security Scan Detected',
         }
         
-        if recent_events.exists():
+        if recent_events:
             for event in recent_events:
                 event_label = event_type_labels.get(event.event_type, event.get_event_type_display())
                 print(f"⏰ {event.created_at.strftime('%Y-%m-%d %H:%M:%S')} UTC")
@@ -79,7 +87,7 @@ def check_all_recent_events():
                 print(f"🔗 Path: {event.path}")
                 print("-" * 30)
         else:
-            print("✅ No security events found in the last hour")
+            print("✅ No new security events since the last check")
             
     except Exception as e:
         print(f"❌ Error checking security events: {e}")
@@ -89,26 +97,28 @@ def check_failed_logins():
     try:
         # Import here to ensure Django is set up
         from main.models import SecurityEvent
+        from main.rollups import new_rows_since_last_run, rollup_total
         
-        # Get failed login events from the last hour
-        one_hour_ago = timezone.now() - timedelta(hours=1)
-        failed_logins = SecurityEvent.objects.filter(
-            event_type='login_failed',
-            created_at__gte=one_hour_ago
-        ).order_by('-created_at')
+        # Only events added since the previous run (tracked by a watermark)
+        failed_logins = new_rows_since_last_run(
+            'check:failed_logins',
+            SecurityEvent.objects.filter(event_type='login_failed'),
+            limit=MAX_EVENTS_PER_RUN,
+        )
         
-        print("🔐 Failed Login Attempts (Last Hour)")
+        print("🔐 Failed Login Attempts (New Since Last Check)")
         print("=" * 35)
+        print(f"Today: {rollup_total('event:login_failed', timezone.now())}")
         
-        if failed_logins.exists():
-            for event in failed_logins:
+        if failed_logins:
+            for event in reversed(failed_logins):
                 print(f"⏰ {event.created_at.strftime('%Y-%m-%d %H:%M:%S')} UTC")
                 print(f"📍 IP: {event.ip_address}")
                 print(f"👤 Username: {event.username}")
                 print(f"📝 Description: {event.description}")
                 print("-" * 30)
         else:
-            print("✅ No failed login attempts found in the last hour")
+            print("✅ No new failed login attempts since the last check")
             
     except Exception as e:
         print(f"❌ Error checking failed login attempts: {e}")
@@ -118,6 +128,9 @@ if __name__ == '__main__':
     print("=" * 25)
     print()
     
+    from main.rollups import update_security_rollups
+    update_security_rollups()
+    
     check_rate_limit_events()
     print()
     
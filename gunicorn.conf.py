@@ -0,0 +1,145 @@
+"""
+Gunicorn configuration
+
+    gunicorn -c gunicorn.conf.py
+
+The application is imported once in the master (preload_app) and warmed up
+there (portfolio_site/warmup.py): templates, URL patterns and the
+context-processor snapshot. Workers fork from the warm master, sharing its
+memory copy-on-write, and so do the workers that replace recycled ones
+(max_requests). With preload_app turned off (--no-preload, e.g. to pick up
+code changes on HUP), each worker warms itself after loading the app.
+
+Worker model, from GUNICORN_WORKER_CLASS:
+
+    gthread  (default) WSGI; (2 x CPUs + 1) processes, GUNICORN_THREADS threads each.
+             A thread stuck in a request is never reclaimed by `timeout` (only the
+             whole worker is), so nothing may stream endlessly here; the security
+             dashboard's live feed answers 204 under WSGI and needs uvicorn.
+    gevent   WSGI on greenlets; CPUs + 1 processes, GUNICORN_WORKER_CONNECTIONS each.
+             Needs gevent installed, and psycogreen for PostgreSQL.
+    uvicorn  ASGI (portfolio_site.asgi, see DEPLOYMENT_GUIDE.md); CPUs + 1 processes
+
+CPUs are those this container may use (cgroup quota or affinity), not the
+host's. Processes are also capped so that GUNICORN_WORKER_MEMORY_MB each
+fits in the memory limit. WEB_CONCURRENCY overrides the count.
+"""
+import math
+import os
+import shutil
+import tempfile
+
+WORKER_CLASSES = {
+    'gthread': 'gthread',
+    'gevent': 'gevent',
+    'uvicorn': 'uvicorn_worker.UvicornWorker',
+}
+
+
+def available_cpus():
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            return max(1, math.ceil(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def memory_limit_mb():
+    try:
+        with open('/sys/fs/cgroup/memory.max') as f:
+            limit = f.read().strip()
+        if limit != 'max':
+            return int(limit) // (1024 * 1024)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemTotal:'):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def worker_count(kind, cpus, memory_mb, worker_memory_mb):
+    if kind == 'gthread':
+        count = 2 * cpus + 1
+    else:
+        # One event loop per core keeps every core busy; the extra one covers a worker
+        # blocked in a sync call
+        count = cpus + 1
+    if memory_mb:
+        # Leave a quarter of the limit for the master, page cache and spikes
+        count = min(count, max(1, int(memory_mb * 0.75 // worker_memory_mb)))
+    return count
+
+
+_kind = os.getenv('GUNICORN_WORKER_CLASS', 'gthread').lower()
+if _kind not in WORKER_CLASSES:
+    raise RuntimeError(f'GUNICORN_WORKER_CLASS must be one of {", ".join(WORKER_CLASSES)}, not {_kind!r}')
+
+wsgi_app = 'portfolio_site.asgi:application' if _kind == 'uvicorn' else 'portfolio_site.wsgi:application'
+bind = os.getenv('GUNICORN_BIND') or f'0.0.0.0:{os.getenv("PORT", "8000")}'
+preload_app = True
+
+worker_class = WORKER_CLASSES[_kind]
+workers = int(os.getenv('WEB_CONCURRENCY') or worker_count(
+    _kind, available_cpus(), memory_limit_mb(), int(os.getenv('GUNICORN_WORKER_MEMORY_MB', '150')),
+))
+if _kind == 'gthread':
+    threads = int(os.getenv('GUNICORN_THREADS', '4'))
+elif _kind == 'gevent':
+    worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '500'))
+
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = 30
+keepalive = 5
+max_requests = 1000
+max_requests_jitter = 100
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+# Combined format plus X-Forwarded-For (as nginx's 'main' format): behind the proxy
+# %(h)s is nginx's address, and main.log_ingest takes the client from the last field
+access_log_format = '%(h)s %(l)s %(u)s %(t)s "%(r)s" %(s)s %(b)s "%(f)s" "%(a)s" "%({x-forwarded-for}i)s"'
+
+# Workers share Prometheus counters through files (see portfolio_site/metrics.py).
+# Must be set before the application, and so its settings, is loaded.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join(tempfile.gettempdir(), 'portfolio-metrics'))
+
+
+def on_starting(server):
+    # Files left by a previous run would be counted as exited workers of this one
+    directory = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(directory, ignore_errors=True)
+    os.makedirs(directory, exist_ok=True)
+
+
+def when_ready(server):
+    if not server.cfg.preload_app:
+        return
+    from django.db import connections
+    from portfolio_site.warmup import warm_up
+
+    warm_up()
+    # Workers must open their own connections, never share the master's sockets
+    connections.close_all()
+
+
+def post_worker_init(worker):
+    # Already done in the master with preload_app. Without it the worker only has
+    # Django once the application is loaded, which is after post_fork, so warm here.
+    from main.health import checker
+    from main.outbox import wake_worker
+    from portfolio_site.warmup import warm_up
+
+    warm_up()
+    # Readiness results exist before the worker takes its first request
+    checker.ensure_started()
+    # Emails left pending or awaiting a retry by the previous workers
+    wake_worker()
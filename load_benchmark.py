@@ -0,0 +1,563 @@
+#!/usr/bin/env python
+"""
+Reproducible local load benchmark
+
+Boots the site under gunicorn (production settings, DEBUG off) against a
+freshly migrated and seeded database, then drives concurrent traffic in
+phases, one per traffic mix:
+
+    browse   home, blog and portfolio listings and detail pages, resume
+    search   blog listing search and the search/filter AJAX endpoints
+    like     like/dislike posts
+    contact  load and submit the contact form
+    scanner  bursts of probes for .env, wp-admin and friends, sqlmap user agent
+    mixed    all of the above, weighted like real traffic
+
+For every phase it reports throughput, p50/p95/p99 latency and errors per
+endpoint, and the peak RSS of the gunicorn workers. Before the phases it
+records how long gunicorn took to start, the latency of the first requests
+and the memory of each worker (RSS, and PSS, which splits pages shared
+with the master between the processes sharing them). Results are written to
+benchmark_results/<commit>.json together with the settings used; pass
+--compare with an earlier result file to print the difference.
+
+    python load_benchmark.py                      # SQLite stand-in in a temp dir
+    python load_benchmark.py --database-url postgres://.../bench --workers 3
+    python load_benchmark.py --phases browse,mixed --duration 30 --compare benchmark_results/abc1234.json
+    python load_benchmark.py --startup-only --gunicorn-config gunicorn.conf.py
+
+Every virtual user has its own client IP (X-Forwarded-For), so the
+per-IP rate limits behave as they would for real visitors. Only the
+standard library is needed on the client side.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import re
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from urllib.parse import urlencode
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(BASE_DIR, 'benchmark_results')
+# Outside the tree, and kept after the run for a look at the server's own output
+SERVER_LOG = os.path.join(tempfile.gettempdir(), 'portfolio-benchmark-server.log')
+
+PHASES = ['browse', 'search', 'like', 'contact', 'scanner', 'mixed']
+MIXED_WEIGHTS = {'browse': 60, 'search': 15, 'like': 10, 'contact': 5, 'scanner': 10}
+
+SCANNER_PATHS = ['/.env', '/wp-admin/', '/phpmyadmin/', '/.git/config', '/backup.sql', '/admin.php', '/xmlrpc.php']
+SCANNER_AGENT = 'sqlmap/1.7.2#stable (https://sqlmap.org)'
+BROWSER_AGENT = 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0 Safari/537.36'
+
+CSRF_INPUT = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+CSRF_COOKIE = re.compile(r'csrftoken=([^;]+)')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def git_commit():
+    try:
+        commit = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR, text=True).strip()
+        dirty = subprocess.call(['git', 'diff', '--quiet', 'HEAD'], cwd=BASE_DIR) != 0
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown', False
+    return commit, dirty
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[index]
+
+
+# ---------------------------------------------------------------------------
+# Server
+# ---------------------------------------------------------------------------
+
+class Server:
+    """A migrated, seeded database and a gunicorn master serving it"""
+
+    def __init__(self, args):
+        self.args = args
+        self.workdir = tempfile.mkdtemp(prefix='portfolio-bench-')
+        self.port = free_port()
+        self.process = None
+        self.log = None
+        database_url = args.database_url or f'sqlite:///{os.path.join(self.workdir, "bench.sqlite3")}'
+        self.env = dict(
+            os.environ,
+            DEBUG='False',
+            SECRET_KEY='benchmark-only-secret-key-not-for-production-use-0123456789',
+            ALLOWED_HOSTS='127.0.0.1,localhost',
+            DATABASE_URL=database_url,
+            SECURE_SSL_REDIRECT='False',
+            SESSION_COOKIE_SECURE='False',
+            EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+            REDIS_URL=args.redis_url,
+            PYTHONUNBUFFERED='1',
+        )
+        self.database_vendor = database_url.split(':', 1)[0]
+
+    def manage(self, *command):
+        subprocess.run([sys.executable, 'manage.py', *command], cwd=BASE_DIR, env=self.env, check=True,
+                       stdout=subprocess.DEVNULL if not self.args.verbose else None)
+
+    def prepare(self):
+        print(f'Preparing {self.database_vendor} database ...')
+        self.manage('migrate', '--noinput')
+        self.manage('seed_perf_data', '--seed', str(self.args.seed), '--posts', str(self.args.posts))
+
+    def start(self):
+        """Start gunicorn; returns the seconds until every worker was up and one answered"""
+        command = [sys.executable, '-m', 'gunicorn']
+        if self.args.gunicorn_config:
+            command += ['--config', self.args.gunicorn_config]
+        else:
+            command += ['portfolio_site.wsgi:application']
+        command += [
+            '--bind', f'127.0.0.1:{self.port}',
+            '--workers', str(self.args.workers),
+            '--log-level', 'warning',
+            '--pid', os.path.join(self.workdir, 'gunicorn.pid'),
+        ]
+        if self.args.threads > 1:
+            command += ['--threads', str(self.args.threads)]
+        # Keep the site's own warnings (scanner detections and the like) out of the report
+        self.log = open(SERVER_LOG, 'w')
+        started = time.monotonic()
+        self.process = subprocess.Popen(command, cwd=BASE_DIR, env=self.env, stdout=self.log, stderr=subprocess.STDOUT)
+        deadline = started + 60
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise SystemExit(f'gunicorn exited during startup; see {SERVER_LOG}')
+            try:
+                connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=2)
+                connection.request('GET', '/health/live/')
+                if connection.getresponse().status < 500 and len(self.worker_pids()) >= self.args.workers:
+                    return time.monotonic() - started
+            except OSError:
+                pass
+            time.sleep(0.05)
+        raise SystemExit(f'gunicorn did not become ready within 60s; see {SERVER_LOG}')
+
+    def worker_pids(self):
+        pids = []
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    stat = f.read()
+            except OSError:
+                continue
+            # Fields after the parenthesised command name; the second is the parent pid
+            if int(stat.rsplit(')', 1)[1].split()[1]) == self.process.pid:
+                pids.append(int(entry))
+        return pids
+
+    def stop(self):
+        if self.process and self.process.poll() is None:
+            self.process.send_signal(signal.SIGTERM)
+            try:
+                self.process.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.log is not None:
+            self.log.close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+def pss_kib(pid):
+    """Proportional set size: shared pages are split between the processes sharing them"""
+    try:
+        with open(f'/proc/{pid}/smaps_rollup') as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def startup_profile(server, startup_seconds, requests_per_page=3):
+    """Latency of the first requests to a fresh server, then the memory of each process"""
+    pages = ['/', '/blog/', '/portfolio/', '/about/', '/resume/', '/contact/']
+    first = {}
+    for path in pages:
+        timings = []
+        for _ in range(requests_per_page):
+            connection = http.client.HTTPConnection('127.0.0.1', server.port, timeout=30)
+            start = time.perf_counter()
+            connection.request('GET', path, headers={'User-Agent': BROWSER_AGENT})
+            connection.getresponse().read()
+            timings.append((time.perf_counter() - start) * 1000)
+            connection.close()
+        first[path] = round(max(timings), 1)
+    workers = server.worker_pids()
+
+    def mib(kib):
+        return round(kib / 1024, 1)
+
+    return {
+        'startup_s': round(startup_seconds, 2),
+        'first_request_ms': first,
+        'workers': len(workers),
+        'worker_rss_mib': mib(sum(rss_kib(pid) for pid in workers) / max(1, len(workers))),
+        'worker_pss_mib': mib(sum(pss_kib(pid) for pid in workers) / max(1, len(workers))),
+        'master_pss_mib': mib(pss_kib(server.process.pid)),
+        'total_pss_mib': mib(pss_kib(server.process.pid) + sum(pss_kib(pid) for pid in workers)),
+    }
+
+
+def rss_kib(pid):
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+class RssSampler(threading.Thread):
+    """Samples the workers' resident set size while a phase runs (Linux /proc)"""
+
+    def __init__(self, server, interval=0.5):
+        super().__init__(daemon=True)
+        self.server = server
+        self.interval = interval
+        self.peak = {}
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            for pid in self.server.worker_pids():
+                self.peak[pid] = max(self.peak.get(pid, 0), rss_kib(pid))
+            self.stopped.wait(self.interval)
+
+    def summary(self):
+        values = list(self.peak.values())
+        if not values:
+            return {'workers': 0, 'peak_mib': None, 'mean_peak_mib': None}
+        return {
+            'workers': len(values),
+            'peak_mib': round(max(values) / 1024, 1),
+            'mean_peak_mib': round(sum(values) / len(values) / 1024, 1),
+        }
+
+
+# ---------------------------------------------------------------------------
+# Traffic
+# ---------------------------------------------------------------------------
+
+class VirtualUser:
+    """One visitor: its own connection, client IP and cookies"""
+
+    def __init__(self, port, ip, rng, recorder, content):
+        self.port = port
+        self.ip = ip
+        self.rng = rng
+        self.recorder = recorder
+        self.content = content
+        self.connection = None
+        self.cookies = {}
+
+    def request(self, endpoint, method, path, body=None, headers=None, agent=BROWSER_AGENT):
+        headers = dict(headers or {})
+        headers.update({'Host': '127.0.0.1', 'User-Agent': agent, 'X-Forwarded-For': self.ip})
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+        start = time.perf_counter()
+        try:
+            if self.connection is None:
+                self.connection = http.client.HTTPConnection('127.0.0.1', self.port, timeout=30)
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            data = response.read()
+            status = response.status
+            for header in response.headers.get_all('Set-Cookie') or []:
+                match = CSRF_COOKIE.match(header)
+                if match:
+                    self.cookies['csrftoken'] = match.group(1)
+            if response.will_close:
+                self.connection.close()
+                self.connection = None
+        except (OSError, http.client.HTTPException):
+            if self.connection is not None:
+                self.connection.close()
+            self.connection = None
+            status, data = 0, b''
+        self.recorder.record(endpoint, status, (time.perf_counter() - start) * 1000)
+        return status, data
+
+    def browse(self):
+        choice = self.rng.random()
+        if choice < 0.2:
+            self.request('home', 'GET', '/')
+        elif choice < 0.45:
+            self.request('blog_list', 'GET', f'/blog/?page={self.rng.randint(1, 20)}')
+        elif choice < 0.7:
+            self.request('post_detail', 'GET', f'/blog/{self.rng.choice(self.content["posts"])}/')
+        elif choice < 0.8:
+            self.request('portfolio_list', 'GET', '/portfolio/')
+        elif choice < 0.9:
+            self.request('project_detail', 'GET', f'/portfolio/{self.rng.choice(self.content["projects"])}/')
+        else:
+            self.request('resume', 'GET', '/resume/')
+
+    def search(self):
+        term = self.rng.choice(['firewall', 'cloud', 'incident', 'python', 'audit', 'zero-day'])
+        choice = self.rng.random()
+        if choice < 0.4:
+            self.request('blog_list_search', 'GET', '/blog/?' + urlencode({'search': term}))
+        elif choice < 0.8:
+            self.request('blog_search_posts', 'GET', '/blog/search/?' + urlencode({'q': term}))
+        else:
+            self.request('portfolio_filter', 'GET', '/portfolio/filter/?' + urlencode({'search': term}))
+
+    def like(self):
+        slug = self.rng.choice(self.content['posts'])
+        body = json.dumps({'is_like': self.rng.random() < 0.8})
+        self.request('post_like', 'POST', f'/blog/{slug}/like/', body, {'Content-Type': 'application/json'})
+
+    def contact(self):
+        status, page = self.request('contact_form', 'GET', '/contact/')
+        match = CSRF_INPUT.search(page)
+        if status != 200 or not match:
+            return
+        body = urlencode({
+            'csrfmiddlewaretoken': match.group(1).decode(),
+            'name': f'Visitor {self.ip}',
+            'email': f'visitor-{self.rng.randrange(10 ** 6)}@example.com',
+            'subject': 'Question about your work',
+            'message': 'Hello, I read your post about incident response and would like to ask a few questions about it.',
+        })
+        self.request('contact_submit', 'POST', '/contact/', body, {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Referer': 'http://127.0.0.1/contact/',
+        })
+
+    def scanner(self):
+        for _ in range(self.rng.randint(5, 20)):
+            self.request('scanner_probe', 'GET', self.rng.choice(SCANNER_PATHS), agent=SCANNER_AGENT)
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+
+    def record(self, endpoint, status, milliseconds):
+        with self.lock:
+            self.latencies[endpoint].append(milliseconds)
+            self.statuses[endpoint][status] += 1
+
+    def summary(self, elapsed):
+        endpoints = {}
+        for endpoint, values in sorted(self.latencies.items()):
+            values.sort()
+            statuses = self.statuses[endpoint]
+            endpoints[endpoint] = {
+                'requests': len(values),
+                'rps': round(len(values) / elapsed, 1),
+                'p50_ms': round(percentile(values, 0.50), 1),
+                'p95_ms': round(percentile(values, 0.95), 1),
+                'p99_ms': round(percentile(values, 0.99), 1),
+                'errors': sum(count for status, count in statuses.items() if status == 0 or status >= 500),
+                'statuses': {str(status): count for status, count in sorted(statuses.items())},
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {'requests': total, 'rps': round(total / elapsed, 1), 'endpoints': endpoints}
+
+
+def run_phase(server, phase, args, content):
+    recorder = Recorder()
+    sampler = RssSampler(server)
+    deadline = time.monotonic() + args.duration
+    scenarios = list(MIXED_WEIGHTS) if phase == 'mixed' else [phase]
+    weights = [MIXED_WEIGHTS[name] for name in scenarios]
+
+    def drive(number):
+        rng = random.Random(f'{args.seed}-{phase}-{number}')
+        # Scanners get addresses of their own, so blocking them does not affect visitors
+        visitor = VirtualUser(server.port, f'10.{number // 250}.{number % 250}.1', rng, recorder, content)
+        scanner = VirtualUser(server.port, f'172.16.{number // 250}.{number % 250 + 1}', rng, recorder, content)
+        while time.monotonic() < deadline:
+            scenario = rng.choices(scenarios, weights)[0]
+            getattr(scanner if scenario == 'scanner' else visitor, scenario)()
+            if args.think_time:
+                time.sleep(rng.uniform(0, args.think_time * 2))
+
+    threads = [threading.Thread(target=drive, args=(number,), daemon=True) for number in range(args.concurrency)]
+    sampler.start()
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.monotonic() - started
+    sampler.stopped.set()
+    sampler.join()
+
+    result = recorder.summary(elapsed)
+    result['rss'] = sampler.summary()
+    return result
+
+
+def published_content(server):
+    """Slugs of the seeded posts and projects, read through the app's own ORM"""
+    script = (
+        'import json; from blog.models import BlogPost; from portfolio.models import Project; '
+        'print(json.dumps({"posts": list(BlogPost.objects.filter(status="published").values_list("slug", flat=True)[:500]), '
+        '"projects": list(Project.objects.values_list("slug", flat=True))}))'
+    )
+    output = subprocess.check_output(
+        [sys.executable, 'manage.py', 'shell', '-c', script], cwd=BASE_DIR, env=server.env, text=True,
+    )
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+
+def print_startup(startup):
+    print(f'\n== startup: {startup["startup_s"]}s to {startup["workers"]} ready workers; per worker '
+          f'RSS {startup["worker_rss_mib"]} MiB, PSS {startup["worker_pss_mib"]} MiB; '
+          f'master PSS {startup["master_pss_mib"]} MiB, total PSS {startup["total_pss_mib"]} MiB')
+    print('first requests (slowest of the first few, ms): ' + ', '.join(
+        f'{path} {ms}' for path, ms in startup['first_request_ms'].items()
+    ))
+
+
+def print_phase(phase, result):
+    rss = result['rss']
+    print(f'\n== {phase}: {result["requests"]} requests, {result["rps"]} req/s, '
+          f'worker RSS peak {rss["peak_mib"]} MiB (mean {rss["mean_peak_mib"]} MiB over {rss["workers"]} workers)')
+    print(f'{"endpoint":<20} {"req":>7} {"req/s":>8} {"p50":>8} {"p95":>8} {"p99":>8} {"errors":>7}')
+    for endpoint, stats in result['endpoints'].items():
+        print(f'{endpoint:<20} {stats["requests"]:>7} {stats["rps"]:>8} {stats["p50_ms"]:>8} '
+              f'{stats["p95_ms"]:>8} {stats["p99_ms"]:>8} {stats["errors"]:>7}')
+
+
+def _delta(new, old):
+    if old in (None, 0) or new is None:
+        return '   n/a'
+    return f'{(new - old) / old * 100:+6.1f}%'
+
+
+def print_comparison(results, baseline):
+    print(f'\nCompared with {baseline["commit"]} ({baseline["finished_at"]}):')
+    if results.get('startup') and baseline.get('startup'):
+        new, old = results['startup'], baseline['startup']
+        print(f'startup {_delta(new["startup_s"], old["startup_s"])}, '
+              f'worker PSS {_delta(new["worker_pss_mib"], old["worker_pss_mib"])}, '
+              f'total PSS {_delta(new["total_pss_mib"], old["total_pss_mib"])}')
+    print(f'{"phase/endpoint":<30} {"req/s":>9} {"p50":>9} {"p95":>9} {"p99":>9}')
+    for phase, result in results['phases'].items():
+        old_phase = baseline['phases'].get(phase)
+        if not old_phase:
+            continue
+        print(f'{phase:<30} {_delta(result["rps"], old_phase["rps"]):>9}')
+        for endpoint, stats in result['endpoints'].items():
+            old = old_phase['endpoints'].get(endpoint)
+            if old:
+                print(f'  {endpoint:<28} {_delta(stats["rps"], old["rps"]):>9} {_delta(stats["p50_ms"], old["p50_ms"]):>9} '
+                      f'{_delta(stats["p95_ms"], old["p95_ms"]):>9} {_delta(stats["p99_ms"], old["p99_ms"]):>9}')
+    if baseline.get('config') != results['config']:
+        print('Note: the two runs used different settings; see "config" in each file.')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--phases', default=','.join(PHASES), help=f'Comma-separated, from: {", ".join(PHASES)}')
+    parser.add_argument('--duration', type=float, default=20, help='Seconds per phase')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent virtual users')
+    parser.add_argument('--think-time', type=float, default=0, help='Mean pause between a user\'s actions, in seconds')
+    parser.add_argument('--workers', type=int, default=3, help='gunicorn workers')
+    parser.add_argument('--threads', type=int, default=1, help='gunicorn threads per worker')
+    parser.add_argument('--gunicorn-config', help='Start gunicorn with this config file (e.g. gunicorn.conf.py); '
+                                                  '--workers and --threads still apply')
+    parser.add_argument('--startup-only', action='store_true', help='Only measure startup, first requests and memory')
+    parser.add_argument('--database-url', help='Benchmark database (default: a fresh SQLite file); it is migrated and seeded')
+    parser.add_argument('--redis-url', default='redis://127.0.0.1:6379/15',
+                        help='Shared cache; when unreachable the site falls back to per-worker memory')
+    parser.add_argument('--posts', type=int, default=2000, help='Blog posts to seed')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for the data and the traffic')
+    parser.add_argument('--output', help='Result file (default: benchmark_results/<commit>.json)')
+    parser.add_argument('--compare', help='Earlier result file to compare against')
+    parser.add_argument('--verbose', action='store_true', help='Show migrate/seed output')
+    args = parser.parse_args()
+
+    phases = [phase.strip() for phase in args.phases.split(',') if phase.strip()]
+    unknown = set(phases) - set(PHASES)
+    if unknown:
+        parser.error(f'unknown phase(s): {", ".join(sorted(unknown))}')
+
+    commit, dirty = git_commit()
+    server = Server(args)
+    results = {
+        'commit': commit + ('-dirty' if dirty else ''),
+        'started_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'config': {
+            'database': server.database_vendor,
+            'workers': args.workers,
+            'threads': args.threads,
+            'gunicorn_config': args.gunicorn_config,
+            'concurrency': args.concurrency,
+            'duration': args.duration,
+            'think_time': args.think_time,
+            'posts': args.posts,
+            'seed': args.seed,
+            'python': sys.version.split()[0],
+            'cpus': os.cpu_count(),
+        },
+        'phases': {},
+    }
+    try:
+        server.prepare()
+        content = published_content(server)
+        startup_seconds = server.start()
+        print(f'gunicorn up on port {server.port} with {args.workers} worker(s); '
+              f'{args.concurrency} virtual users, {args.duration:g}s per phase')
+        results['startup'] = startup_profile(server, startup_seconds)
+        print_startup(results['startup'])
+        for phase in [] if args.startup_only else phases:
+            results['phases'][phase] = run_phase(server, phase, args, content)
+            print_phase(phase, results['phases'][phase])
+    finally:
+        server.stop()
+    results['finished_at'] = datetime.now(timezone.utc).isoformat(timespec='seconds')
+
+    output = args.output or os.path.join(RESULTS_DIR, f'{results["commit"]}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f'\nResults written to {output}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(results, json.load(f))
+
+
+if __name__ == '__main__':
+    main()
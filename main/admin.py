@@ -4,9 +4,11 @@ from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.core.cache import cache
 from django.core.cache.utils import make_template_fragment_key
 from django.conf import settings
+from django.db import transaction
 from django.utils.cache import get_cache_key
 from django.http import HttpRequest
-from .models import ContactSubmission, Skill, Experience, Education, UserProfile, Certification, Achievement, Testimonial, SecurityEvent
+from .resume import CV_CACHE_KEY, CONTENT_HASH_CACHE_KEY
+from .models import ContactSubmission, Skill, Experience, Education, UserProfile, Certification, Achievement, Testimonial, SecurityEvent, OutboundEmail
 
 
 class UserProfileInline(admin.StackedInline):
@@ -19,6 +21,14 @@ class UserProfileInline(admin.StackedInline):
 
 class UserAdmin(BaseUserAdmin):
     inlines = (UserProfileInline,)
+    
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        clear_resume_cache()
+    
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        clear_resume_cache()
 
 
 # Re-register UserAdmin
@@ -27,9 +37,15 @@ admin.site.register(User, UserAdmin)
 
 
 def clear_resume_cache():
-    """Clear the resume cache when resume-related data is updated"""
+    """Clear the resume cache when resume-related data is updated, once the change commits"""
+    # Cleared inside the admin's transaction, a concurrent request could cache the old data again
+    transaction.on_commit(_clear_resume_cache)
+
+
+def _clear_resume_cache():
     # Clear specific cache keys that might be used
     cache.delete('resume_data')
+    cache.delete_many([CV_CACHE_KEY, CONTENT_HASH_CACHE_KEY])
     # Clear any other potential cache keys
     cache.delete_many(['resume_view', 'skills_data', 'education_data', 'experience_data'])
     # Clear home page cache by using a more direct approach
@@ -105,10 +121,10 @@ class UserProfileAdmin(admin.ModelAdmin):
 
 @admin.register(ContactSubmission)
 class ContactSubmissionAdmin(admin.ModelAdmin):
-    list_display = ['name', 'email', 'subject', 'created_at']
-    list_filter = ['created_at']
+    list_display = ['name', 'email', 'subject', 'spam_score', 'is_spam', 'created_at']
+    list_filter = ['is_spam', 'created_at']
     search_fields = ['name', 'email', 'subject']
-    readonly_fields = ['created_at']
+    readonly_fields = ['created_at', 'ip_address', 'spam_score', 'content_hash']
 
 
 @admin.register(Skill)
@@ -242,4 +258,15 @@ class SecurityEventAdmin(admin.ModelAdmin):
         ('Request Details', {
             'fields': ('ip_address', 'username', 'path', 'method', 'user_agent')
         }),
-    )
\ No newline at end of file
+    )
+
+
+@admin.register(OutboundEmail)
+class OutboundEmailAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'sent_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['subject', 'recipients', 'from_email']
+    readonly_fields = ['created_at', 'sent_at', 'attempts', 'last_error']
+    
+    def has_add_permission(self, request):
+        return False  # Outbound email is queued by the application
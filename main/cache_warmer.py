@@ -0,0 +1,133 @@
+"""
+Cache warming after a deploy
+
+Requests every public URL once through the Django test client, a few at a
+time, so the first visitors find the shared cache entries (CV document,
+resume content hash), the generated resume PDF and the database's own
+buffers already populated. Per-process state (compiled templates, URL
+patterns) is warmed by the gunicorn master instead (portfolio_site/warmup.py).
+
+Warm-up requests carry WARMER_ENVIRON_KEY in their WSGI environ, which no
+HTTP client can set, and RateLimitMiddleware does not count them.
+"""
+import math
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from django.conf import settings
+from django.db import connections
+from django.db.models import Count, Q
+from django.urls import reverse
+
+WARMER_ENVIRON_KEY = 'portfolio.cache_warmer'
+DEFAULT_LIST_PAGES = 3
+DEFAULT_CONCURRENCY = 4
+
+WarmResult = namedtuple('WarmResult', 'path status ms')
+
+
+def _list_pages(path, total, per_page, list_pages, params=''):
+    """The first ``list_pages`` pages of a paginated list of ``total`` items"""
+    pages = min(list_pages, max(1, math.ceil(total / per_page)))
+    separator = '&' if params else ''
+    urls = [f'{path}?{params}' if params else path]
+    urls += [f'{path}?{params}{separator}page={page}' for page in range(2, pages + 1)]
+    return urls
+
+
+def public_urls(list_pages=DEFAULT_LIST_PAGES):
+    """Every public GET URL: static pages, each post and project, and the first pages of each list"""
+    from blog.models import BlogCategory, BlogPost, Tag
+    from blog.views import POSTS_PER_PAGE
+    from main.sitemaps import SITEMAPS
+    from portfolio.models import Category, Project
+    from portfolio.views import PROJECTS_PER_PAGE
+
+    urls = [
+        reverse('main:home'),
+        reverse('main:about'),
+        reverse('main:resume'),
+        reverse('main:contact'),
+        reverse('robots_txt'),
+        reverse('security_txt'),
+        reverse('sitemap'),
+        reverse('blog_feed'),
+        reverse('blog_atom_feed'),
+        reverse('projects_feed'),
+        reverse('projects_atom_feed'),
+    ]
+    urls += [reverse('sitemap_section', kwargs={'section': section}) for section in SITEMAPS]
+
+    blog_list = reverse('blog:blog_list')
+    published = BlogPost.objects.filter(status='published')
+    urls += _list_pages(blog_list, published.count(), POSTS_PER_PAGE, list_pages)
+    in_published = Q(posts__status='published')
+    for slug, total in (BlogCategory.objects.annotate(total=Count('posts', filter=in_published))
+                        .filter(total__gt=0).order_by('name').values_list('slug', 'total')):
+        urls += _list_pages(blog_list, total, POSTS_PER_PAGE, list_pages, f'category={slug}')
+    for slug, total in (Tag.objects.annotate(total=Count('posts', filter=in_published))
+                        .filter(total__gt=0).order_by('name').values_list('slug', 'total')):
+        urls += _list_pages(blog_list, total, POSTS_PER_PAGE, list_pages, f'tag={slug}')
+
+    portfolio_list = reverse('portfolio:portfolio_list')
+    featured = Q(projects__is_featured=True)
+    urls += _list_pages(portfolio_list, Project.objects.filter(is_featured=True).count(), PROJECTS_PER_PAGE, list_pages)
+    for slug, total in (Category.objects.annotate(total=Count('projects', filter=featured))
+                        .filter(total__gt=0).order_by('name').values_list('slug', 'total')):
+        urls += _list_pages(portfolio_list, total, PROJECTS_PER_PAGE, list_pages, f'category={slug}')
+
+    urls += [reverse('blog:post_detail', kwargs={'slug': slug})
+             for slug in published.order_by('-published_at').values_list('slug', flat=True)]
+    urls += [reverse('portfolio:project_detail', kwargs={'slug': slug})
+             for slug in Project.objects.order_by('order', 'title').values_list('slug', flat=True)]
+    return list(dict.fromkeys(urls))
+
+
+def internal_client(host=None):
+    """A test client for in-process requests: not rate limited, Host from ``host`` or ALLOWED_HOSTS"""
+    # Imported here: the middleware imports this module in every worker, which never needs the test client
+    from django.test import Client
+
+    if host is None:
+        host = next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if host not in ('*', '')), 'localhost')
+    return Client(raise_request_exception=False, HTTP_HOST=host, **{WARMER_ENVIRON_KEY: True})
+
+
+def _fetch(client, path):
+    start = time.perf_counter()
+    # secure: production redirects plain HTTP to HTTPS
+    response = client.get(path, secure=True)
+    return WarmResult(path, response.status_code, round((time.perf_counter() - start) * 1000, 1))
+
+
+def warm(paths, concurrency=DEFAULT_CONCURRENCY):
+    """Request ``paths`` with at most ``concurrency`` in flight; returns a WarmResult per path, in order"""
+    if concurrency <= 1:
+        client = internal_client()
+        return [_fetch(client, path) for path in paths]
+
+    pending = queue.SimpleQueue()
+    for index, path in enumerate(paths):
+        pending.put((index, path))
+    results = [None] * len(paths)
+
+    def work():
+        client = internal_client()
+        try:
+            while True:
+                try:
+                    index, path = pending.get_nowait()
+                except queue.Empty:
+                    return
+                results[index] = _fetch(client, path)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=work, name=f'cache-warmer-{i}') for i in range(min(concurrency, len(paths)))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
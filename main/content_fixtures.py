@@ -0,0 +1,50 @@
+"""
+Small sets of posts and projects for the blog and portfolio tests
+
+Each helper creates one row with the fields the public pages need, sharing
+one author and one category per app unless others are passed in.
+"""
+import datetime
+
+from django.contrib.auth.models import User
+
+from blog.models import BlogCategory, BlogPost, Tag
+from portfolio.models import Category, Project
+
+
+def create_author(username='author'):
+    return User.objects.get_or_create(username=username)[0]
+
+
+def create_blog_category(slug='security', name='Security'):
+    return BlogCategory.objects.get_or_create(slug=slug, defaults={'name': name})[0]
+
+
+def create_tag(slug='linux', name='Linux'):
+    return Tag.objects.get_or_create(slug=slug, defaults={'name': name})[0]
+
+
+def create_post(slug='post', title=None, status='published', tags=(), **fields):
+    """A BlogPost in the default category, by the default author"""
+    fields.setdefault('author', create_author())
+    fields.setdefault('category', create_blog_category())
+    post = BlogPost.objects.create(
+        slug=slug, title=title or slug.replace('-', ' ').title(), status=status,
+        excerpt='Excerpt', content='Body', **fields,
+    )
+    post.tags.add(*tags)
+    return post
+
+
+def create_project_category(slug='tools', name='Tools'):
+    return Category.objects.get_or_create(slug=slug, defaults={'name': name})[0]
+
+
+def create_project(slug='scanner', title=None, **fields):
+    """A Project in the default category"""
+    fields.setdefault('category', create_project_category())
+    fields.setdefault('start_date', datetime.date(2024, 1, 1))
+    return Project.objects.create(
+        slug=slug, title=title or slug.replace('-', ' ').title(),
+        description='d', short_description='s', **fields,
+    )
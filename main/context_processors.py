@@ -1,12 +1,14 @@
 """
 Context processors to make secure configuration available to templates
 """
+from functools import lru_cache
 from config import PersonalConfig, SocialConfig
 import os
 
 
-def personal_info(request):
-    """Add personal information to template context"""
+@lru_cache(maxsize=None)
+def personal_info_snapshot():
+    """The personal information context, read from the environment once per process"""
     return {
         'PERSONAL_NAME': PersonalConfig.get_full_name(),
         'PERSONAL_EMAIL': PersonalConfig.get_email(),
@@ -19,4 +21,10 @@ def personal_info(request):
         'EMAIL_URL': SocialConfig.get_email_url(),
         'GITHUB_USERNAME': PersonalConfig.get_github_username(),
         'ADMIN_URL': os.getenv('ADMIN_URL', 'admin/'),
-    }
\ No newline at end of file
+    }
+
+
+def personal_info(request):
+    """Add personal information to template context"""
+    # RequestContext copies the values into its own layer, so sharing the dict is safe
+    return personal_info_snapshot()
@@ -0,0 +1,107 @@
+"""
+Security dashboard data
+
+The dashboard reads only the hourly/daily SecurityRollup rows and the ten
+newest events, so rendering cost does not grow with the SecurityEvent table.
+The incremental aggregator is run at most once per ROLLUP_REFRESH_SECONDS
+across all workers, guarded by a cache lock.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from .rollups import update_security_rollups, rollup_totals
+
+logger = logging.getLogger('portfolio_site')
+
+REFRESH_LOCK_KEY = 'security_rollup_refresh'
+
+# Dashboard metric -> rollup metric
+METRICS = {
+    'failed_logins': 'event:login_failed',
+    'contact_submissions': 'contact_submissions',
+    'suspicious_requests': 'event:suspicious_request',
+    'rate_violations': 'event:rate_limit',
+    'unique_ips': 'unique_ips',
+    'admin_access': 'event:admin_access',
+    'security_scans': 'event:security_scan',
+    'high_severity': 'severity:high',
+    'critical_severity': 'severity:critical',
+}
+
+# Points added to the threat score per event in the window
+THREAT_WEIGHTS = {
+    'failed_logins': 2,
+    'suspicious_requests': 3,
+    'rate_violations': 1,
+    'security_scans': 5,
+    'high_severity': 2,
+    'critical_severity': 10,
+}
+
+THREAT_LEVELS = [
+    (20, 'LOW', 'SECURE'),
+    (50, 'MEDIUM', 'MONITORING'),
+    (80, 'HIGH', 'ALERT'),
+]
+
+
+def refresh_rollups(force=False):
+    """Run the incremental aggregator unless another worker did so recently"""
+    interval = getattr(settings, 'ROLLUP_REFRESH_SECONDS', 30)
+    try:
+        if not force and not cache.add(REFRESH_LOCK_KEY, 1, interval):
+            return False
+    except Exception as e:
+        logger.warning(f'Cache not available for rollup refresh lock: {e}')
+    update_security_rollups()
+    return True
+
+
+def threat_assessment(metrics):
+    score = min(100, sum(metrics.get(name, 0) * weight for name, weight in THREAT_WEIGHTS.items()))
+    for limit, level, status in THREAT_LEVELS:
+        if score < limit:
+            break
+    else:
+        level, status = 'CRITICAL', 'ALERT'
+    return {
+        'threat_score': score,
+        'threat_level': level,
+        'threat_color': level.lower(),
+        'system_status': status,
+    }
+
+
+def get_security_metrics(now=None, window=timedelta(hours=24)):
+    """Dashboard metrics for the trailing window, from hourly rollups"""
+    now = now or timezone.now()
+    totals = rollup_totals(METRICS.values(), now - window + timedelta(hours=1), period='hour')
+    metrics = {name: totals[rollup_metric] for name, rollup_metric in METRICS.items()}
+    metrics.update(threat_assessment(metrics))
+    return metrics
+
+
+def get_dashboard_context():
+    from config import PersonalConfig
+    from .models import SecurityEvent
+
+    refresh_rollups()
+    now = timezone.now()
+    return {
+        'metrics': get_security_metrics(now),
+        # Newest rows by primary key: an index read regardless of table size
+        'recent_events': list(SecurityEvent.objects.order_by('-pk')[:10]),
+        'total_events_7d': rollup_totals(['events'], now - timedelta(days=6), period='day')['events'],
+        'last_updated': now,
+        'user_profile': {
+            'name': PersonalConfig.get_full_name(),
+            'email': PersonalConfig.get_email(),
+            'tagline': PersonalConfig.get_tagline(),
+            'tryhackme': PersonalConfig.get_tryhackme_username(),
+            'hackthebox': PersonalConfig.get_hackthebox_username(),
+        },
+    }
@@ -0,0 +1,127 @@
+"""
+Live security dashboard feed
+
+An in-process pub/sub broker connects the SecurityEvent writer to
+Server-Sent Events subscribers. New events are pushed as they are logged;
+metric deltas come from a single aggregation thread per process that runs
+only while at least one dashboard is connected, so any number of open
+dashboards share one aggregation loop instead of each querying the DB.
+
+Subscribers are asyncio queues; publishing is thread-safe and never blocks
+the writer (slow subscribers drop their oldest messages).
+
+The broker is per process: a dashboard only receives the events logged by
+the worker that serves its stream, while the metric deltas (read from the
+database) are complete in every worker. Live events are therefore only
+complete with a single worker (WEB_CONCURRENCY=1); with more, the event list
+catches up on the next page load. The stream is only served under ASGI
+(see main.views.security_stream).
+"""
+import asyncio
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('portfolio_site')
+
+QUEUE_SIZE = 100
+
+
+def _put_nowait(queue, message):
+    if queue.full():
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(message)
+
+
+class EventBroker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = {}
+        self._aggregator = None
+        self._last_metrics = None
+
+    @property
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def subscribe(self):
+        """Register a queue on the running event loop and return it"""
+        queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            self._subscribers[queue] = loop
+            if self._aggregator is None:
+                self._aggregator = threading.Thread(target=self._aggregate, name='security-metrics', daemon=True)
+                self._aggregator.start()
+        return queue
+
+    def unsubscribe(self, queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    def publish(self, message):
+        """Deliver a message to every subscriber; safe to call from any thread"""
+        with self._lock:
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(_put_nowait, queue, message)
+            except RuntimeError:
+                # Loop already closed; the stream's cleanup will unsubscribe it
+                pass
+
+    def metrics_delta(self, metrics):
+        """Return the changed metrics since the last publish (all of them the first time)"""
+        previous = self._last_metrics or {}
+        self._last_metrics = metrics
+        return {name: value for name, value in metrics.items() if previous.get(name) != value}
+
+    def _aggregate(self):
+        from .dashboard import refresh_rollups, get_security_metrics
+
+        interval = getattr(settings, 'SSE_METRICS_INTERVAL', 5)
+        try:
+            while True:
+                time.sleep(interval)
+                with self._lock:
+                    if not self._subscribers:
+                        # Last dashboard disconnected: stop until the next one
+                        self._aggregator = None
+                        self._last_metrics = None
+                        return
+                try:
+                    refresh_rollups()
+                    delta = self.metrics_delta(get_security_metrics())
+                    if delta:
+                        self.publish({'type': 'metrics', 'data': delta})
+                except Exception as e:
+                    logger.error(f'Security metrics aggregation failed: {e}')
+        finally:
+            connections.close_all()
+
+
+broker = EventBroker()
+
+
+def publish_security_event(event):
+    """Push a newly logged SecurityEvent to connected dashboards"""
+    if not broker.has_subscribers:
+        return
+    broker.publish({
+        'type': 'event',
+        'data': {
+            'id': event.pk,
+            'event_type': event.event_type,
+            'event_type_display': event.get_event_type_display(),
+            'severity': event.severity,
+            'ip_address': event.ip_address,
+            'description': event.description,
+            'created_at': event.created_at.isoformat(),
+        },
+    })
@@ -0,0 +1,134 @@
+"""
+Health probes
+
+/health/live/ only proves the worker answers requests: it does no I/O at all.
+
+/health/ready/ reports the database, cache and media storage, but never
+checks them itself. A lazily started, pid-aware background thread runs the
+checks every HEALTH_CHECK_INTERVAL seconds and keeps the last result of
+each; the view only reads them. The first round runs synchronously when the
+thread starts, which gunicorn.conf.py does as each worker boots, so a new
+or recycled worker never fails its first probe as "pending". A result older
+than HEALTH_CHECK_TTL counts as failed (the checker is stuck), so a probe
+can never return a stale "ready".
+"""
+import logging
+import os
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger('portfolio_site')
+
+DEFAULT_INTERVAL = 10
+DEFAULT_TTL = 30
+STORAGE_PROBE_NAME = '.health-probe'
+
+OK = 'ok'
+DEGRADED = 'degraded'  # working, but on a fallback (e.g. Redis down, in-process cache in use)
+ERROR = 'error'
+
+
+def check_database():
+    from django.db import connections
+
+    for alias in settings.DATABASES:
+        connection = connections[alias]
+        # A connection broken by a database restart is replaced rather than reported forever
+        connection.close_if_unusable_or_obsolete()
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    return OK, f'{len(settings.DATABASES)} connection(s)'
+
+
+def check_cache():
+    from django.core.cache import caches
+
+    key = f'health:probe:{os.getpid()}'
+    backend = caches['default']
+    backend.set(key, key, 60)
+    if backend.get(key) != key:
+        return ERROR, 'value written to the cache could not be read back'
+    shared = getattr(backend, 'shared', backend)
+    if not getattr(shared, 'healthy', True):
+        return DEGRADED, 'shared cache unreachable, serving from the in-process fallback'
+    return OK, type(backend).__name__
+
+
+def check_storage():
+    from django.core.files.storage import default_storage
+
+    # Only needs to reach the storage; a missing probe file is fine
+    default_storage.exists(STORAGE_PROBE_NAME)
+    return OK, type(default_storage).__name__
+
+
+CHECKS = {
+    'database': check_database,
+    'cache': check_cache,
+    'storage': check_storage,
+}
+
+
+class HealthChecker:
+    """Runs CHECKS in the background and caches their results; restarted after fork"""
+
+    def __init__(self, checks=None):
+        self.checks = checks or CHECKS
+        self._results = {}
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._results = {}  # results inherited from the parent say nothing about this process
+            # One round up front, so a new worker's first probe is answered from real results
+            self.run_checks()
+            threading.Thread(target=self._run, name='health-checker', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        while True:
+            time.sleep(getattr(settings, 'HEALTH_CHECK_INTERVAL', DEFAULT_INTERVAL))
+            self.run_checks()
+
+    def run_checks(self):
+        for name, check in self.checks.items():
+            start = time.monotonic()
+            try:
+                status, detail = check()
+            except Exception as e:
+                status, detail = ERROR, str(e)
+            if status == ERROR and self._results.get(name, {}).get('status') != ERROR:
+                logger.warning(f'Health check {name} failed: {detail}')
+            self._results[name] = {
+                'status': status,
+                'detail': detail,
+                'checked_at': time.time(),
+                'duration_ms': round((time.monotonic() - start) * 1000, 1),
+            }
+
+    def report(self):
+        """(ready, {name: result}) from the cached results, without any I/O"""
+        ttl = getattr(settings, 'HEALTH_CHECK_TTL', DEFAULT_TTL)
+        now = time.time()
+        checks = {}
+        for name in self.checks:
+            result = self._results.get(name)
+            if result is None:
+                checks[name] = {'status': 'pending', 'detail': 'not checked yet'}
+                continue
+            result = dict(result, age_seconds=round(now - result['checked_at'], 1))
+            if result['age_seconds'] > ttl:
+                result['status'] = 'stale'
+            checks[name] = result
+        ready = all(result['status'] in (OK, DEGRADED) for result in checks.values())
+        return ready, checks
+
+
+checker = HealthChecker()
@@ -0,0 +1,53 @@
+"""
+HyperLogLog distinct counter
+
+Used to count unique IPs per rollup bucket in a fixed 1 KB (p=10, about 3%
+standard error) instead of storing every address. Sketches from several
+buckets are merged with a register-wise max.
+"""
+import hashlib
+import math
+
+
+class HyperLogLog:
+    def __init__(self, precision=10, registers=None):
+        self.precision = precision
+        self.m = 1 << precision
+        self.registers = bytearray(registers) if registers is not None else bytearray(self.m)
+
+    @classmethod
+    def from_bytes(cls, data, precision=10):
+        if not data:
+            return cls(precision)
+        return cls(precision, bytes(data))
+
+    def to_bytes(self):
+        return bytes(self.registers)
+
+    def add(self, value):
+        x = int.from_bytes(hashlib.sha1(str(value).encode('utf-8')).digest()[:8], 'big')
+        index = x >> (64 - self.precision)
+        remaining = x & ((1 << (64 - self.precision)) - 1)
+        rank = (64 - self.precision) - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        registers = self.registers
+        for i, value in enumerate(other.registers):
+            if value > registers[i]:
+                registers[i] = value
+        return self
+
+    def count(self):
+        m = self.m
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # Small-range correction (linear counting)
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+    def __len__(self):
+        return self.count()
@@ -0,0 +1,251 @@
+"""
+Streaming log ingestion into SecurityEvent
+
+Access logs (nginx and gunicorn, combined format with an optional
+X-Forwarded-For field) and the Django security.log (text or
+LOG_FORMAT=json) are read line by line through generators, classified with the
+rules in main.security_rules and inserted with bulk_create, one chunk of
+lines per transaction. Nothing holds more than a chunk in memory, so months
+of logs can be backfilled in one pass.
+
+The byte offset reached in each file is stored in a ScanWatermark together
+with a fingerprint of the file's first line; a rerun resumes where the last
+one stopped, and a rotated or truncated file is read again from the start.
+Rotated `.gz` files are read transparently.
+
+The middleware writes SecurityEvents live for the same requests these logs
+record, so files are only ingested explicitly, with --until set to when
+live event logging began: `python manage.py ingest_logs logs/access.log
+--until 2026-10-01T00:00` (see the command for options).
+"""
+import gzip
+import hashlib
+import ipaddress
+import json
+import os
+import re
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from .security_rules import classify_request
+
+CHUNK_SIZE = 5000
+BULK_BATCH_SIZE = 1000
+
+# Combined log format, as written by nginx and gunicorn, optionally followed by
+# X-Forwarded-For (nginx's 'main' format, gunicorn.conf.py's access_log_format)
+ACCESS_LINE = re.compile(
+    r'(?P<ip>\S+) \S+ \S+ \[(?P<time>[^\]]+)\] '
+    r'"(?P<method>[A-Z]+) (?P<path>\S+)[^"]*" (?P<status>\d{3}) \S+'
+    r'(?: "[^"]*" "(?P<agent>[^"]*)"(?: "(?P<forwarded>[^"]*)")?)?'
+)
+
+# settings.LOGGING 'verbose' format: '{levelname} {asctime} {module} {process:d} {thread:d} {message}'
+SECURITY_LINE = re.compile(
+    r'(?P<level>[A-Z]+) (?P<time>\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}),\d+ \S+ \d+ \d+ (?P<message>.*)'
+)
+# The middleware's messages, in either format: '... for IP <ip> on <path>' or '... from IP <ip>: <detail>'
+SECURITY_MESSAGE = re.compile(r'.*? (?:from|for) IP (?P<ip>[0-9A-Fa-f.:]+?)(?:: | on )(?P<rest>.*)')
+
+MONTHS = {name: number for number, name in enumerate(
+    ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec'], 1
+)}
+
+_offsets = {}
+
+
+def _utc_offset(text):
+    """Parse '+0300' into a tzinfo, caching the handful seen in practice"""
+    tz = _offsets.get(text)
+    if tz is None:
+        minutes = int(text[1:3]) * 60 + int(text[3:5])
+        tz = _offsets[text] = dt_timezone(timedelta(minutes=-minutes if text[0] == '-' else minutes))
+    return tz
+
+
+def parse_access_time(text):
+    """Parse '19/Oct/2026:10:00:00 +0000' without strptime (hot path)"""
+    return datetime(
+        int(text[7:11]), MONTHS[text[3:6]], int(text[0:2]),
+        int(text[12:14]), int(text[15:17]), int(text[18:20]),
+        tzinfo=_utc_offset(text[21:26]),
+    )
+
+
+def parse_access_line(line):
+    match = ACCESS_LINE.match(line)
+    if not match:
+        return None
+    try:
+        created_at = parse_access_time(match.group('time'))
+    except (KeyError, ValueError):
+        return None
+    forwarded = match.group('forwarded')
+    # Behind a proxy the peer address is the proxy's; the client is the first forwarded one
+    ip = forwarded.split(',')[0].strip() if forwarded and forwarded != '-' else match.group('ip')
+    return {
+        'ip': ip,
+        'created_at': created_at,
+        'method': match.group('method'),
+        'path': match.group('path'),
+        'status': int(match.group('status')),
+        'agent': match.group('agent') or '',
+    }
+
+
+def _security_entry(line):
+    """(message, aware time) from a security.log line in the text or LOG_FORMAT=json format"""
+    if line.startswith('{'):
+        try:
+            data = json.loads(line)
+            return data['message'], datetime.fromisoformat(data['time'])
+        except (ValueError, KeyError, TypeError):
+            return None
+    match = SECURITY_LINE.match(line)
+    if not match:
+        return None
+    created_at = timezone.make_aware(
+        datetime.strptime(match.group('time'), '%Y-%m-%d %H:%M:%S'), timezone.get_default_timezone()
+    )
+    return match.group('message'), created_at
+
+
+def parse_security_line(line):
+    entry = _security_entry(line)
+    if entry is None:
+        return None
+    message, created_at = entry
+    match = SECURITY_MESSAGE.match(message)
+    if not match:
+        return None
+    rest = match.group('rest')
+    record = {
+        'ip': match.group('ip'),
+        'created_at': created_at,
+        'method': '',
+        'path': rest,
+        'status': None,
+        'agent': '',
+    }
+    if message.startswith('Malicious user agent'):
+        record['path'], record['agent'] = '', rest
+    elif message.startswith('Rate limit exceeded'):
+        record['status'] = 429
+    return record
+
+
+PARSERS = {
+    'access': parse_access_line,
+    'security': parse_security_line,
+}
+
+
+def detect_format(path):
+    return 'security' if 'security' in os.path.basename(path) else 'access'
+
+
+def _open(path):
+    return gzip.open(path, 'rb') if path.endswith('.gz') else open(path, 'rb')
+
+
+def file_fingerprint(path):
+    """Hash of the first complete line, or None while the file has none"""
+    with _open(path) as f:
+        first = f.readline(4096)
+    if not first.endswith(b'\n'):
+        return None
+    return hashlib.sha256(first).hexdigest()
+
+
+def read_lines(path, offset=0):
+    """Yield (decoded line, offset after it) from ``offset``, stopping before a partial last line"""
+    with _open(path) as f:
+        f.seek(offset)
+        position = offset
+        for line in f:
+            if not line.endswith(b'\n'):
+                return  # still being written; picked up by the next run
+            position += len(line)
+            yield line.decode('utf-8', 'replace').rstrip('\r\n'), position
+
+
+def classify_lines(lines, parse, until=None, admin_url=None):
+    """Yield (SecurityEvent or None, offset) for each (line, offset)"""
+    from .models import SecurityEvent
+
+    admin_url = admin_url or getattr(settings, 'ADMIN_URL', 'admin/')
+    for line, offset in lines:
+        record = parse(line)
+        event = None
+        if record and (until is None or record['created_at'] < until):
+            classified = classify_request(record['path'], record['agent'].lower(), record['status'], admin_url)
+            if classified and _valid_ip(record['ip']):
+                event_type, severity, description = classified
+                event = SecurityEvent(
+                    event_type=event_type,
+                    severity=severity,
+                    ip_address=record['ip'],
+                    user_agent=record['agent'],
+                    description=description,
+                    path=record['path'].split('?', 1)[0][:500],
+                    method=record['method'][:10],
+                    created_at=record['created_at'],
+                )
+        yield event, offset
+
+
+def _valid_ip(value):
+    try:
+        ipaddress.ip_address(value)
+    except ValueError:
+        return False
+    return True
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ingest_file(path, fmt=None, chunk_size=CHUNK_SIZE, until=None, from_start=False):
+    """
+    Ingest new lines of one log file. Returns (lines read, events created).
+
+    Each chunk's events and the new offset are committed together, so an
+    interrupted run never inserts a line twice.
+    """
+    from .models import SecurityEvent, ScanWatermark
+
+    path = os.path.abspath(path)
+    fingerprint = file_fingerprint(path)
+    if fingerprint is None:
+        return 0, 0
+
+    watermark, _ = ScanWatermark.objects.get_or_create(name=f'ingest:{path}')
+    offset = watermark.last_id
+    if from_start or watermark.fingerprint != fingerprint:
+        offset = 0  # new or rotated file
+    elif not path.endswith('.gz') and os.path.getsize(path) < offset:
+        offset = 0  # truncated in place
+
+    lines_read = created = 0
+    events = classify_lines(read_lines(path, offset), PARSERS[fmt or detect_format(path)], until)
+    for chunk in chunked(events, chunk_size):
+        batch = [event for event, _ in chunk if event is not None]
+        with transaction.atomic():
+            SecurityEvent.objects.bulk_create(batch, batch_size=BULK_BATCH_SIZE)
+            ScanWatermark.objects.filter(pk=watermark.pk).update(
+                last_id=chunk[-1][1], fingerprint=fingerprint, updated_at=timezone.now()
+            )
+        lines_read += len(chunk)
+        created += len(batch)
+    return lines_read, created
+
@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+from main.query_plans import default_paths, explain_view
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN every query the public views run and flag sequential scans"
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='*', help='URL paths to check (default: every public page)')
+        parser.add_argument('--verbose-plans', action='store_true', help='Print each query and its full plan')
+        parser.add_argument('--no-seqscan', action='store_true',
+                            help='PostgreSQL: discourage sequential scans, to see whether an index is usable at all')
+        parser.add_argument('--fail-on-seqscan', action='store_true',
+                            help='Exit with an error if any sequential scan is found')
+
+    def handle(self, *args, **options):
+        flagged = []
+        for path in options['paths'] or default_paths():
+            report = explain_view(path, no_seqscan=options['no_seqscan'])
+            line = f'{path} [{report.status}]: {len(report.queries)} queries'
+            if report.seq_scans:
+                flagged.append(path)
+                self.stdout.write(self.style.WARNING(f'{line}, sequential scan on {", ".join(report.seq_scans)}'))
+            else:
+                self.stdout.write(f'{line}, no sequential scans')
+
+            if options['verbose_plans']:
+                for query in report.queries:
+                    self.stdout.write(f'  {query.sql}  {query.params}')
+                    for plan_line in query.plan:
+                        self.stdout.write(f'    {plan_line}')
+
+        if not flagged:
+            self.stdout.write(self.style.SUCCESS('No sequential scans found'))
+        elif options['fail_on_seqscan']:
+            raise CommandError(f'Sequential scans in {len(flagged)} view(s)')
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from main.static_export import MANIFEST_NAME, export_site
+
+
+class Command(BaseCommand):
+    help = 'Render the public pages to static files for nginx or a CDN, re-rendering only pages whose data changed'
+
+    def add_arguments(self, parser):
+        parser.add_argument('output_dir', nargs='?', default=str(settings.BASE_DIR / 'static_site'),
+                            help='Export directory (default: static_site/ in the project)')
+        parser.add_argument('--base-url', default='',
+                            help='Public address of the site, e.g. https://example.com, for absolute URLs in the pages')
+        parser.add_argument('--force', action='store_true',
+                            help='Re-render every page, e.g. after deploying code changes')
+
+    def handle(self, *args, **options):
+        import os
+        import time
+
+        start = time.perf_counter()
+        summary = export_site(options['output_dir'], base_url=options['base_url'], force=options['force'])
+        for path, status in summary.failed:
+            self.stderr.write(f'{status} {path}')
+        message = (
+            f'Rendered {summary.rendered} pages, {summary.unchanged} unchanged, {summary.removed} removed '
+            f'in {time.perf_counter() - start:.1f}s; manifest: {os.path.join(options["output_dir"], MANIFEST_NAME)}'
+        )
+        self.stdout.write(self.style.WARNING(message) if summary.failed else self.style.SUCCESS(message))
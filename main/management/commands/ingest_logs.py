@@ -0,0 +1,42 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from main.log_ingest import CHUNK_SIZE, PARSERS, ingest_file
+
+
+class Command(BaseCommand):
+    help = ('Backfill SecurityEvent from access logs or security.log for the time before live event logging, '
+            'resuming from the last offset of each file')
+
+    def add_arguments(self, parser):
+        parser.add_argument('paths', nargs='+', help='Log files to ingest, e.g. logs/access.log')
+        parser.add_argument('--format', choices=sorted(PARSERS), default=None,
+                            help='Log format (default: by file name)')
+        parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE, help='Lines per transaction')
+        parser.add_argument('--until', required=True,
+                            help='Skip lines at or after this ISO timestamp: when live event logging began, '
+                                 'since the middleware already recorded the later requests')
+        parser.add_argument('--from-start', action='store_true', help='Ignore stored offsets and re-read the files')
+
+    def handle(self, *args, **options):
+        try:
+            until = datetime.fromisoformat(options['until'])
+        except ValueError:
+            raise CommandError(f"Invalid --until timestamp: {options['until']}")
+        if timezone.is_naive(until):
+            until = timezone.make_aware(until)
+
+        for path in options['paths']:
+            try:
+                lines, created = ingest_file(
+                    path,
+                    fmt=options['format'],
+                    chunk_size=options['chunk_size'],
+                    until=until,
+                    from_start=options['from_start'],
+                )
+            except OSError as e:
+                self.stderr.write(f'{path}: {e}')
+                continue
+            self.stdout.write(f'{path}: {lines} new line(s), {created} security event(s)')
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from main.partitions import MONTHS_AHEAD, convert_to_partitioned, ensure_monthly_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = 'PostgreSQL only: partition SecurityEvent by month and keep future partitions created'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--convert', action='store_true',
+                            help='Rebuild the existing table as a partitioned table (locks it during the copy)')
+        parser.add_argument('--months-ahead', type=int, default=MONTHS_AHEAD, help='Future months to create')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Monthly partitioning requires PostgreSQL')
+
+        if options['convert']:
+            if convert_to_partitioned(options['months_ahead']):
+                self.stdout.write(self.style.SUCCESS('SecurityEvent table converted to monthly partitions'))
+            else:
+                self.stdout.write('SecurityEvent table is already partitioned')
+        elif not is_partitioned():
+            self.stdout.write('SecurityEvent table is not partitioned; run with --convert first')
+            return
+
+        for name in ensure_monthly_partitions(options['months_ahead']):
+            self.stdout.write(f'Created partition {name}')
@@ -0,0 +1,22 @@
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from portfolio_site.profiling import ENGINES, TOKEN_MAX_AGE, make_profiling_token
+
+
+class Command(BaseCommand):
+    help = 'Print an X-Profile header value that profiles single requests (PROFILING_ENABLED must be on)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='Staff user the token is issued to')
+        parser.add_argument('--engine', choices=ENGINES, default='cprofile')
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username'], is_staff=True, is_active=True).first()
+        if user is None:
+            raise CommandError(f"No active staff user named {options['username']}")
+
+        token = make_profiling_token(user, options['engine'])
+        self.stdout.write(f'X-Profile: {token}')
+        minutes = getattr(settings, 'PROFILING_TOKEN_MAX_AGE', TOKEN_MAX_AGE) // 60
+        self.stdout.write(f'Valid for {minutes} minutes while the user stays staff; profiles are written to PROFILING_DIR')
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from main.partitions import ensure_monthly_partitions
+from main.retention import run_retention
+
+
+class Command(BaseCommand):
+    help = 'Archive and delete SecurityEvent, PostView and PostLike rows past their retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many rows are due')
+        parser.add_argument('--chunk-size', type=int, default=None, help='Rows deleted per transaction')
+        parser.add_argument('--no-archive', action='store_true', help='Delete without writing the JSONL archive')
+
+    def handle(self, *args, **options):
+        if not options['dry_run']:
+            for name in ensure_monthly_partitions():
+                self.stdout.write(f'Created partition {name}')
+
+        results = run_retention(
+            chunk_size=options['chunk_size'],
+            archive=False if options['no_archive'] else None,
+            dry_run=options['dry_run'],
+        )
+        verb = 'due for pruning' if options['dry_run'] else 'pruned'
+        for name, count in results.items():
+            self.stdout.write(f'{name}: {count} row(s) {verb}')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+from main.resume_pdf import build_resume_pdf
+
+
+class Command(BaseCommand):
+    help = 'Render the resume PDF for the current resume content (skipped if already cached)'
+
+    def handle(self, *args, **options):
+        path = build_resume_pdf()
+        self.stdout.write(self.style.SUCCESS(f'Resume PDF ready: {path}'))
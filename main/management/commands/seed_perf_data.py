@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from blog.models import BlogPost
+from main.perf_fixtures import DEFAULT_VOLUMES, seed_performance_data
+
+
+class Command(BaseCommand):
+    help = 'Fill the database with realistic volumes of posts, views, projects and security events for benchmarking'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seed', type=int, default=0, help='Random seed (same seed, same data)')
+        parser.add_argument('--posts', type=int, default=DEFAULT_VOLUMES['posts'])
+        parser.add_argument('--security-events', type=int, default=DEFAULT_VOLUMES['security_events'])
+
+    def handle(self, *args, **options):
+        if BlogPost.objects.filter(slug__startswith='perf-post-').exists():
+            self.stdout.write('Benchmark data is already present; use a fresh database to reseed')
+            return
+
+        created = seed_performance_data(
+            seed=options['seed'],
+            posts=options['posts'],
+            security_events=options['security_events'],
+        )
+        for label, rows in created.items():
+            self.stdout.write(f'{label}: {rows}')
+        self.stdout.write(self.style.SUCCESS(f'Seeded {sum(created.values())} rows'))
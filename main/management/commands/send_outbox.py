@@ -0,0 +1,23 @@
+import time
+from django.core.management.base import BaseCommand
+from django.db import connections
+from main.outbox import drain_outbox
+
+
+class Command(BaseCommand):
+    help = 'Send queued outbound email, retrying failures with exponential backoff'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='Keep running and poll for new email')
+        parser.add_argument('--interval', type=float, default=5.0, help='Seconds between polls with --loop')
+        parser.add_argument('--batch-size', type=int, default=None, help='Messages sent per SMTP connection')
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = drain_outbox(options['batch_size'])
+            if sent or failed or not options['loop']:
+                self.stdout.write(f'Sent {sent} email(s), {failed} failed')
+            if not options['loop']:
+                return
+            connections.close_all()
+            time.sleep(options['interval'])
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from main.rollups import update_security_rollups
+
+
+class Command(BaseCommand):
+    help = 'Incrementally fold new security events and contact submissions into the rollup tables'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=2000, help='Rows read per transaction')
+
+    def handle(self, *args, **options):
+        processed = update_security_rollups(batch_size=options['batch_size'])
+        for scan, count in processed.items():
+            self.stdout.write(f'{scan}: {count} new row(s)')
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from main.cache_warmer import DEFAULT_CONCURRENCY, DEFAULT_LIST_PAGES, public_urls, warm
+
+
+class Command(BaseCommand):
+    help = 'Request every public page once so the first visitors after a deploy or cache clear find warm caches'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=DEFAULT_LIST_PAGES,
+                            help='Pages to warm of each blog and portfolio list (and of each category and tag filter)')
+        parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY, help='Requests in flight at once')
+        parser.add_argument('--skip-resume-pdf', action='store_true', help='Do not render the resume PDF')
+
+    def handle(self, *args, **options):
+        import time
+
+        start = time.perf_counter()
+        if not options['skip_resume_pdf']:
+            from main.resume_pdf import build_resume_pdf
+            try:
+                self.stdout.write(f'Resume PDF: {build_resume_pdf()}')
+            except Exception as e:
+                self.stderr.write(f'Could not render the resume PDF: {e}')
+
+        paths = public_urls(list_pages=options['pages'])
+        results = warm(paths, concurrency=options['concurrency'])
+        failed = [result for result in results if result.status >= 400]
+        for result in failed:
+            self.stderr.write(f'{result.status} {result.path}')
+
+        slowest = sorted(results, key=lambda result: result.ms, reverse=True)[:5]
+        self.stdout.write('Slowest: ' + ', '.join(f'{result.path} {result.ms}ms' for result in slowest))
+        summary = f'Warmed {len(results) - len(failed)} of {len(results)} URLs in {time.perf_counter() - start:.1f}s'
+        self.stdout.write(self.style.WARNING(summary) if failed else self.style.SUCCESS(summary))
@@ -1,12 +1,24 @@
 """
 Security middleware for enhanced protection
+
+All of these are async-capable (see portfolio_site/asgi_support.py). Those
+that read the cache or session on every request (rate limiting, session
+refresh) keep MiddlewareMixin and run their hooks in a thread under ASGI;
+the rest run on the event loop.
 """
 import logging
+import time
 from django.core.cache import cache
 from django.http import HttpResponseForbidden, HttpResponse
 from django.utils.deprecation import MiddlewareMixin
 from django.conf import settings
-import re
+from portfolio_site.asgi_support import InlineMiddlewareMixin
+from portfolio_site.metrics import RATE_LIMIT_DECISIONS
+from portfolio_site.profiling import TimedMiddlewareMixin
+from .cache_warmer import WARMER_ENVIRON_KEY
+from .security_rules import (
+    MALICIOUS_AGENT_RULES, SQL_INJECTION_RULES, SUSPICIOUS_EXTENSIONS, SUSPICIOUS_REQUEST_RULES,
+)
 
 logger = logging.getLogger('django.security')
 
@@ -16,7 +28,7 @@ class HttpResponseTooManyRequests(HttpResponse):
     status_code = 429
 
 
-class SecurityHeadersMiddleware(MiddlewareMixin):
+class SecurityHeadersMiddleware(TimedMiddlewareMixin, InlineMiddlewareMixin):
     """Add additional security headers to responses"""
     
     def process_response(self, request, response):
@@ -49,7 +61,38 @@ class SecurityHeadersMiddleware(MiddlewareMixin):
         return response
 
 
-class RateLimitMiddleware(MiddlewareMixin):
+class SessionRefreshMiddleware(TimedMiddlewareMixin, MiddlewareMixin):
+    """
+    Extend logged-in sessions only when they are close to expiring.
+    
+    Replaces SESSION_SAVE_EVERY_REQUEST: the session is re-saved (and its
+    cookie and server-side expiry pushed back) at most once every
+    SESSION_REFRESH_THRESHOLD seconds instead of on every request, so it
+    never expires sooner than SESSION_COOKIE_AGE minus the threshold after
+    the last request. Requests without a session cookie are skipped before
+    the session or user is loaded.
+    """
+    
+    REFRESHED_AT_KEY = '_session_refreshed_at'
+    
+    def process_response(self, request, response):
+        session = getattr(request, 'session', None)
+        if session is None or not session.session_key:
+            return response
+        user = getattr(request, 'user', None)
+        if user is None or not user.is_authenticated:
+            return response
+        
+        now = int(time.time())
+        refreshed_at = session.get(self.REFRESHED_AT_KEY)
+        threshold = getattr(settings, 'SESSION_REFRESH_THRESHOLD', 15 * 60)
+        if refreshed_at is None or now - refreshed_at >= threshold:
+            # Marks the session modified, so SessionMiddleware saves it and re-sends the cookie
+            session[self.REFRESHED_AT_KEY] = now
+        return response
+
+
+class RateLimitMiddleware(TimedMiddlewareMixin, MiddlewareMixin):
     """Rate limiting middleware to prevent abuse"""
     
     def process_request(self, request):
@@ -61,8 +104,12 @@ class RateLimitMiddleware(MiddlewareMixin):
         ):
             return None
         
-        # Skip rate limiting for health check endpoint
-        if request.path == '/health/':
+        # Skip rate limiting for the health probes
+        if request.path.startswith('/health/'):
+            return None
+        
+        # Skip the in-process cache warmer (see main.cache_warmer); HTTP clients cannot set this key
+        if request.META.get(WARMER_ENVIRON_KEY):
             return None
         
         # Skip rate limiting for GET requests to main pages in development
@@ -75,16 +122,19 @@ class RateLimitMiddleware(MiddlewareMixin):
         # Different rate limits for different endpoints
         if request.path == '/contact/' and request.method == 'POST':
             # Contact form: 10 requests per 15 minutes (increased from 5)
+            scope = 'contact'
             rate_limit_key = f'rate_limit_contact_{client_ip}'
             max_requests = 10
             time_window = 900  # 15 minutes
         elif request.path.startswith('/' + getattr(settings, 'ADMIN_URL', 'admin/')):
             # Admin panel: 50 requests per 5 minutes (increased from 20)
+            scope = 'admin'
             rate_limit_key = f'rate_limit_admin_{client_ip}'
             max_requests = 50
             time_window = 300  # 5 minutes
         else:
             # General pages: 200 requests per 5 minutes (increased from 100)
+            scope = 'general'
             rate_limit_key = f'rate_limit_general_{client_ip}'
             max_requests = 200
             time_window = 300  # 5 minutes
@@ -95,9 +145,11 @@ class RateLimitMiddleware(MiddlewareMixin):
         except Exception as e:
             # If cache is not available, skip rate limiting
             logger.warning(f'Cache not available for rate limiting: {e}')
+            RATE_LIMIT_DECISIONS.inc(scope=scope, decision='unchecked')
             return None
         
         if current_requests >= max_requests:
+            RATE_LIMIT_DECISIONS.inc(scope=scope, decision='blocked')
             logger.warning(f'Rate limit exceeded for IP {client_ip} on {request.path}')
             # Log rate limit violation
             try:
@@ -115,6 +167,7 @@ class RateLimitMiddleware(MiddlewareMixin):
                 logger.error(f'Failed to log rate limit event: {e}')
             return HttpResponseTooManyRequests('Rate limit exceeded. Please try again later.')
         
+        RATE_LIMIT_DECISIONS.inc(scope=scope, decision='allowed')
         # Increment counter
         try:
             cache.set(rate_limit_key, current_requests + 1, time_window)
@@ -134,43 +187,40 @@ class RateLimitMiddleware(MiddlewareMixin):
         return ip
 
 
-class SecurityLoggingMiddleware(MiddlewareMixin):
+class SecurityLoggingMiddleware(TimedMiddlewareMixin, InlineMiddlewareMixin):
     """Log security-related events"""
     
+    def request_blocks(self, request):
+        # Only requests that get a SecurityEvent row need the database
+        return bool(
+            SUSPICIOUS_REQUEST_RULES.first_match(request.get_full_path())
+            or request.path.startswith('/' + getattr(settings, 'ADMIN_URL', 'admin/'))
+        )
+    
     def process_request(self, request):
-        # Log suspicious requests
-        suspicious_patterns = [
-            r'\.\./',  # Directory traversal
-            r'<script',  # XSS attempts
-            r'union\s+select',  # SQL injection
-            r'exec\(',  # Code execution
-            r'eval\(',  # Code evaluation
-            r'base64_decode',  # Encoded payloads
-        ]
-        
-        # Check URL and parameters for suspicious patterns
+        # Check URL and parameters for suspicious patterns (see main.security_rules)
         full_url = request.get_full_path()
-        for pattern in suspicious_patterns:
-            if re.search(pattern, full_url, re.IGNORECASE):
-                client_ip = self.get_client_ip(request)
-                logger.warning(
-                    f'Suspicious request detected from IP {client_ip}: {full_url}'
+        rule = SUSPICIOUS_REQUEST_RULES.first_match(full_url)
+        if rule:
+            pattern = SUSPICIOUS_REQUEST_RULES.patterns[rule]
+            client_ip = self.get_client_ip(request)
+            logger.warning(
+                f'Suspicious request detected from IP {client_ip}: {full_url}'
+            )
+            # Log to database
+            try:
+                from .models import SecurityEvent
+                SecurityEvent.log_event(
+                    event_type='suspicious_request',
+                    ip_address=client_ip,
+                    description=f'Suspicious pattern detected: {pattern}',
+                    severity='medium',
+                    user_agent=request.META.get('HTTP_USER_AGENT', ''),
+                    path=request.path,
+                    method=request.method
                 )
-                # Log to database
-                try:
-                    from .models import SecurityEvent
-                    SecurityEvent.log_event(
-                        event_type='suspicious_request',
-                        ip_address=client_ip,
-                        description=f'Suspicious pattern detected: {pattern}',
-                        severity='medium',
-                        user_agent=request.META.get('HTTP_USER_AGENT', ''),
-                        path=request.path,
-                        method=request.method
-                    )
-                except Exception as e:
-                    logger.error(f'Failed to log security event: {e}')
-                break
+            except Exception as e:
+                logger.error(f'Failed to log security event: {e}')
         
         # Log admin access attempts
         admin_url = getattr(settings, 'ADMIN_URL', 'admin/')
@@ -204,65 +254,54 @@ class SecurityLoggingMiddleware(MiddlewareMixin):
         return ip
 
 
-class BlockSuspiciousRequestsMiddleware(MiddlewareMixin):
+class BlockSuspiciousRequestsMiddleware(TimedMiddlewareMixin, InlineMiddlewareMixin):
     """Block obviously malicious requests"""
     
+    def request_blocks(self, request):
+        # Only malicious user agents are recorded as a SecurityEvent
+        return bool(MALICIOUS_AGENT_RULES.first_match(request.META.get('HTTP_USER_AGENT', '').lower()))
+    
     def process_request(self, request):
         # Skip blocking in debug mode for normal browser requests
-        # Also allow health check endpoint
-        if settings.DEBUG and (request.method == 'GET' or request.path == '/health/'):
+        # Also allow the health probes
+        if settings.DEBUG and (request.method == 'GET' or request.path.startswith('/health/')):
             return None
             
         # Block requests with malicious user agents
         user_agent = request.META.get('HTTP_USER_AGENT', '').lower()
-        malicious_agents = [
-            'sqlmap', 'nikto', 'nessus', 'burp', 'dirbuster', 
-            'gobuster', 'dirb', 'w3af', 'metasploit', 'masscan',
-            'nmap', 'zap', 'acunetix', 'qualys'
-        ]
-        
-        for agent in malicious_agents:
-            if agent in user_agent:
-                client_ip = self.get_client_ip(request)
-                logger.warning(f'Malicious user agent detected from IP {client_ip}: {user_agent}')
-                # Log malicious user agent
-                try:
-                    from .models import SecurityEvent
-                    SecurityEvent.log_event(
-                        event_type='security_scan',
-                        ip_address=client_ip,
-                        description=f'Malicious user agent detected: {agent}',
-                        severity='high',
-                        user_agent=user_agent,
-                        path=request.path,
-                        method=request.method
-                    )
-                except Exception as e:
-                    logger.error(f'Failed to log malicious user agent event: {e}')
-                return HttpResponseForbidden('Access denied - Malicious user agent detected')
+        agent = MALICIOUS_AGENT_RULES.first_match(user_agent)
+        if agent:
+            client_ip = self.get_client_ip(request)
+            logger.warning(f'Malicious user agent detected from IP {client_ip}: {user_agent}')
+            # Log malicious user agent
+            try:
+                from .models import SecurityEvent
+                SecurityEvent.log_event(
+                    event_type='security_scan',
+                    ip_address=client_ip,
+                    description=f'Malicious user agent detected: {agent}',
+                    severity='high',
+                    user_agent=user_agent,
+                    path=request.path,
+                    method=request.method
+                )
+            except Exception as e:
+                logger.error(f'Failed to log malicious user agent event: {e}')
+            return HttpResponseForbidden('Access denied - Malicious user agent detected')
         
         # Block requests with suspicious file extensions (only for direct file access)
-        suspicious_extensions = ['.php', '.asp', '.jsp', '.cgi', '.pl']
         path = request.path.lower()
-        
-        for ext in suspicious_extensions:
-            if path.endswith(ext):
-                client_ip = self.get_client_ip(request)
-                logger.warning(f'Request for suspicious file from IP {client_ip}: {path}')
-                return HttpResponseForbidden('Access denied - Suspicious file request')
+        if path.endswith(SUSPICIOUS_EXTENSIONS):
+            client_ip = self.get_client_ip(request)
+            logger.warning(f'Request for suspicious file from IP {client_ip}: {path}')
+            return HttpResponseForbidden('Access denied - Suspicious file request')
         
         # Block obvious SQL injection attempts in URL
-        sql_patterns = [
-            r'union\s+select', r'drop\s+table', r'insert\s+into', 
-            r'delete\s+from', r'update\s+.*set', r'\bor\s+1=1\b'
-        ]
-        
         full_path = request.get_full_path().lower()
-        for pattern in sql_patterns:
-            if re.search(pattern, full_path, re.IGNORECASE):
-                client_ip = self.get_client_ip(request)
-                logger.warning(f'SQL injection attempt detected from IP {client_ip}: {full_path}')
-                return HttpResponseForbidden('Access denied - SQL injection attempt detected')
+        if SQL_INJECTION_RULES.first_match(full_path):
+            client_ip = self.get_client_ip(request)
+            logger.warning(f'SQL injection attempt detected from IP {client_ip}: {full_path}')
+            return HttpResponseForbidden('Access denied - SQL injection attempt detected')
         
         return None
     
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0013_outboundemail'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contactsubmission',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='contactsubmission',
+            name='ip_address',
+            field=models.GenericIPAddressField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='contactsubmission',
+            name='is_spam',
+            field=models.BooleanField(default=False),
+        ),
+        migrations.AddField(
+            model_name='contactsubmission',
+            name='spam_score',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='contactsubmission',
+            index=models.Index(fields=['is_spam', 'created_at'], name='main_contac_is_spam_36fa2b_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:36
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0014_contactsubmission_spam_scoring'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScanWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SecurityRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('day', 'Day')], max_length=10)),
+                ('bucket_start', models.DateTimeField()),
+                ('metric', models.CharField(max_length=50)),
+                ('count', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-bucket_start', 'metric'],
+                'constraints': [models.UniqueConstraint(fields=('metric', 'period', 'bucket_start'), name='unique_security_rollup_bucket')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:37
+
+from django.db import migrations, models
+
+
+def reset_rollups(apps, schema_editor):
+    """Rebuild rollups from scratch so hourly buckets and sketches are backfilled"""
+    SecurityRollup = apps.get_model('main', 'SecurityRollup')
+    ScanWatermark = apps.get_model('main', 'ScanWatermark')
+    SecurityRollup.objects.all().delete()
+    ScanWatermark.objects.filter(name__startswith='rollup:').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0015_scanwatermark_securityrollup'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='securityrollup',
+            name='sketch',
+            field=models.BinaryField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='securityrollup',
+            name='period',
+            field=models.CharField(choices=[('hour', 'Hour'), ('day', 'Day')], max_length=10),
+        ),
+        migrations.RunPython(reset_rollups, migrations.RunPython.noop),
+    ]
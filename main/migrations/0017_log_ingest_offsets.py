@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:43
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0016_securityrollup_hourly_sketch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scanwatermark',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AlterField(
+            model_name='scanwatermark',
+            name='name',
+            field=models.CharField(max_length=255, unique=True),
+        ),
+        migrations.AlterField(
+            model_name='securityevent',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('main', '0017_log_ingest_offsets'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='achievement',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order', 'title'], name='main_achievement_active_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='testimonial',
+            index=models.Index(condition=models.Q(('is_active', True)), fields=['order', 'name'], name='main_testimonial_active_idx'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 from .validators import validate_cv_upload
 import os
 
@@ -30,10 +31,18 @@ class ContactSubmission(models.Model):
     email = models.EmailField()
     subject = models.CharField(max_length=200)
     message = models.TextField()
+    ip_address = models.GenericIPAddressField(null=True, blank=True)
+    # Spam scoring is done at ingest time (see main.spam)
+    spam_score = models.PositiveSmallIntegerField(default=0)
+    is_spam = models.BooleanField(default=False)
+    content_hash = models.CharField(max_length=64, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['is_spam', 'created_at']),
+        ]
     
     def __str__(self):
         return f'{self.name} - {self.subject}'
@@ -129,6 +138,9 @@ class Achievement(models.Model):
     
     class Meta:
         ordering = ['order', 'title']
+        indexes = [
+            models.Index(fields=['order', 'title'], condition=models.Q(is_active=True), name='main_achievement_active_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -154,6 +166,9 @@ class Testimonial(models.Model):
     
     class Meta:
         ordering = ['order', 'name']
+        indexes = [
+            models.Index(fields=['order', 'name'], condition=models.Q(is_active=True), name='main_testimonial_active_idx'),
+        ]
     
     def __str__(self):
         return f'{self.name} - {self.company}'
@@ -202,7 +217,8 @@ class SecurityEvent(models.Model):
     description = models.TextField()
     path = models.CharField(max_length=500, blank=True)
     method = models.CharField(max_length=10, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Set explicitly when backfilling from log files (see main.log_ingest)
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
     
     class Meta:
         ordering = ['-created_at']
@@ -218,10 +234,84 @@ class SecurityEvent(models.Model):
     @classmethod
     def log_event(cls, event_type, ip_address, description, severity='low', **kwargs):
         """Convenience method to log security events"""
-        return cls.objects.create(
+        from portfolio_site.metrics import SECURITY_EVENTS
+        from .event_stream import publish_security_event
+
+        event = cls.objects.create(
             event_type=event_type,
             ip_address=ip_address,
             description=description,
             severity=severity,
             **kwargs
-        )
\ No newline at end of file
+        )
+        publish_security_event(event)
+        SECURITY_EVENTS.inc(event_type=event_type, severity=severity)
+        return event
+
+class OutboundEmail(models.Model):
+    """Durable outbox for email that is sent by a background worker"""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+    ]
+    
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.TextField(help_text='Comma-separated list of recipient addresses')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+    
+    def __str__(self):
+        return f'{self.subject} ({self.get_status_display()})'
+    
+    @property
+    def recipient_list(self):
+        return [address.strip() for address in self.recipients.split(',') if address.strip()]
+
+
+class ScanWatermark(models.Model):
+    """High-water mark (last processed id or file offset) for an incremental scan"""
+    name = models.CharField(max_length=255, unique=True)
+    last_id = models.BigIntegerField(default=0)
+    # Log ingestion: last_id holds a byte offset and this identifies the file it belongs to
+    fingerprint = models.CharField(max_length=64, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    def __str__(self):
+        return f'{self.name} @ {self.last_id}'
+
+
+class SecurityRollup(models.Model):
+    """Time-bucketed counters kept current by the incremental scanners"""
+    PERIOD_CHOICES = [
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    
+    period = models.CharField(max_length=10, choices=PERIOD_CHOICES)
+    bucket_start = models.DateTimeField()
+    metric = models.CharField(max_length=50)
+    count = models.BigIntegerField(default=0)
+    # HyperLogLog registers for distinct-count metrics (see main.hyperloglog)
+    sketch = models.BinaryField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-bucket_start', 'metric']
+        constraints = [
+            models.UniqueConstraint(fields=['metric', 'period', 'bucket_start'], name='unique_security_rollup_bucket'),
+        ]
+    
+    def __str__(self):
+        return f'{self.metric} {self.period} {self.bucket_start:%Y-%m-%d %H:%M}: {self.count}'
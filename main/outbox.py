@@ -0,0 +1,188 @@
+"""
+Email outbox
+
+Views only insert an OutboundEmail row; delivery happens later, either in the
+send_outbox management command or in a per-process background thread
+(OUTBOX_WORKER = 'thread'). Each batch reuses one SMTP connection, and failed
+sends are retried with exponential backoff until OUTBOX_MAX_ATTEMPTS.
+
+The thread starts when a gunicorn worker boots (gunicorn.conf.py), so rows
+left pending or awaiting a retry across a restart are sent without waiting
+for a new email, and otherwise on the first enqueue in a process.
+
+Concurrent senders claim rows with SELECT ... FOR UPDATE SKIP LOCKED, which
+SQLite does not support: there Django ignores it, two senders can claim the
+same rows and an email can go out twice. On SQLite, run a single sender
+(one web worker, or OUTBOX_WORKER = 'command' with one send_outbox --loop).
+"""
+import logging
+import os
+import random
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.utils import timezone
+
+logger = logging.getLogger('portfolio_site')
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+def enqueue_email(subject, body, from_email, recipients):
+    """Queue an email for background delivery and wake the worker on commit"""
+    from .models import OutboundEmail
+
+    message = OutboundEmail.objects.create(
+        subject=subject[:255],
+        body=body,
+        from_email=from_email,
+        recipients=','.join(recipients),
+    )
+    transaction.on_commit(wake_worker)
+    return message
+
+
+def backoff_delay(attempts):
+    """Seconds to wait before retry number ``attempts`` (1-based), with jitter"""
+    base = _setting('OUTBOX_RETRY_BASE_DELAY', 60)
+    cap = _setting('OUTBOX_RETRY_MAX_DELAY', 6 * 60 * 60)
+    delay = min(cap, base * (2 ** (attempts - 1)))
+    return delay * random.uniform(0.8, 1.2)
+
+
+def _claim_batch(batch_size):
+    from .models import OutboundEmail
+
+    with transaction.atomic():
+        due = (
+            OutboundEmail.objects
+            .select_for_update(skip_locked=True)
+            .filter(status='pending', next_attempt_at__lte=timezone.now())
+            .order_by('next_attempt_at')[:batch_size]
+        )
+        batch = list(due)
+        if batch:
+            # Push claimed rows into the future so concurrent workers skip them
+            lease = timezone.now() + timedelta(seconds=_setting('OUTBOX_LEASE_SECONDS', 300))
+            OutboundEmail.objects.filter(pk__in=[m.pk for m in batch]).update(next_attempt_at=lease)
+    return batch
+
+
+def _record_failure(message, error):
+    message.attempts += 1
+    message.last_error = str(error)[:2000]
+    if message.attempts >= _setting('OUTBOX_MAX_ATTEMPTS', 5):
+        message.status = 'failed'
+        logger.error(f"Giving up on outbound email {message.pk} after {message.attempts} attempts: {error}")
+    else:
+        message.status = 'pending'
+        message.next_attempt_at = timezone.now() + timedelta(seconds=backoff_delay(message.attempts))
+        logger.warning(f"Outbound email {message.pk} failed (attempt {message.attempts}), retrying: {error}")
+    message.save(update_fields=['attempts', 'last_error', 'status', 'next_attempt_at'])
+
+
+def process_outbox(batch_size=None):
+    """
+    Send one batch of due emails over a single connection.
+
+    Returns a (sent, failed) tuple of message counts for this batch.
+    """
+    batch = _claim_batch(batch_size or _setting('OUTBOX_BATCH_SIZE', 20))
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as e:
+        for message in batch:
+            _record_failure(message, e)
+        return 0, len(batch)
+
+    try:
+        for message in batch:
+            try:
+                EmailMessage(
+                    message.subject,
+                    message.body,
+                    message.from_email,
+                    message.recipient_list,
+                    connection=connection,
+                ).send()
+            except Exception as e:
+                _record_failure(message, e)
+                failed += 1
+            else:
+                message.status = 'sent'
+                message.attempts += 1
+                message.sent_at = timezone.now()
+                message.last_error = ''
+                message.save(update_fields=['status', 'attempts', 'sent_at', 'last_error'])
+                sent += 1
+    finally:
+        try:
+            connection.close()
+        except Exception:
+            pass
+    return sent, failed
+
+
+def drain_outbox(batch_size=None):
+    """Process batches until nothing is due"""
+    total_sent = total_failed = 0
+    while True:
+        sent, failed = process_outbox(batch_size)
+        total_sent += sent
+        total_failed += failed
+        if not sent and not failed:
+            return total_sent, total_failed
+
+
+class OutboxWorker:
+    """Per-process daemon thread that drains the outbox when woken"""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def _ensure_started(self):
+        # Threads do not survive fork, so restart in each worker process
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='outbox-worker', daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        self._ensure_started()
+        self._event.set()
+
+    def _run(self):
+        interval = _setting('OUTBOX_POLL_INTERVAL', 30)
+        while True:
+            self._event.wait(interval)
+            self._event.clear()
+            try:
+                drain_outbox()
+            except Exception as e:
+                logger.error(f"Outbox worker error: {e}")
+            finally:
+                connections.close_all()
+
+
+worker = OutboxWorker()
+
+
+def wake_worker():
+    """Start this process's outbox thread if needed and have it send whatever is due"""
+    if _setting('OUTBOX_WORKER', 'thread') == 'thread':
+        worker.wake()
@@ -0,0 +1,202 @@
+"""
+Optional monthly range partitioning of SecurityEvent on PostgreSQL
+
+`python manage.py partition_security_events --convert` rebuilds the table
+as `PARTITION BY RANGE (created_at)` with one partition per month plus a
+default partition. Each partition carries its own copies of the
+(event_type, created_at), (ip_address, created_at) and (severity,
+created_at) indexes, so index size follows the retention window and the
+retention job can drop a whole expired month instead of deleting its rows.
+
+The primary key becomes (id, created_at), as PostgreSQL requires the
+partition key in it; ids still come from the same sequence. Every other
+database, and unconverted PostgreSQL tables, keep the plain table and the
+chunked deletes in main.retention.
+"""
+import logging
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import connection, transaction
+
+logger = logging.getLogger('portfolio_site')
+
+MONTHS_AHEAD = 3
+
+
+def _table():
+    from .models import SecurityEvent
+    return SecurityEvent._meta.db_table
+
+
+def month_start(moment):
+    moment = moment.astimezone(dt_timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=dt_timezone.utc)
+
+
+def add_months(moment, months):
+    month = moment.month - 1 + months
+    return moment.replace(year=moment.year + month // 12, month=month % 12 + 1)
+
+
+def partition_name(start):
+    return f'{_table()}_p{start:%Y_%m}'
+
+
+def is_partitioned():
+    if connection.vendor != 'postgresql':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = %s',
+            [_table()],
+        )
+        return cursor.fetchone() is not None
+
+
+def monthly_partitions():
+    """Return [(name, month_start)] for the existing monthly partitions, oldest first"""
+    pattern = re.compile(rf'^{re.escape(_table())}_p(\d{{4}})_(\d{{2}})$')
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class parent ON parent.oid = pg_inherits.inhparent '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE parent.relname = %s',
+            [_table()],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = []
+    for name in names:
+        match = pattern.match(name)
+        if match:
+            partitions.append((name, datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=dt_timezone.utc)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def _create_partition(cursor, start):
+    qn = connection.ops.quote_name
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {qn(partition_name(start))} PARTITION OF {qn(_table())} '
+        'FOR VALUES FROM (%s) TO (%s)',
+        [start, add_months(start, 1)],
+    )
+
+
+def ensure_monthly_partitions(months_ahead=MONTHS_AHEAD, now=None):
+    """Create partitions for the current month and ``months_ahead`` after it"""
+    if not is_partitioned():
+        return []
+    start = month_start(now or datetime.now(dt_timezone.utc))
+    existing = {name for name, _ in monthly_partitions()}
+    created = []
+    with connection.cursor() as cursor:
+        for offset in range(months_ahead + 1):
+            month = add_months(start, offset)
+            if partition_name(month) not in existing:
+                _create_partition(cursor, month)
+                created.append(partition_name(month))
+    return created
+
+
+def convert_to_partitioned(months_ahead=MONTHS_AHEAD):
+    """
+    Rebuild the SecurityEvent table as a monthly range-partitioned table.
+
+    Runs in one transaction holding an exclusive lock on the table, so the
+    site's event logging waits for the copy; run it in a quiet period.
+    """
+    from .models import SecurityEvent
+
+    if connection.vendor != 'postgresql':
+        raise RuntimeError('Partitioning is only supported on PostgreSQL')
+    if is_partitioned():
+        return False
+
+    qn = connection.ops.quote_name
+    table = _table()
+    legacy = f'{table}_legacy'
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE')
+        cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}')
+        cursor.execute(
+            f'CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING IDENTITY INCLUDING CONSTRAINTS) '
+            'PARTITION BY RANGE (created_at)'
+        )
+        cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + "_part_pkey")} PRIMARY KEY (id, created_at)')
+
+        cursor.execute(f'SELECT MIN(created_at) FROM {qn(legacy)}')
+        oldest = cursor.fetchone()[0]
+        now = datetime.now(dt_timezone.utc)
+        month = month_start(oldest or now)
+        last = add_months(month_start(now), months_ahead)
+        while month <= last:
+            _create_partition(cursor, month)
+            month = add_months(month, 1)
+        cursor.execute(f'CREATE TABLE {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+
+        cursor.execute(f'INSERT INTO {qn(table)} SELECT * FROM {qn(legacy)}')
+
+        # Serial (pre-identity) ids: keep the sequence when the old table goes
+        cursor.execute(
+            'SELECT attidentity FROM pg_attribute WHERE attrelid = %s::regclass AND attname = %s',
+            [legacy, 'id'],
+        )
+        if not cursor.fetchone()[0]:
+            cursor.execute('SELECT pg_get_serial_sequence(%s, %s)', [legacy, 'id'])
+            sequence = cursor.fetchone()[0]
+            if sequence:
+                cursor.execute(f'ALTER SEQUENCE {sequence} OWNED BY {qn(table)}.id')
+        cursor.execute(
+            f'SELECT setval(pg_get_serial_sequence(%s, %s), COALESCE(MAX(id), 0) + 1, false) FROM {qn(table)}',
+            [table, 'id'],
+        )
+        cursor.execute(f'DROP TABLE {qn(legacy)}')
+
+        # Built after the copy; each is a partitioned index cascaded to every month
+        with connection.schema_editor(atomic=False) as schema_editor:
+            for index in SecurityEvent._meta.indexes:
+                schema_editor.add_index(SecurityEvent, index)
+    logger.info(f'Converted {table} to monthly range partitions')
+    return True
+
+
+def drop_expired_partitions(cutoff, max_id, archiver=None, chunk_size=1000):
+    """
+    Archive and drop monthly partitions that end on or before ``cutoff``.
+
+    Partitions holding ids above ``max_id`` (not yet counted by the rollup
+    scanner) are kept. Returns the number of rows dropped.
+    """
+    from .models import SecurityEvent
+
+    if not is_partitioned():
+        return 0
+
+    qn = connection.ops.quote_name
+    dropped = 0
+    for name, start in monthly_partitions():
+        end = add_months(start, 1)
+        if end > cutoff:
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f'LOCK TABLE {qn(name)} IN SHARE MODE')
+            cursor.execute(f'SELECT COUNT(*), COALESCE(MAX(id), 0) FROM {qn(name)}')
+            rows, newest = cursor.fetchone()
+            if newest > max_id:
+                continue
+            if archiver is not None and rows:
+                chunk = []
+                events = SecurityEvent.objects.filter(created_at__gte=start, created_at__lt=end).order_by('pk')
+                for row in events.values().iterator(chunk_size=chunk_size):
+                    chunk.append(row)
+                    if len(chunk) >= chunk_size:
+                        archiver.write(chunk)
+                        chunk = []
+                if chunk:
+                    archiver.write(chunk)
+            cursor.execute(f'ALTER TABLE {qn(_table())} DETACH PARTITION {qn(name)}')
+            cursor.execute(f'DROP TABLE {qn(name)}')
+        logger.info(f'Dropped expired partition {name} ({rows} rows)')
+        dropped += rows
+    return dropped
@@ -0,0 +1,160 @@
+"""
+Query-count and wall-time budgets for the public pages
+
+Each page in PUBLIC_PAGES is requested against the data from
+main.perf_fixtures with the cache cleared first, so the numbers are those
+of a cold request. The query count must not exceed the one recorded in
+perf_baseline.json; that is the gate, and it does not depend on the machine.
+The median time of a few requests is compared with PERF_TIME_TOLERANCE
+times the recorded time (plus PERF_TIME_SLACK_MS, so fast pages do not fail
+on noise), but the recorded times come from one developer machine, so an
+overrun is only reported unless PERF_CHECK_TIME=1 (on hardware comparable
+to the one that recorded the baseline).
+
+After an intended change, re-record the baseline with
+
+    PERF_UPDATE_BASELINE=1 python manage.py test main.tests.PerformanceBudgetTest
+
+and commit perf_baseline.json with the change.
+"""
+import json
+import os
+import statistics
+import time
+
+from django.core.cache import caches
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'perf_baseline.json')
+
+DEFAULT_TIME_TOLERANCE = 3.0
+DEFAULT_TIME_SLACK_MS = 25
+REPEAT = 3
+
+
+def _post_detail():
+    from blog.models import BlogPost
+    slug = BlogPost.objects.filter(status='published').values_list('slug', flat=True).first()
+    return reverse('blog:post_detail', kwargs={'slug': slug})
+
+
+def _project_detail():
+    from portfolio.models import Project
+    slug = Project.objects.values_list('slug', flat=True).first()
+    return reverse('portfolio:project_detail', kwargs={'slug': slug})
+
+
+def _blog_category():
+    from blog.models import BlogCategory
+    return reverse('blog:blog_list') + '?category=' + BlogCategory.objects.values_list('slug', flat=True).first()
+
+
+def _blog_tag():
+    from blog.models import Tag
+    return reverse('blog:blog_list') + '?tag=' + Tag.objects.values_list('slug', flat=True).first()
+
+
+# Baseline key -> path, or a callable returning one (for pages that need a slug from the data)
+PUBLIC_PAGES = {
+    'home': lambda: reverse('main:home'),
+    'about': lambda: reverse('main:about'),
+    'resume': lambda: reverse('main:resume'),
+    'contact': lambda: reverse('main:contact'),
+    'health': lambda: reverse('main:health_check'),
+    'blog_list': lambda: reverse('blog:blog_list'),
+    'blog_list_page': lambda: reverse('blog:blog_list') + '?page=5',
+    'blog_list_category': _blog_category,
+    'blog_list_tag': _blog_tag,
+    'blog_list_search': lambda: reverse('blog:blog_list') + '?search=firewall',
+    'blog_search_posts': lambda: reverse('blog:search_posts') + '?q=firewall',
+    'post_detail': _post_detail,
+    'portfolio_list': lambda: reverse('portfolio:portfolio_list'),
+    'portfolio_filter': lambda: reverse('portfolio:filter_projects'),
+    'project_detail': _project_detail,
+    'robots_txt': lambda: reverse('robots_txt'),
+    'security_txt': lambda: reverse('security_txt'),
+}
+
+
+def _clear_caches():
+    for alias in caches:
+        caches[alias].clear()
+
+
+def measure(client, path, repeat=REPEAT):
+    """Return {'path', 'status', 'queries', 'ms'} for cold requests to ``path``"""
+    timings = []
+    queries = None
+    for _ in range(repeat):
+        _clear_caches()
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = client.get(path)
+            timings.append((time.perf_counter() - start) * 1000)
+        # The first request is the one that counts: later ones may reuse per-process state
+        if queries is None:
+            queries = len(captured)
+    return {
+        'path': path,
+        'status': response.status_code,
+        'queries': queries,
+        'ms': round(statistics.median(timings), 1),
+    }
+
+
+def measure_pages(client, pages=None):
+    pages = pages or PUBLIC_PAGES
+    return {name: measure(client, path() if callable(path) else path) for name, path in pages.items()}
+
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = {name: {'queries': result['queries'], 'ms': result['ms']} for name, result in sorted(results.items())}
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2)
+        f.write('\n')
+
+
+def time_overruns(results, baseline, time_tolerance=None, time_slack_ms=None):
+    """Return a message for every page over its time budget"""
+    if time_tolerance is None:
+        time_tolerance = float(os.getenv('PERF_TIME_TOLERANCE', DEFAULT_TIME_TOLERANCE))
+    if time_slack_ms is None:
+        time_slack_ms = float(os.getenv('PERF_TIME_SLACK_MS', DEFAULT_TIME_SLACK_MS))
+
+    overruns = []
+    for name, result in sorted(results.items()):
+        budget = baseline.get(name)
+        if budget is None:
+            continue
+        limit = budget['ms'] * time_tolerance + time_slack_ms
+        if result['ms'] > limit:
+            overruns.append(f"{name} ({result['path']}): {result['ms']}ms, budget {limit:.0f}ms")
+    return overruns
+
+
+def regressions(results, baseline, check_time=None, time_tolerance=None, time_slack_ms=None):
+    """Return a message for every page over its query budget, and its time budget with ``check_time``"""
+    if check_time is None:
+        check_time = os.getenv('PERF_CHECK_TIME', '').lower() in ('true', '1', 'yes')
+
+    problems = []
+    for name, result in sorted(results.items()):
+        budget = baseline.get(name)
+        if budget is None:
+            problems.append(f'{name}: no budget recorded in perf_baseline.json')
+            continue
+        if result['queries'] > budget['queries']:
+            problems.append(f"{name} ({result['path']}): {result['queries']} queries, budget {budget['queries']}")
+    if check_time:
+        problems += time_overruns(results, baseline, time_tolerance, time_slack_ms)
+    return problems
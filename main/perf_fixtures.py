@@ -0,0 +1,179 @@
+"""
+Realistic data volumes for performance tests and benchmarks
+
+seed_performance_data() fills the database with a few thousand blog posts
+and their tags, views, likes and comments, a portfolio of projects, the
+resume sections and a backlog of security events, all through bulk_create.
+The data is deterministic for a given seed, so query counts measured
+against it are repeatable.
+"""
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+BATCH_SIZE = 1000
+
+DEFAULT_VOLUMES = {
+    'posts': 2000,
+    'blog_categories': 8,
+    'tags': 60,
+    'tags_per_post': 3,
+    'views_per_post': 10,
+    'likes_per_post': 4,
+    'comments_per_post': 2,
+    'projects': 40,
+    'technologies': 25,
+    'testimonials': 10,
+    'achievements': 12,
+    'security_events': 20000,
+}
+
+WORDS = (
+    'security threat network django cloud incident response audit policy '
+    'firewall encryption identity access review python testing deploy '
+    'container monitoring vulnerability patch compliance'
+).split()
+
+
+def _ip(number):
+    return f'10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}'
+
+
+def _text(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+
+def seed_performance_data(seed=0, **volumes):
+    """
+    Create the dataset; ``volumes`` overrides entries of DEFAULT_VOLUMES.
+
+    Returns {model label: rows created}.
+    """
+    from blog.models import BlogCategory, BlogPost, Comment, PostLike, PostView, Tag
+    from portfolio.models import Category, Project, ProjectFeature, Technology
+    from .models import (
+        Achievement, Certification, Education, Experience, SecurityEvent, Skill, Testimonial, UserProfile,
+    )
+
+    volumes = {**DEFAULT_VOLUMES, **volumes}
+    rng = random.Random(seed)
+    now = timezone.now()
+    created = {}
+
+    def bulk(model, objects):
+        objects = model.objects.bulk_create(objects, batch_size=BATCH_SIZE)
+        created[model._meta.label] = created.get(model._meta.label, 0) + len(objects)
+        return objects
+
+    author, _ = User.objects.get_or_create(
+        username='perf-author', defaults={'is_staff': True, 'first_name': 'Perf', 'last_name': 'Author'}
+    )
+    UserProfile.objects.get_or_create(user=author)
+
+    # Blog
+    categories = bulk(BlogCategory, [
+        BlogCategory(name=f'Category {i}', slug=f'perf-category-{i}') for i in range(volumes['blog_categories'])
+    ])
+    tags = bulk(Tag, [Tag(name=f'Tag {i}', slug=f'perf-tag-{i}') for i in range(volumes['tags'])])
+    statuses = ['published'] * 8 + ['draft', 'archived']
+    posts = bulk(BlogPost, [
+        BlogPost(
+            title=f'Post {i}: {_text(rng, 5)}',
+            slug=f'perf-post-{i}',
+            author=author,
+            category=rng.choice(categories),
+            excerpt=_text(rng, 30),
+            content=_text(rng, 800),
+            status=rng.choice(statuses),
+            is_featured=i % 50 == 0,
+            reading_time=4,
+            published_at=now - timedelta(hours=i),
+        )
+        for i in range(volumes['posts'])
+    ])
+    Through = BlogPost.tags.through
+    bulk(Through, [
+        Through(blogpost_id=post.pk, tag_id=tag.pk)
+        for post in posts
+        for tag in rng.sample(tags, min(volumes['tags_per_post'], len(tags)))
+    ])
+    bulk(PostView, [
+        PostView(post=post, ip_address=_ip(n))
+        for post in posts for n in range(volumes['views_per_post'])
+    ])
+    bulk(PostLike, [
+        PostLike(post=post, ip_address=_ip(n), is_like=rng.random() < 0.8)
+        for post in posts for n in range(volumes['likes_per_post'])
+    ])
+    bulk(Comment, [
+        Comment(post=post, name=f'Reader {n}', email=f'reader{n}@example.com', content=_text(rng, 40), is_approved=n % 2 == 0)
+        for post in posts for n in range(volumes['comments_per_post'])
+    ])
+
+    # Portfolio
+    project_categories = bulk(Category, [Category(name=f'Area {i}', slug=f'perf-area-{i}') for i in range(5)])
+    technologies = bulk(Technology, [Technology(name=f'Tech {i}') for i in range(volumes['technologies'])])
+    projects = bulk(Project, [
+        Project(
+            title=f'Project {i}',
+            slug=f'perf-project-{i}',
+            description=_text(rng, 200),
+            short_description=_text(rng, 20),
+            category=rng.choice(project_categories),
+            start_date=date(2020, 1, 1) + timedelta(days=30 * i),
+            is_featured=i % 4 != 3,
+            order=i,
+        )
+        for i in range(volumes['projects'])
+    ])
+    ProjectTechnology = Project.technologies.through
+    bulk(ProjectTechnology, [
+        ProjectTechnology(project_id=project.pk, technology_id=technology.pk)
+        for project in projects
+        for technology in rng.sample(technologies, min(4, len(technologies)))
+    ])
+    bulk(ProjectFeature, [
+        ProjectFeature(project=project, title=f'Feature {n}', description=_text(rng, 15), order=n)
+        for project in projects for n in range(3)
+    ])
+
+    # Home and resume
+    bulk(Testimonial, [
+        Testimonial(name=f'Client {i} Person', position='CTO', company=f'Company {i}', content=_text(rng, 40), order=i)
+        for i in range(volumes['testimonials'])
+    ])
+    bulk(Achievement, [
+        Achievement(title=f'Achievement {i}', description=_text(rng, 20), technologies='Nmap, Burp Suite', order=i)
+        for i in range(volumes['achievements'])
+    ])
+    bulk(Skill, [Skill(name=f'Skill {i}', category=('skill', 'tools', 'soft')[i % 3], proficiency=80) for i in range(15)])
+    bulk(Experience, [
+        Experience(company=f'Employer {i}', position='Engineer', start_date=date(2015 + i, 1, 1), description=_text(rng, 30))
+        for i in range(4)
+    ])
+    bulk(Education, [
+        Education(institution='University', degree='BSc', field_of_study='Computer Science', start_date=date(2010, 9, 1))
+    ])
+    bulk(Certification, [
+        Certification(name=f'Certification {i}', issuing_organization='ISC2', issue_date=date(2018 + i, 6, 1))
+        for i in range(5)
+    ])
+
+    # Security events spread over the last 90 days
+    event_types = [choice for choice, _ in SecurityEvent.EVENT_TYPES]
+    severities = [choice for choice, _ in SecurityEvent.SEVERITY_LEVELS]
+    bulk(SecurityEvent, [
+        SecurityEvent(
+            event_type=rng.choice(event_types),
+            severity=rng.choice(severities),
+            ip_address=_ip(rng.randrange(5000)),
+            description=_text(rng, 8),
+            path='/admin/login/',
+            method='POST',
+            created_at=now - timedelta(seconds=rng.randrange(90 * 24 * 3600)),
+        )
+        for _ in range(volumes['security_events'])
+    ])
+    return created
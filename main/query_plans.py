@@ -0,0 +1,128 @@
+"""
+EXPLAIN the queries each public view runs
+
+Every page is requested through the test client inside a transaction that
+is rolled back (so view tracking and similar writes leave nothing behind),
+each SELECT it issues is captured with its parameters, and the database's
+own plan for it is read back with EXPLAIN (EXPLAIN QUERY PLAN on SQLite).
+Plans that read a table sequentially to answer a filtered query are
+flagged; an unfiltered query (all categories, all skills) has to read every
+row anyway.
+
+PostgreSQL will sequentially scan a table that fits in a few pages whatever
+indexes exist, so on a small dataset a flag is a prompt to look, not proof
+of a missing index; `--no-seqscan` asks the planner to avoid them where an
+index makes that possible.
+
+Run `python manage.py explain_queries` (see the command for options).
+"""
+import re
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import Client
+from django.urls import reverse
+
+# Postgres: 'Seq Scan on blog_blogpost'; SQLite: 'SCAN blog_blogpost' (an index scan says 'USING ... INDEX')
+POSTGRES_SEQ_SCAN = re.compile(r'Seq Scan on (\w+)')
+SQLITE_SEQ_SCAN = re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)(?! USING)(?:\s|$)')
+
+
+@dataclass
+class QueryPlan:
+    sql: str
+    params: tuple
+    plan: list
+    seq_scans: list = field(default_factory=list)
+
+
+@dataclass
+class ViewReport:
+    path: str
+    status: int
+    queries: list = field(default_factory=list)
+
+    @property
+    def seq_scans(self):
+        return sorted({table for query in self.queries for table in query.seq_scans})
+
+
+def default_paths():
+    """The public pages, with detail pages for the newest published post and project"""
+    from blog.models import BlogPost
+    from portfolio.models import Project
+
+    paths = [
+        reverse('main:home'),
+        reverse('main:about'),
+        reverse('main:resume'),
+        reverse('blog:blog_list'),
+        reverse('blog:search_posts') + '?q=security',
+        reverse('portfolio:portfolio_list'),
+        reverse('portfolio:filter_projects'),
+    ]
+    post = BlogPost.objects.filter(status='published').values_list('slug', flat=True).first()
+    if post:
+        paths.append(reverse('blog:post_detail', kwargs={'slug': post}))
+    project = Project.objects.values_list('slug', flat=True).first()
+    if project:
+        paths.append(reverse('portfolio:project_detail', kwargs={'slug': project}))
+    return paths
+
+
+def sequential_scans(plan):
+    """Tables read sequentially according to ``plan`` (rows as returned by explain())"""
+    pattern = SQLITE_SEQ_SCAN if connection.vendor == 'sqlite' else POSTGRES_SEQ_SCAN
+    tables = []
+    for line in plan:
+        tables.extend(match.group(1) for match in [pattern.search(line)] if match)
+    return tables
+
+
+def explain(sql, params):
+    """Return the plan for one query as a list of text lines"""
+    with connection.cursor() as cursor:
+        cursor.execute(f'{connection.ops.explain_query_prefix()} {sql}', params)
+        rows = cursor.fetchall()
+    if connection.vendor == 'sqlite':
+        return [row[-1] for row in rows]  # (id, parent, notused, detail)
+    return [str(row[0]) for row in rows]
+
+
+class _Recorder:
+    """connection.execute_wrapper that keeps every SELECT with its parameters"""
+
+    def __init__(self):
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not many and sql.lstrip().upper().startswith('SELECT'):
+            self.queries.append((sql, tuple(params or ())))
+        return execute(sql, params, many, context)
+
+
+def _host():
+    for host in settings.ALLOWED_HOSTS:
+        if host and host != '*' and not host.startswith('.'):
+            return host
+    return 'localhost'
+
+
+def explain_view(path, client=None, no_seqscan=False):
+    """Request ``path`` and EXPLAIN every SELECT it ran; returns a ViewReport"""
+    client = client or Client(HTTP_HOST=_host())
+    recorder = _Recorder()
+    with transaction.atomic():
+        with connection.execute_wrapper(recorder):
+            response = client.get(path, secure=not settings.DEBUG)
+        if no_seqscan and connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SET LOCAL enable_seqscan = off')
+        report = ViewReport(path, response.status_code)
+        for sql, params in recorder.queries:
+            plan = explain(sql, params)
+            seq_scans = sequential_scans(plan) if ' WHERE ' in sql else []
+            report.queries.append(QueryPlan(sql, params, plan, seq_scans))
+        transaction.set_rollback(True)
+    return report
@@ -0,0 +1,104 @@
+"""
+Resume helpers shared by the resume views, the PDF renderer and the admin
+cache hooks
+"""
+import hashlib
+import logging
+
+from django.core.cache import cache
+
+logger = logging.getLogger('portfolio_site')
+
+CV_CACHE_KEY = 'resume_cv_document'
+CV_CACHE_TIMEOUT = 60 * 60  # 1 hour
+
+CONTENT_HASH_CACHE_KEY = 'resume_content_hash'
+CONTENT_HASH_CACHE_TIMEOUT = 10 * 60  # 10 minutes
+
+# Map skill categories to the headings used on the resume
+SKILL_CATEGORY_MAPPING = {
+    'skill': 'Skills',
+    'tools': 'Tools',
+    'soft': 'Special Skills',
+}
+
+DEFAULT_RESUME_FILENAME = 'Christopher_Erick_Resume.pdf'
+
+
+def get_cv_document():
+    """
+    Resolve the uploaded CV to a (status, path, filename) tuple.
+
+    The status is one of 'ok', 'no_cv' or 'no_profile'. The result
+    is cached so repeat downloads skip the user/profile queries; the admin
+    clears it through clear_resume_cache() whenever the profile changes.
+    """
+    return cache.get_or_set(CV_CACHE_KEY, _resolve_cv_document, CV_CACHE_TIMEOUT)
+
+
+def _resolve_cv_document():
+    from django.contrib.auth.models import User
+
+    admin_user = User.objects.filter(is_staff=True).select_related('profile').first()
+    if admin_user and hasattr(admin_user, 'profile'):
+        user_profile = admin_user.profile
+        if user_profile.cv_document:
+            return ('ok', user_profile.cv_document.path,
+                    user_profile.cv_filename or DEFAULT_RESUME_FILENAME)
+        return ('no_cv', '', '')
+    return ('no_profile', '', '')
+
+
+def get_resume_context():
+    """Fetch all resume-related data used by the resume page and PDF"""
+    from .models import Education, Certification, Achievement, Skill, Experience
+
+    education_items = getattr(Education, 'objects').all()
+    certifications = getattr(Certification, 'objects').all()
+    achievements = getattr(Achievement, 'objects').filter(is_active=True)
+    skills = getattr(Skill, 'objects').all()
+    experiences = getattr(Experience, 'objects').all()
+
+    # Organize skills by category
+    skills_by_category = {}
+    for skill in skills:
+        mapped_category = SKILL_CATEGORY_MAPPING.get(skill.category, skill.category)
+        skills_by_category.setdefault(mapped_category, []).append(skill)
+
+    return {
+        'education_items': education_items,
+        'certifications': certifications,
+        'achievements': achievements,
+        'experiences': experiences,
+        'skills_by_category': skills_by_category,
+    }
+
+
+def resume_content_hash():
+    """
+    Return a SHA-256 digest of everything that appears on the resume PDF.
+
+    Any edit to the resume models or the personal details changes the digest,
+    so it doubles as the cache key for generated PDFs.
+    """
+    return cache.get_or_set(CONTENT_HASH_CACHE_KEY, _compute_content_hash, CONTENT_HASH_CACHE_TIMEOUT)
+
+
+def _compute_content_hash():
+    from config import PersonalConfig
+    from .models import Education, Certification, Achievement, Skill, Experience
+
+    digest = hashlib.sha256()
+    personal = [
+        PersonalConfig.get_full_name(), PersonalConfig.get_email(),
+        PersonalConfig.get_phone(), PersonalConfig.get_location(),
+        PersonalConfig.get_tagline(), PersonalConfig.get_github_username(),
+    ]
+    digest.update(repr(personal).encode('utf-8'))
+    for model in (Experience, Education, Certification, Achievement, Skill):
+        rows = getattr(model, 'objects').order_by('pk').values_list()
+        digest.update(model.__name__.encode('utf-8'))
+        for row in rows:
+            digest.update(repr(row).encode('utf-8'))
+
+    return digest.hexdigest()
@@ -0,0 +1,188 @@
+"""
+Server-generated resume PDF
+
+The PDF is rendered with reportlab from the same data as the resume page and
+cached on disk under RESUME_PDF_DIR, keyed by resume_content_hash(). Requests
+only ever serve a finished file; rendering runs in a background thread and
+writes atomically so a half-written PDF is never served. A marker in the
+shared cache keeps it to one build per content hash across all processes.
+"""
+import glob
+import logging
+import os
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+
+from .resume import get_resume_context, resume_content_hash
+
+logger = logging.getLogger('portfolio_site')
+
+# Longest a build keeps its marker if its process dies mid-render
+BUILD_MARKER_TIMEOUT = 10 * 60
+
+
+def get_pdf_dir():
+    return getattr(settings, 'RESUME_PDF_DIR', os.path.join(settings.BASE_DIR, 'media', 'resume_cache'))
+
+
+def get_pdf_path(content_hash):
+    return os.path.join(get_pdf_dir(), f'resume-{content_hash[:16]}.pdf')
+
+
+def get_cached_resume_pdf():
+    """Return the path of the PDF for the current resume content, if rendered"""
+    path = get_pdf_path(resume_content_hash())
+    if os.path.exists(path):
+        return path
+    return None
+
+
+def _build_story(context):
+    from reportlab.lib import colors
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.platypus import Paragraph, Spacer, HRFlowable
+    from xml.sax.saxutils import escape
+    from config import PersonalConfig
+
+    styles = getSampleStyleSheet()
+    name_style = ParagraphStyle('Name', parent=styles['Title'], fontSize=20, spaceAfter=2)
+    section_style = ParagraphStyle('Section', parent=styles['Heading2'], textColor=colors.HexColor('#1e40af'),
+                                   spaceBefore=8, spaceAfter=4)
+    item_style = ParagraphStyle('Item', parent=styles['Heading4'], spaceBefore=4, spaceAfter=1)
+    meta_style = ParagraphStyle('Meta', parent=styles['Normal'], textColor=colors.grey, fontSize=9)
+    body_style = styles['BodyText']
+
+    def p(text, style=body_style):
+        return Paragraph(escape(str(text)), style)
+
+    def years(start, end):
+        return f"{start.year} - {end.year if end else 'Present'}"
+
+    contact = [PersonalConfig.get_email(), PersonalConfig.get_phone(), PersonalConfig.get_location()]
+    story = [
+        p(PersonalConfig.get_full_name(), name_style),
+        p(' | '.join(part for part in contact if part), meta_style),
+        Spacer(1, 2 * mm),
+        p(PersonalConfig.get_tagline()),
+        HRFlowable(width='100%', color=colors.HexColor('#334155')),
+    ]
+
+    experiences = list(context['experiences'])
+    if experiences:
+        story.append(p('Experience', section_style))
+        for experience in experiences:
+            story.append(p(f'{experience.position} - {experience.company}', item_style))
+            story.append(p(years(experience.start_date, experience.end_date), meta_style))
+            story.append(p(experience.description))
+            if experience.technologies:
+                story.append(p(experience.technologies, meta_style))
+
+    education_items = list(context['education_items'])
+    if education_items:
+        story.append(p('Education', section_style))
+        for education in education_items:
+            story.append(p(f'{education.degree} - {education.institution}', item_style))
+            story.append(p(f'{education.field_of_study}, {years(education.start_date, education.end_date)}', meta_style))
+            if education.description:
+                story.append(p(education.description))
+
+    certifications = list(context['certifications'])
+    if certifications:
+        story.append(p('Certifications', section_style))
+        for certification in certifications:
+            story.append(p(f'{certification.name} - {certification.issuing_organization}', item_style))
+            story.append(p(str(certification.issue_date.year), meta_style))
+
+    achievements = list(context['achievements'])
+    if achievements:
+        story.append(p('Achievements', section_style))
+        for achievement in achievements:
+            story.append(p(achievement.title, item_style))
+            story.append(p(achievement.description))
+
+    for category, skills in context['skills_by_category'].items():
+        story.append(p(category, section_style))
+        story.append(p(', '.join(skill.name for skill in skills)))
+
+    return story
+
+
+def render_resume_pdf(path):
+    """Render the resume to ``path`` atomically"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.units import mm
+    from reportlab.platypus import SimpleDocTemplate
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        doc = SimpleDocTemplate(tmp_path, pagesize=A4, leftMargin=18 * mm, rightMargin=18 * mm,
+                                topMargin=15 * mm, bottomMargin=15 * mm, title='Resume')
+        doc.build(_build_story(get_resume_context()))
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def _remove_stale_pdfs(current_path):
+    for stale in glob.glob(os.path.join(get_pdf_dir(), 'resume-*.pdf')):
+        if stale != current_path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+
+
+def _build(path):
+    if not os.path.exists(path):
+        render_resume_pdf(path)
+        logger.info(f"Generated resume PDF: {path}")
+    _remove_stale_pdfs(path)
+    return path
+
+
+def build_resume_pdf():
+    """Render the PDF for the current content unless it already exists"""
+    return _build(get_pdf_path(resume_content_hash()))
+
+
+def _build_marker(content_hash):
+    return f'resume_pdf_building:{content_hash[:16]}'
+
+
+def _build_in_background(content_hash, path):
+    try:
+        _build(path)
+    except Exception as e:
+        logger.error(f"Failed to generate resume PDF: {str(e)}")
+    finally:
+        try:
+            cache.delete(_build_marker(content_hash))
+        except Exception as e:
+            logger.error(f"Failed to release resume PDF build marker: {e}")
+        connections.close_all()
+
+
+def schedule_resume_pdf():
+    """
+    Start rendering the current resume PDF off the request path, unless a
+    build for the same content is already running in any process. Returns
+    the started thread, or None.
+    """
+    content_hash = resume_content_hash()
+    # Resolved here, so the thread writes where the request would look for it
+    path = get_pdf_path(content_hash)
+    try:
+        if not cache.add(_build_marker(content_hash), os.getpid(), BUILD_MARKER_TIMEOUT):
+            return None
+    except Exception as e:
+        logger.error(f"Failed to claim resume PDF build: {e}")
+        return None
+    thread = threading.Thread(target=_build_in_background, args=(content_hash, path), name='resume-pdf', daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,222 @@
+"""
+Data retention for SecurityEvent, PostView and PostLike
+
+Expired rows are archived to gzip-compressed JSONL files and then deleted
+in primary-key order, one short transaction per chunk, so pruning never
+holds long locks. Policies come from settings.RETENTION_POLICIES:
+
+    RETENTION_POLICIES = {
+        'security_event': {'default': 90, 'login_success': 30},  # days per event type
+        'post_view': 365,
+        'post_like': None,  # None keeps rows forever
+    }
+
+SecurityEvents are only pruned once the rollup scanner has counted them,
+so dashboard and report totals are unaffected. Pruned PostViews are folded
+into BlogPost.archived_views so view counts stay the same.
+
+On PostgreSQL with a partitioned SecurityEvent table (see
+main.partitions), whole monthly partitions past every TTL are archived and
+dropped instead of deleted row by row.
+
+Run `python manage.py prune_data` from cron.
+"""
+import gzip
+import json
+import logging
+import os
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger('portfolio_site')
+
+CHUNK_SIZE = 1000
+
+DEFAULT_POLICIES = {
+    'security_event': {'default': 90},
+    'post_view': 365,
+    'post_like': None,
+}
+
+
+def get_policies():
+    policies = dict(DEFAULT_POLICIES)
+    policies.update(getattr(settings, 'RETENTION_POLICIES', {}))
+    return policies
+
+
+def get_archive_dir():
+    return getattr(settings, 'RETENTION_ARCHIVE_DIR', os.path.join(settings.BASE_DIR, 'archive'))
+
+
+class Archiver:
+    """Append rows to ``<label>-<timestamp>.jsonl.gz``, created on first write"""
+
+    def __init__(self, label, directory=None, now=None):
+        self.directory = directory or get_archive_dir()
+        self.path = os.path.join(self.directory, f'{label}-{(now or timezone.now()):%Y%m%dT%H%M%S}.jsonl.gz')
+        self.rows = 0
+        self._file = None
+
+    def write(self, rows):
+        if self._file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            self._file = gzip.open(self.path, 'at', encoding='utf-8')
+        for row in rows:
+            self._file.write(json.dumps(row, cls=DjangoJSONEncoder))
+            self._file.write('\n')
+        # Flush before the delete commits; a crash can then only duplicate rows, never lose them
+        self._file.flush()
+        self.rows += len(rows)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return self.path if self.rows else None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def delete_in_chunks(queryset, chunk_size=CHUNK_SIZE, archiver=None, before_delete=None):
+    """
+    Delete the rows of ``queryset`` oldest first, ``chunk_size`` per transaction.
+
+    Each chunk is written to ``archiver`` and passed to ``before_delete(rows)``
+    (as dicts) before it is deleted. Returns the number of rows deleted.
+    """
+    model = queryset.model
+    pk_name = model._meta.pk.attname
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(queryset.order_by('pk').values()[:chunk_size])
+            if not rows:
+                break
+            if archiver is not None:
+                archiver.write(rows)
+            if before_delete is not None:
+                before_delete(rows)
+            model._base_manager.filter(pk__in=[row[pk_name] for row in rows]).delete()
+        deleted += len(rows)
+        if len(rows) < chunk_size:
+            break
+    return deleted
+
+
+def _cutoff(now, days):
+    return now - timedelta(days=days)
+
+
+def counted_security_event_id():
+    """Highest SecurityEvent id already folded into the rollups"""
+    from .models import ScanWatermark
+    from .rollups import SECURITY_EVENTS_SCAN
+
+    return ScanWatermark.objects.filter(name=SECURITY_EVENTS_SCAN).values_list('last_id', flat=True).first() or 0
+
+
+def security_event_querysets(now, policy, max_id):
+    """(label, queryset) pairs of expired SecurityEvents, one per TTL in the policy"""
+    from .models import SecurityEvent
+
+    # Never prune rows the rollup scanner has not counted yet
+    base = SecurityEvent.objects.filter(pk__lte=max_id)
+    overrides = {event_type: days for event_type, days in policy.items() if event_type != 'default'}
+
+    querysets = []
+    for event_type, days in overrides.items():
+        if days is not None:
+            querysets.append((event_type, base.filter(event_type=event_type, created_at__lt=_cutoff(now, days))))
+    default = policy.get('default')
+    if default is not None:
+        querysets.append(('default', base.exclude(event_type__in=list(overrides)).filter(created_at__lt=_cutoff(now, default))))
+    return querysets
+
+
+def prune_security_events(now, chunk_size=CHUNK_SIZE, archive=True, dry_run=False):
+    from .partitions import drop_expired_partitions
+    from .rollups import update_security_rollups
+
+    policy = get_policies()['security_event']
+    if isinstance(policy, int):
+        policy = {'default': policy}
+    if not dry_run:
+        update_security_rollups()
+
+    max_id = counted_security_event_id()
+    deleted = 0
+    with Archiver('security_events', now=now) as archiver:
+        archiver = archiver if archive else None
+        ttls = list(policy.values())
+        if not dry_run and ttls and None not in ttls:
+            deleted += drop_expired_partitions(_cutoff(now, max(ttls)), max_id, archiver, chunk_size)
+        for label, queryset in security_event_querysets(now, policy, max_id):
+            if dry_run:
+                deleted += queryset.count()
+            else:
+                deleted += delete_in_chunks(queryset, chunk_size, archiver)
+    return deleted
+
+
+def _fold_views(rows):
+    from blog.models import BlogPost
+
+    for post_id, views in Counter(row['post_id'] for row in rows).items():
+        BlogPost.objects.filter(pk=post_id).update(archived_views=F('archived_views') + views)
+
+
+def prune_post_views(now, chunk_size=CHUNK_SIZE, archive=True, dry_run=False):
+    from blog.models import PostView
+
+    days = get_policies()['post_view']
+    if days is None:
+        return 0
+    queryset = PostView.objects.filter(viewed_at__lt=_cutoff(now, days))
+    if dry_run:
+        return queryset.count()
+    with Archiver('post_views', now=now) as archiver:
+        return delete_in_chunks(queryset, chunk_size, archiver if archive else None, _fold_views)
+
+
+def prune_post_likes(now, chunk_size=CHUNK_SIZE, archive=True, dry_run=False):
+    """Likes are per-IP vote state: once pruned they stop counting and the IP may vote again"""
+    from blog.models import PostLike
+
+    days = get_policies()['post_like']
+    if days is None:
+        return 0
+    queryset = PostLike.objects.filter(created_at__lt=_cutoff(now, days))
+    if dry_run:
+        return queryset.count()
+    with Archiver('post_likes', now=now) as archiver:
+        return delete_in_chunks(queryset, chunk_size, archiver if archive else None)
+
+
+def run_retention(now=None, chunk_size=None, archive=None, dry_run=False):
+    """Apply every retention policy; returns rows pruned (or, for a dry run, due) per table"""
+    now = now or timezone.now()
+    chunk_size = chunk_size or getattr(settings, 'RETENTION_CHUNK_SIZE', CHUNK_SIZE)
+    if archive is None:
+        archive = getattr(settings, 'RETENTION_ARCHIVE', True)
+
+    results = {}
+    for name, prune in (
+        ('security_events', prune_security_events),
+        ('post_views', prune_post_views),
+        ('post_likes', prune_post_likes),
+    ):
+        results[name] = prune(now, chunk_size=chunk_size, archive=archive, dry_run=dry_run)
+        if results[name] and not dry_run:
+            logger.info(f'Retention pruned {results[name]} {name} row(s)')
+    return results
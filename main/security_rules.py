@@ -0,0 +1,113 @@
+"""
+Precompiled security rules
+
+Rules are compiled once at import and combined into a single alternation so
+each piece of text is scanned in one pass instead of once per pattern.
+"""
+import re
+
+
+class RuleSet:
+    """A list of (name, pattern, weight) rules matched in a single pass"""
+
+    def __init__(self, rules, flags=re.IGNORECASE):
+        self.weights = {name: weight for name, _, weight in rules}
+        self.patterns = {name: pattern for name, pattern, _ in rules}
+        self.regex = re.compile(
+            '|'.join(f'(?P<{name}>{pattern})' for name, pattern, _ in rules),
+            flags,
+        )
+
+    def matches(self, text):
+        """Return a dict of rule name -> hit count"""
+        hits = {}
+        for match in self.regex.finditer(text):
+            hits[match.lastgroup] = hits.get(match.lastgroup, 0) + 1
+        return hits
+
+    def first_match(self, text):
+        """Return the name of the first rule that matches, or None"""
+        match = self.regex.search(text)
+        return match.lastgroup if match else None
+
+
+# Contact form content rules: (name, pattern, weight)
+CONTACT_SPAM_RULES = RuleSet([
+    ('xss', r'<script', 60),  # XSS attempts
+    ('sql_injection', r'union\s+select', 60),  # SQL injection
+    ('viagra', r'viagra', 40),  # Spam
+    ('casino', r'casino', 40),  # Spam
+    ('lottery', r'lottery', 40),  # Spam
+    ('winner', r'winner', 20),  # Spam
+    ('external_link', r'http[s]?://(?!localhost)', 10),  # External links
+])
+
+# Each additional link beyond the first adds this much, up to the cap
+EXTRA_LINK_WEIGHT = 10
+EXTRA_LINK_CAP = 40
+
+
+def score_contact_text(text):
+    """Score contact form text, returning (score, list of matched rule names)"""
+    hits = CONTACT_SPAM_RULES.matches(text)
+    score = sum(CONTACT_SPAM_RULES.weights[name] for name in hits)
+    links = hits.get('external_link', 0)
+    if links > 1:
+        score += min((links - 1) * EXTRA_LINK_WEIGHT, EXTRA_LINK_CAP)
+    return score, sorted(hits)
+
+
+# Request rules shared by the security middleware and the log ingester
+SUSPICIOUS_REQUEST_RULES = RuleSet([
+    ('directory_traversal', r'\.\./', 1),  # Directory traversal
+    ('xss', r'<script', 1),  # XSS attempts
+    ('sql_injection', r'union\s+select', 1),  # SQL injection
+    ('code_execution', r'exec\(', 1),  # Code execution
+    ('code_evaluation', r'eval\(', 1),  # Code evaluation
+    ('encoded_payload', r'base64_decode', 1),  # Encoded payloads
+])
+
+SQL_INJECTION_RULES = RuleSet([
+    ('union_select', r'union\s+select', 1),
+    ('drop_table', r'drop\s+table', 1),
+    ('insert_into', r'insert\s+into', 1),
+    ('delete_from', r'delete\s+from', 1),
+    ('update_set', r'update\s+.*set', 1),
+    ('or_1_equals_1', r'\bor\s+1=1\b', 1),
+])
+
+MALICIOUS_AGENT_RULES = RuleSet([
+    (agent, re.escape(agent), 1) for agent in (
+        'sqlmap', 'nikto', 'nessus', 'burp', 'dirbuster',
+        'gobuster', 'dirb', 'w3af', 'metasploit', 'masscan',
+        'nmap', 'zap', 'acunetix', 'qualys',
+    )
+])
+
+SUSPICIOUS_EXTENSIONS = ('.php', '.asp', '.jsp', '.cgi', '.pl')
+
+
+def classify_request(path, user_agent='', status=None, admin_url='admin/'):
+    """
+    Classify a request as a security event.
+
+    ``path`` is the full path including the query string. Returns
+    (event_type, severity, description) or None for an ordinary request.
+    Checks run in the same order as the security middleware.
+    """
+    agent = MALICIOUS_AGENT_RULES.first_match(user_agent)
+    if agent:
+        return 'security_scan', 'high', f'Malicious user agent detected: {agent}'
+    rule = SUSPICIOUS_REQUEST_RULES.first_match(path)
+    if rule:
+        return 'suspicious_request', 'medium', f'Suspicious pattern detected: {SUSPICIOUS_REQUEST_RULES.patterns[rule]}'
+    rule = SQL_INJECTION_RULES.first_match(path)
+    if rule:
+        return 'suspicious_request', 'high', f'SQL injection attempt detected: {SQL_INJECTION_RULES.patterns[rule]}'
+    if path.split('?', 1)[0].lower().endswith(SUSPICIOUS_EXTENSIONS):
+        return 'security_scan', 'medium', 'Request for suspicious file'
+    if status == 429:
+        return 'rate_limit', 'medium', 'Rate limit exceeded'
+    if path.startswith('/' + admin_url):
+        return 'admin_access', 'low', f"Admin panel access: {path.split('?', 1)[0]}"
+    return None
@@ -0,0 +1,131 @@
+"""
+File delivery helpers
+
+Serves files from disk either by streaming them through the worker or, when
+SENDFILE_BACKEND is 'x-accel', by handing the transfer to the nginx frontend
+with an X-Accel-Redirect header so the worker is released immediately.
+"""
+import os
+import re
+import mimetypes
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import content_disposition_header, http_date
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+CHUNK_SIZE = 64 * 1024
+
+
+def file_etag(stat_result):
+    """Build a strong ETag from file modification time and size"""
+    return '"%x-%x"' % (stat_result.st_mtime_ns, stat_result.st_size)
+
+
+def parse_range(header, size):
+    """
+    Parse a single-range Range header.
+
+    Returns a (start, end) tuple with inclusive offsets, None when the header
+    should be ignored, or False when the range cannot be satisfied.
+    """
+    match = RANGE_RE.match(header.strip())
+    if not match:
+        return None
+    start, end = match.groups()
+    if not start and not end:
+        return None
+    if not start:
+        # Suffix range: the last N bytes
+        length = int(end)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(start)
+    end = int(end) if end else size - 1
+    if start >= size or end < start:
+        return False
+    return start, min(end, size - 1)
+
+
+def _iter_range(path, start, length):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _accel_location(path):
+    """Map an absolute path under SENDFILE_ROOT to its internal nginx location"""
+    root = getattr(settings, 'SENDFILE_ROOT', '')
+    if not root:
+        return None
+    root = os.path.realpath(root)
+    real_path = os.path.realpath(path)
+    if os.path.commonpath([root, real_path]) != root:
+        return None
+    relative = os.path.relpath(real_path, root).replace(os.sep, '/')
+    return getattr(settings, 'SENDFILE_URL', '/protected-media/') + quote(relative)
+
+
+def serve_file(request, path, filename=None, as_attachment=True, content_type=None):
+    """Serve a file with ETag/Range support, offloading to nginx when enabled"""
+    stat_result = os.stat(path)
+    etag = file_etag(stat_result)
+    last_modified = stat_result.st_mtime
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if not_modified is not None:
+        return not_modified
+
+    filename = filename or os.path.basename(path)
+    if content_type is None:
+        content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+
+    accel_location = None
+    if getattr(settings, 'SENDFILE_BACKEND', '') == 'x-accel':
+        accel_location = _accel_location(path)
+
+    if accel_location:
+        # nginx takes over the body, including Range requests
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = accel_location
+    else:
+        size = stat_result.st_size
+        byte_range = None
+        range_header = request.META.get('HTTP_RANGE')
+        if range_header:
+            if_range = request.META.get('HTTP_IF_RANGE')
+            if not if_range or if_range == etag:
+                byte_range = parse_range(range_header, size)
+
+        if byte_range is False:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+        if byte_range:
+            start, end = byte_range
+            length = end - start + 1
+            response = StreamingHttpResponse(
+                _iter_range(path, start, length),
+                status=206,
+                content_type=content_type,
+            )
+            response['Content-Range'] = f'bytes {start}-{end}/{size}'
+            response['Content-Length'] = str(length)
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+        response['Accept-Ranges'] = 'bytes'
+
+    response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    return response
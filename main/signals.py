@@ -35,7 +35,7 @@ def log_failed_login(sender, credentials, request, **kwargs):
             username=username,
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             path=request.path,
-            method=request.method
+            method=request.method or ''
         )
         logger.warning(f'Failed login attempt - IP: {client_ip}, Username: {username}')
     except Exception as e:
@@ -68,8 +68,61 @@ def log_successful_login(sender, request, user, **kwargs):
             username=user.username,
             user_agent=request.META.get('HTTP_USER_AGENT', ''),
             path=request.path,
-            method=request.method
+            method=request.method or ''
         )
         logger.info(f'Successful login - IP: {client_ip}, User: {user.username}')
     except Exception as e:
-        logger.error(f'Failed to log successful login event: {e}')
\ No newline at end of file
+        logger.error(f'Failed to log successful login event: {e}')
+
+def clear_resume_content_hash(sender, **kwargs):
+    """Drop the cached resume content hash once the change commits, so the PDF is re-rendered"""
+    from django.core.cache import cache
+    from django.db import transaction
+    from .resume import CONTENT_HASH_CACHE_KEY
+
+    # Dropped inside the transaction, the hash could be recomputed from the old rows
+    def clear():
+        try:
+            cache.delete(CONTENT_HASH_CACHE_KEY)
+        except Exception as e:
+            logger.error(f'Failed to clear resume content hash: {e}')
+
+    transaction.on_commit(clear)
+
+
+def connect_resume_signals():
+    from django.db.models.signals import post_save, post_delete
+    from .models import Education, Certification, Achievement, Skill, Experience
+
+    for model in (Education, Certification, Achievement, Skill, Experience):
+        post_save.connect(clear_resume_content_hash, sender=model, dispatch_uid=f'resume_hash_save_{model.__name__}')
+        post_delete.connect(clear_resume_content_hash, sender=model, dispatch_uid=f'resume_hash_delete_{model.__name__}')
+
+
+def refresh_syndication_state(sender, **kwargs):
+    """Give the sitemaps and feeds a new version once a post or project change commits"""
+    from django.db import transaction
+    from portfolio_site.syndication import content_changed
+
+    # Computed inside the admin's transaction, the state could be cached again from the old rows
+    def refresh():
+        try:
+            content_changed()
+        except Exception as e:
+            logger.error(f'Failed to refresh the sitemap and feed state: {e}')
+
+    transaction.on_commit(refresh)
+
+
+def connect_syndication_signals():
+    from django.db.models.signals import post_save, post_delete
+    from blog.models import BlogPost
+    from portfolio.models import Project
+
+    for model in (BlogPost, Project):
+        post_save.connect(refresh_syndication_state, sender=model, dispatch_uid=f'syndication_save_{model.__name__}')
+        post_delete.connect(refresh_syndication_state, sender=model, dispatch_uid=f'syndication_delete_{model.__name__}')
+
+
+connect_resume_signals()
+connect_syndication_signals()
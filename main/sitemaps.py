@@ -0,0 +1,23 @@
+from blog.sitemaps import BlogPostSitemap
+from django.contrib.sitemaps import Sitemap
+from django.urls import reverse
+from portfolio.sitemaps import ProjectSitemap
+
+
+class StaticViewSitemap(Sitemap):
+    changefreq = 'weekly'
+    priority = 0.5
+
+    def items(self):
+        return ['main:home', 'main:about', 'main:resume', 'main:contact', 'blog:blog_list', 'portfolio:portfolio_list']
+
+    def location(self, name):
+        return reverse(name)
+
+
+# Section name -> Sitemap; /sitemap.xml indexes /sitemap-<section>.xml
+SITEMAPS = {
+    'pages': StaticViewSitemap,
+    'blog': BlogPostSitemap,
+    'projects': ProjectSitemap,
+}
@@ -0,0 +1,169 @@
+"""
+Contact form spam filtering at ingest
+
+Every submission is scored before anything is written:
+
+* precompiled content rules from main.security_rules,
+* a content-hash dedup set held in the shared cache, so resubmitting the
+  same message from any worker is dropped,
+* a Bloom filter of senders (IPs and emails) that recently sent spam, which
+  adds a penalty without a database lookup.
+
+Submissions at or above SPAM_REJECT_SCORE are dropped; those at or above
+SPAM_FLAG_SCORE are stored with is_spam set and never emailed.
+"""
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .security_rules import score_contact_text
+
+logger = logging.getLogger('django.security')
+
+DEDUP_KEY_PREFIX = 'contact_dedup_'
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over SHA-256"""
+
+    def __init__(self, capacity=10000, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item):
+        digest = hashlib.sha256(item.encode('utf-8')).digest()
+        h1 = int.from_bytes(digest[:8], 'big')
+        h2 = int.from_bytes(digest[8:16], 'big') | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class SpamSenderFilter:
+    """
+    Two-generation Bloom filter of recent spam senders.
+
+    New senders go into the current generation; after ``window`` seconds the
+    previous generation is discarded, so senders age out without deletes.
+    It is seeded from recently flagged submissions on first use.
+    """
+
+    def __init__(self, capacity=10000, window=24 * 60 * 60):
+        self.capacity = capacity
+        self.window = window
+        self._lock = threading.Lock()
+        self._current = BloomFilter(capacity)
+        self._previous = BloomFilter(capacity)
+        self._rotated_at = time.monotonic()
+        self._seeded = False
+
+    def _maybe_rotate(self):
+        if time.monotonic() - self._rotated_at >= self.window:
+            self._previous = self._current
+            self._current = BloomFilter(self.capacity)
+            self._rotated_at = time.monotonic()
+
+    def _seed(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import ContactSubmission
+
+        self._seeded = True
+        try:
+            since = timezone.now() - timedelta(seconds=self.window)
+            flagged = ContactSubmission.objects.filter(
+                is_spam=True, created_at__gte=since
+            ).values_list('email', 'ip_address')[:self.capacity]
+            for email, ip_address in flagged:
+                self._add_unlocked(email, ip_address)
+        except Exception as e:
+            logger.error(f'Failed to seed spam sender filter: {e}')
+
+    def _add_unlocked(self, email, ip_address):
+        if email:
+            self._current.add(f'email:{email.lower()}')
+        if ip_address:
+            self._current.add(f'ip:{ip_address}')
+
+    def add(self, email, ip_address):
+        with self._lock:
+            self._maybe_rotate()
+            self._add_unlocked(email, ip_address)
+
+    def seen(self, email, ip_address):
+        with self._lock:
+            if not self._seeded:
+                self._seed()
+            self._maybe_rotate()
+            keys = []
+            if email:
+                keys.append(f'email:{email.lower()}')
+            if ip_address:
+                keys.append(f'ip:{ip_address}')
+            return any(key in self._current or key in self._previous for key in keys)
+
+
+spam_senders = SpamSenderFilter()
+
+
+class SpamVerdict:
+    def __init__(self, score, rules, content_hash, duplicate=False):
+        self.score = score
+        self.rules = rules
+        self.content_hash = content_hash
+        self.duplicate = duplicate
+
+    @property
+    def rejected(self):
+        return self.duplicate or self.score >= getattr(settings, 'SPAM_REJECT_SCORE', 80)
+
+    @property
+    def is_spam(self):
+        return self.score >= getattr(settings, 'SPAM_FLAG_SCORE', 30)
+
+
+def content_hash(name, email, subject, message):
+    normalized = '\x1f'.join(' '.join(part.lower().split()) for part in (name, email, subject, message))
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+
+
+def check_contact_submission(name, email, subject, message, ip_address=None):
+    """
+    Score a contact submission and record it in the sender filter. It only
+    enters the dedup set once stored: call mark_submitted() on commit.
+    """
+    score, rules = score_contact_text(f'{name} {email} {subject} {message}')
+    if spam_senders.seen(email, ip_address):
+        score += getattr(settings, 'SPAM_REPEAT_SENDER_SCORE', 30)
+        rules.append('repeat_sender')
+
+    digest = content_hash(name, email, subject, message)
+    duplicate = False
+    try:
+        duplicate = cache.get(DEDUP_KEY_PREFIX + digest) is not None
+    except Exception as e:
+        logger.warning(f'Cache not available for contact dedup: {e}')
+
+    verdict = SpamVerdict(min(score, 32767), rules, digest, duplicate)
+    if verdict.is_spam:
+        spam_senders.add(email, ip_address)
+    return verdict
+
+
+def mark_submitted(digest):
+    """Add a stored submission to the dedup set, so copies of it are dropped"""
+    try:
+        cache.set(DEDUP_KEY_PREFIX + digest, 1, getattr(settings, 'SPAM_DEDUP_WINDOW', 24 * 60 * 60))
+    except Exception as e:
+        logger.warning(f'Cache not available for contact dedup: {e}')
@@ -0,0 +1,268 @@
+"""
+Static snapshot of the public pages
+
+Renders every public page without a query string (see
+main.cache_warmer.public_urls) to files that nginx or a CDN can serve to
+anonymous visitors. Django then only handles POSTs, query-string URLs (list
+pagination and filters, search), the contact form and the admin; see
+DEPLOYMENT_GUIDE.md for the nginx rules. The static files are collected
+into the export under content-hashed names (ManifestStaticFilesStorage) and
+the pages reference those names, so assets can be cached forever.
+
+Exports are incremental. While a page renders, the tables its queries read
+are recorded, and the manifest stores a fingerprint of each one next to the
+page. The next export re-renders a page only if one of those tables, the
+templates or the static files changed since; pages that are no longer
+public (deleted or unpublished posts) are removed.
+"""
+import contextvars
+import hashlib
+import json
+import os
+import re
+from collections import namedtuple
+from urllib.parse import urlsplit
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.db.models import Count, Max
+from django.urls import reverse
+from django.utils import timezone
+
+from portfolio_site.profiling import install_query_hook
+
+from .cache_warmer import internal_client, public_urls
+
+MANIFEST_NAME = 'export-manifest.json'
+MANIFEST_VERSION = 1
+
+# The contact form needs a CSRF token matching the visitor's own cookie
+EXCLUDED_URL_NAMES = ('main:contact',)
+
+# Counters shown on post pages. A new view or like does not rebuild a page on its own,
+# so exported pages show the counts as of their last rebuild.
+VOLATILE_MODELS = ('blog.PostView', 'blog.PostLike')
+
+# Tables without an updated_at column are fingerprinted by their content up to this size
+CONTENT_HASH_MAX_ROWS = 5000
+
+ExportSummary = namedtuple('ExportSummary', 'rendered unchanged removed failed')
+
+_READ_TABLE = re.compile(r'\b(?:FROM|JOIN)\s+["`]?(\w+)', re.IGNORECASE)
+_WRITE_TABLE = re.compile(r'^\s*(?:INSERT\s+INTO|UPDATE|DELETE\s+FROM)\s+["`]?(\w+)', re.IGNORECASE)
+_CSRF_INPUT = re.compile(rb'<input type="hidden" name="csrfmiddlewaretoken" value="[^"]*">')
+
+# (tables read, tables written) by the page being rendered
+_tables = contextvars.ContextVar('static_export_tables', default=None)
+
+
+class ExportStaticFilesStorage(ManifestStaticFilesStorage):
+    """Hashed names for exported assets; a reference to a file that does not exist keeps its plain name"""
+
+    manifest_strict = False
+
+    def hashed_name(self, name, content=None, filename=None):
+        try:
+            return super().hashed_name(name, content, filename)
+        except ValueError:
+            # Nothing to hash; the URL 404s exactly as it does when Django serves the page
+            return name
+
+
+def _record_tables(execute, sql, params, many, context):
+    tables = _tables.get()
+    if tables is not None:
+        written = _WRITE_TABLE.match(sql)
+        if written:
+            tables[1].add(written.group(1))
+        else:
+            tables[0].update(_READ_TABLE.findall(sql))
+    return execute(sql, params, many, context)
+
+
+def export_paths():
+    """The public URLs that can be served as files"""
+    excluded = {reverse(name) for name in EXCLUDED_URL_NAMES}
+    return [path for path in public_urls(list_pages=1) if '?' not in path and path not in excluded]
+
+
+def page_file(path):
+    """Where the page for URL ``path`` is written, relative to the export directory"""
+    relative = path.lstrip('/')
+    if not relative or relative.endswith('/'):
+        relative += 'index.html'
+    return relative
+
+
+def table_fingerprint(model):
+    """A value that changes whenever a row of ``model`` is added, removed or edited"""
+    rows = model._base_manager.order_by()
+    if any(field.name == 'updated_at' for field in model._meta.concrete_fields):
+        summary = rows.aggregate(count=Count('pk'), latest=Max('updated_at'))
+        latest = summary['latest'].isoformat() if summary['latest'] else ''
+        return f"{summary['count']}:{latest}"
+    count = rows.count()
+    if count > CONTENT_HASH_MAX_ROWS:
+        # Only additions and deletions are noticed; edits need --force
+        return f"{count}:{rows.aggregate(latest=Max('pk'))['latest']}"
+    digest = hashlib.sha256()
+    for row in rows.order_by('pk').values_list():
+        digest.update(repr(row).encode())
+    return f'{count}:{digest.hexdigest()[:16]}'
+
+
+def build_fingerprint(static_manifest_path):
+    """A digest of the collected static files and every template"""
+    from django.template import engines
+
+    digest = hashlib.sha256()
+    with open(static_manifest_path, 'rb') as f:
+        digest.update(f.read())
+    for engine in engines.all():
+        for directory in engine.template_dirs:
+            for root, dirs, files in os.walk(directory):
+                dirs.sort()
+                for filename in sorted(files):
+                    path = os.path.join(root, filename)
+                    digest.update(os.path.relpath(path, directory).encode())
+                    with open(path, 'rb') as f:
+                        digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def _export_settings(static_dir, host):
+    from django.test import override_settings
+
+    storages = dict(settings.STORAGES, staticfiles={'BACKEND': 'main.static_export.ExportStaticFilesStorage'})
+    return override_settings(
+        STATIC_ROOT=static_dir,
+        STORAGES=storages,
+        # Pages are rendered as production serves them; with DEBUG on, static URLs are not hashed
+        DEBUG=False,
+        ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, host] if host else settings.ALLOWED_HOSTS,
+    )
+
+
+def _load_manifest(output_dir):
+    try:
+        with open(os.path.join(output_dir, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {'pages': {}}
+    if manifest.get('version') != MANIFEST_VERSION:
+        return {'pages': {}}
+    return manifest
+
+
+def _write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f'{path}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+
+def _remove(output_dir, relative):
+    path = os.path.join(output_dir, relative)
+    try:
+        os.remove(path)
+        os.removedirs(os.path.dirname(path))  # stops at the first directory that is not empty
+    except OSError:
+        pass
+
+
+def export_site(output_dir, base_url='', force=False):
+    """
+    Export the public pages to ``output_dir``, re-rendering only those whose
+    data changed since the previous export (all of them with ``force``).
+    ``base_url`` (e.g. https://example.com) is the site's public address, for
+    the absolute URLs in the pages.
+    """
+    from django.core.management import call_command
+
+    output_dir = os.path.abspath(output_dir)
+    base = urlsplit(base_url)
+    host = base.netloc or None
+    secure = base.scheme != 'http'
+    static_dir = os.path.join(output_dir, urlsplit(settings.STATIC_URL).path.strip('/'))
+    previous = _load_manifest(output_dir)
+
+    labels = {model._meta.db_table: model._meta.label for model in apps.get_models(include_auto_created=True)}
+    fingerprints = {}
+
+    def fingerprint(label):
+        if label not in fingerprints:
+            fingerprints[label] = table_fingerprint(apps.get_model(label))
+        return fingerprints[label]
+
+    def unchanged(entry):
+        try:
+            return all(fingerprint(label) == value for label, value in entry['depends'].items())
+        except LookupError:  # a model that no longer exists
+            return False
+
+    install_query_hook(_record_tables)
+    rendered, kept, failed, pages = 0, 0, [], {}
+    with _export_settings(static_dir, host):
+        call_command('collectstatic', interactive=False, verbosity=0)
+        build = build_fingerprint(os.path.join(static_dir, ExportStaticFilesStorage.manifest_name))
+        reuse = not force and previous.get('build') == build
+        client = internal_client(host)
+
+        for path in export_paths():
+            entry = previous['pages'].get(path)
+            if (reuse and entry and not entry.get('stale') and unchanged(entry)
+                    and os.path.exists(os.path.join(output_dir, entry['file']))):
+                pages[path] = entry
+                kept += 1
+                continue
+
+            read, written = set(), set()
+            token = _tables.set((read, written))
+            try:
+                response = client.get(path, secure=secure)
+            finally:
+                _tables.reset(token)
+            if response.status_code != 200:
+                failed.append((path, response.status_code))
+                if entry:
+                    # Keep serving the last good copy; it is retried next time
+                    pages[path] = dict(entry, stale=True)
+                continue
+
+            content = response.content
+            if response.get('Content-Type', '').startswith('text/html'):
+                # A token without its cookie is useless, and must not be shared by every visitor
+                content = _CSRF_INPUT.sub(b'', content)
+            relative = page_file(path)
+            sha256 = hashlib.sha256(content).hexdigest()
+            if not (entry and entry['sha256'] == sha256 and os.path.exists(os.path.join(output_dir, relative))):
+                _write(os.path.join(output_dir, relative), content)
+            depended = sorted({labels[table] for table in read - written if table in labels} - set(VOLATILE_MODELS))
+            pages[path] = {
+                'file': relative,
+                'sha256': sha256,
+                'bytes': len(content),
+                'rendered_at': timezone.now().isoformat(),
+                'depends': {label: fingerprint(label) for label in depended},
+            }
+            rendered += 1
+
+    removed = 0
+    files_in_use = {entry['file'] for entry in pages.values()}
+    for path, entry in previous['pages'].items():
+        if path not in pages:
+            if entry['file'] not in files_in_use:
+                _remove(output_dir, entry['file'])
+            removed += 1
+
+    _write(os.path.join(output_dir, MANIFEST_NAME), json.dumps({
+        'version': MANIFEST_VERSION,
+        'generated_at': timezone.now().isoformat(),
+        'base_url': base_url,
+        'build': build,
+        'static_manifest': os.path.relpath(os.path.join(static_dir, ExportStaticFilesStorage.manifest_name), output_dir),
+        'pages': pages,
+    }, indent=2, sort_keys=True).encode())
+    return ExportSummary(rendered, kept, removed, failed)
@@ -1,8 +1,24 @@
 from django.test import TestCase, Client
 from django.urls import reverse
 from django.contrib.auth.models import User
-from main.models import ContactSubmission
+from main.models import ContactSubmission, SecurityEvent
+import asyncio
 import json
+import os
+import shutil
+import tempfile
+import threading
+
+
+def use_temporary_pdf_dir(test):
+    """Point RESUME_PDF_DIR at a directory removed after ``test``, once its background builds finish"""
+    pdf_dir = tempfile.mkdtemp()
+    test.addCleanup(shutil.rmtree, pdf_dir, True)
+    override = test.settings(RESUME_PDF_DIR=pdf_dir)
+    override.enable()
+    test.addCleanup(override.disable)
+    test.addCleanup(lambda: [thread.join(30) for thread in threading.enumerate() if thread.name == 'resume-pdf'])
+    return pdf_dir
 
 class ContactFormTest(TestCase):
     def setUp(self):
@@ -62,4 +78,1127 @@ class ContactFormTest(TestCase):
         
         # Check that the contact submission was saved
         submissions = ContactSubmission.objects.filter(email='jane@example.com')
-        self.assertEqual(submissions.count(), 1)
\ No newline at end of file
+        self.assertEqual(submissions.count(), 1)
+
+class ResumeDownloadTest(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.core.cache import cache
+        from main.models import UserProfile
+        from django.core.files.base import ContentFile
+
+        cache.clear()
+        self.media_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_dir, True)
+        self.settings_override = self.settings(MEDIA_ROOT=self.media_dir, SENDFILE_ROOT=self.media_dir)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+        admin = User.objects.create_user('owner', password='x', is_staff=True)
+        self.profile = UserProfile.objects.create(user=admin)
+        self.profile.cv_document.save('cv.pdf', ContentFile(b'0123456789'))
+        self.url = reverse('main:download_resume')
+
+    def test_download_sets_etag_and_supports_conditional_get(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(b''.join(response.streaming_content), b'0123456789')
+        etag = response['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_download_supports_range(self):
+        response = self.client.get(self.url, HTTP_RANGE='bytes=2-5')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], 'bytes 2-5/10')
+        self.assertEqual(b''.join(response.streaming_content), b'2345')
+        response = self.client.get(self.url, HTTP_RANGE='bytes=50-')
+        self.assertEqual(response.status_code, 416)
+
+    def test_admin_change_clears_the_cached_cv_after_commit(self):
+        from django.core.cache import cache
+        from main.admin import clear_resume_cache
+        from main.resume import CONTENT_HASH_CACHE_KEY, CV_CACHE_KEY, get_cv_document, resume_content_hash
+
+        get_cv_document()
+        resume_content_hash()
+        with self.captureOnCommitCallbacks(execute=True):
+            clear_resume_cache()
+            # Still inside the transaction: a download now would re-cache the old document
+            self.assertIsNotNone(cache.get(CV_CACHE_KEY))
+        self.assertIsNone(cache.get(CV_CACHE_KEY))
+        self.assertIsNone(cache.get(CONTENT_HASH_CACHE_KEY))
+
+    def test_x_accel_offload_and_cached_lookup(self):
+        with self.settings(SENDFILE_BACKEND='x-accel', SENDFILE_URL='/protected-media/'):
+            self.client.get(self.url)
+            with self.assertNumQueries(0):
+                response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.profile.cv_document.name)
+        self.assertEqual(response.content, b'')
+
+
+class ResumePdfTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        self.pdf_dir = use_temporary_pdf_dir(self)
+        self.settings_override = self.settings(SENDFILE_ROOT=self.pdf_dir)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def test_pdf_is_cached_by_content_hash(self):
+        from main.models import Skill
+        from main.resume_pdf import build_resume_pdf
+
+        Skill.objects.create(name='Nmap', category='tools', proficiency=90)
+        first = build_resume_pdf()
+        with open(first, 'rb') as f:
+            self.assertEqual(f.read(4), b'%PDF')
+        self.assertEqual(build_resume_pdf(), first)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Skill.objects.create(name='Splunk', category='tools', proficiency=80)
+        second = build_resume_pdf()
+        self.assertNotEqual(second, first)
+        self.assertFalse(os.path.exists(first))
+
+    def test_one_background_build_per_content(self):
+        from unittest import mock
+        from main.resume_pdf import schedule_resume_pdf
+
+        release = threading.Event()
+        with mock.patch('main.resume_pdf.render_resume_pdf', side_effect=lambda path: release.wait(5)) as render:
+            first = schedule_resume_pdf()
+            self.assertIsNotNone(first)
+            # Further downloads while it renders do not start another build
+            self.assertIsNone(schedule_resume_pdf())
+            release.set()
+            first.join(5)
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(os.path.dirname(render.call_args.args[0]), self.pdf_dir)
+
+            # The marker is released when the build ends
+            second = schedule_resume_pdf()
+            self.assertIsNotNone(second)
+            second.join(5)
+
+    def test_download_serves_generated_pdf_without_uploaded_cv(self):
+        from main.resume_pdf import build_resume_pdf
+
+        build_resume_pdf()
+        response = self.client.get(reverse('main:download_resume'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+
+
+class FailingEmailBackend:
+    """Stand-in SMTP backend whose connection drops on every send"""
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def open(self):
+        return True
+
+    def close(self):
+        pass
+
+    def send_messages(self, messages):
+        raise ConnectionError('SMTP connection lost')
+
+
+class EmailOutboxTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def post_contact(self, message='Outbox test message.'):
+        return self.client.post(reverse('main:contact'), {
+            'name': 'John Doe',
+            'email': 'john@example.com',
+            'subject': 'Hello',
+            'message': message,
+        })
+
+    def test_contact_post_only_queues_email(self):
+        from django.core import mail
+        from main.models import OutboundEmail
+        from main.outbox import drain_outbox
+
+        with self.settings(CONTACT_EMAIL='owner@example.com'):
+            self.post_contact()
+            self.post_contact('A second outbox test message.')
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(OutboundEmail.objects.filter(status='pending').count(), 2)
+
+        self.assertEqual(drain_outbox(), (2, 0))
+        self.assertEqual(len(mail.outbox), 2)
+        self.assertEqual(mail.outbox[0].to, ['owner@example.com'])
+        self.assertEqual(OutboundEmail.objects.filter(status='sent').count(), 2)
+
+    def test_failed_send_backs_off_then_gives_up(self):
+        from django.utils import timezone
+        from main.models import OutboundEmail
+        from main.outbox import enqueue_email, process_outbox
+
+        message = enqueue_email('Subject', 'Body', 'a@example.com', ['b@example.com'])
+        with self.settings(EMAIL_BACKEND='main.tests.FailingEmailBackend', OUTBOX_MAX_ATTEMPTS=2):
+            self.assertEqual(process_outbox(), (0, 1))
+            message.refresh_from_db()
+            self.assertEqual(message.status, 'pending')
+            self.assertEqual(message.attempts, 1)
+            self.assertGreater(message.next_attempt_at, timezone.now())
+
+            # Not due yet, so nothing is retried
+            self.assertEqual(process_outbox(), (0, 0))
+
+            OutboundEmail.objects.filter(pk=message.pk).update(next_attempt_at=timezone.now())
+            process_outbox()
+            message.refresh_from_db()
+            self.assertEqual(message.status, 'failed')
+            self.assertIn('SMTP connection lost', message.last_error)
+
+    def test_started_worker_sends_without_a_new_enqueue(self):
+        import threading
+        from unittest import mock
+        from main import outbox
+
+        # What gunicorn's post_worker_init does, for rows left over by the previous process
+        drained = threading.Event()
+        with mock.patch.object(outbox, 'worker', outbox.OutboxWorker()), \
+                mock.patch.object(outbox, 'drain_outbox', side_effect=drained.set), \
+                self.settings(OUTBOX_WORKER='thread', OUTBOX_POLL_INTERVAL=3600):
+            outbox.wake_worker()
+            self.assertTrue(drained.wait(5))
+
+
+class ContactSpamFilterTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from main.spam import SpamSenderFilter
+        import main.spam
+
+        cache.clear()
+        original = main.spam.spam_senders
+        main.spam.spam_senders = SpamSenderFilter()
+        self.addCleanup(setattr, main.spam, 'spam_senders', original)
+
+    def post_contact(self, message, email='visitor@example.com', ip='10.0.0.1'):
+        return self.client.post(reverse('main:contact'), {
+            'name': 'Visitor',
+            'email': email,
+            'subject': 'Hello',
+            'message': message,
+        }, REMOTE_ADDR=ip)
+
+    def test_clean_submission_is_stored_with_score(self):
+        self.post_contact('I would like to discuss a penetration test.')
+        submission = ContactSubmission.objects.get()
+        self.assertEqual(submission.spam_score, 0)
+        self.assertFalse(submission.is_spam)
+        self.assertEqual(submission.ip_address, '10.0.0.1')
+        self.assertEqual(len(submission.content_hash), 64)
+
+    def test_duplicate_submission_is_dropped(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_contact('Same message twice.')
+        self.post_contact('  same   MESSAGE twice. ')
+        self.assertEqual(ContactSubmission.objects.count(), 1)
+
+    def test_retry_after_failed_save_is_not_a_duplicate(self):
+        from unittest.mock import patch
+        from django.db import DatabaseError
+
+        with patch.object(ContactSubmission.objects, 'create', side_effect=DatabaseError('disk full')):
+            self.post_contact('Please call me back.')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.post_contact('Please call me back.')
+        self.assertEqual(ContactSubmission.objects.count(), 1)
+
+    def test_spam_is_flagged_then_rejected(self):
+        from main.models import OutboundEmail
+
+        with self.settings(CONTACT_EMAIL='owner@example.com'):
+            self.post_contact('Claim your lottery prize at https://example.com')
+            submission = ContactSubmission.objects.get()
+            self.assertTrue(submission.is_spam)
+            self.assertFalse(OutboundEmail.objects.exists())
+
+            # Same sender again: the repeat-sender penalty pushes it over the reject threshold
+            self.post_contact('Visit our casino https://a.example https://b.example', email='other@example.com')
+        self.assertEqual(ContactSubmission.objects.count(), 1)
+
+
+class SecurityRollupTest(TestCase):
+    def setUp(self):
+        # Rows count as soon as they are written
+        self.lag_override = self.settings(ROLLUP_SCAN_LAG=0)
+        self.lag_override.enable()
+        self.addCleanup(self.lag_override.disable)
+
+    def log_events(self, count, event_type='rate_limit'):
+        from main.models import SecurityEvent
+        for i in range(count):
+            SecurityEvent.log_event(event_type, '10.0.0.%d' % (i % 250 + 1), 'test event')
+
+    def test_scan_only_processes_new_rows(self):
+        from django.utils import timezone
+        from main.models import ScanWatermark
+        from main.rollups import update_security_rollups, rollup_total, SECURITY_EVENTS_SCAN
+
+        self.log_events(5)
+        self.assertEqual(update_security_rollups(batch_size=2)[SECURITY_EVENTS_SCAN], 5)
+        self.assertEqual(update_security_rollups()[SECURITY_EVENTS_SCAN], 0)
+
+        self.log_events(3, 'login_failed')
+        self.assertEqual(update_security_rollups()[SECURITY_EVENTS_SCAN], 3)
+
+        now = timezone.now()
+        self.assertEqual(rollup_total('events', now), 8)
+        self.assertEqual(rollup_total('event:rate_limit', now), 5)
+        self.assertEqual(rollup_total('event:login_failed', now), 3)
+        self.assertEqual(ScanWatermark.objects.get(name=SECURITY_EVENTS_SCAN).last_id,
+                         SecurityEvent.objects.latest('pk').pk)
+
+    def test_rows_committed_out_of_id_order_are_not_skipped(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from main.rollups import update_security_rollups, SECURITY_EVENTS_SCAN
+
+        self.log_events(3)
+        first, second, third = SecurityEvent.objects.order_by('pk')
+        # The first insert's transaction is still committing when the next two are already visible
+        SecurityEvent.objects.filter(pk__in=[second.pk, third.pk]).update(created_at=timezone.now() - timedelta(minutes=5))
+        with self.settings(ROLLUP_SCAN_LAG=60):
+            self.assertEqual(update_security_rollups()[SECURITY_EVENTS_SCAN], 0)
+
+            SecurityEvent.objects.filter(pk=first.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+            self.assertEqual(update_security_rollups()[SECURITY_EVENTS_SCAN], 3)
+
+    def test_legacy_contact_rows_are_scored_once(self):
+        from django.utils import timezone
+        from main.rollups import update_security_rollups, rollup_total
+
+        ContactSubmission.objects.create(name='a', email='a@example.com', subject='s', message='casino winner lottery')
+        ContactSubmission.objects.create(name='b', email='b@example.com', subject='s', message='hello')
+        update_security_rollups()
+        self.assertEqual(ContactSubmission.objects.filter(is_spam=True).count(), 1)
+        self.assertEqual(rollup_total('contact_submissions', timezone.now()), 2)
+        self.assertEqual(rollup_total('contact_spam', timezone.now()), 1)
+
+
+class SecurityDashboardTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        self.staff = User.objects.create_user('staff', password='x', is_staff=True)
+        # Rows count as soon as they are written
+        self.lag_override = self.settings(ROLLUP_SCAN_LAG=0)
+        self.lag_override.enable()
+        self.addCleanup(self.lag_override.disable)
+
+    def test_dashboard_requires_staff(self):
+        response = self.client.get(reverse('main:security_dashboard'))
+        self.assertEqual(response.status_code, 302)
+
+    def test_dashboard_renders_metrics_from_rollups(self):
+        for i in range(30):
+            SecurityEvent.log_event('login_failed', f'10.0.{i // 10}.{i % 10}', 'failed', severity='medium')
+        SecurityEvent.log_event('rate_limit', '10.0.0.1', 'limited')
+
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('main:security_dashboard'))
+        self.assertEqual(response.status_code, 200)
+        metrics = response.context['metrics']
+        self.assertEqual(metrics['failed_logins'], 30)
+        self.assertEqual(metrics['rate_violations'], 1)
+        self.assertEqual(metrics['unique_ips'], 30)
+        self.assertEqual(metrics['threat_level'], 'HIGH')
+        self.assertEqual(response.context['total_events_7d'], 32)  # includes the staff login
+        self.assertEqual(len(response.context['recent_events']), 10)
+
+        response = self.client.get(reverse('main:download_security_report'))
+        self.assertContains(response, 'Failed logins: 30')
+
+    def test_stream_requires_staff(self):
+        response = self.client.get(reverse('main:security_stream'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_stream_is_off_under_wsgi(self):
+        # An endless response would pin a WSGI worker thread without ever being flushed
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(reverse('main:security_stream')).status_code, 204)
+        response = self.client.get(reverse('main:security_dashboard'))
+        self.assertNotContains(response, 'EventSource(')
+        with self.settings(ASGI_MODE=True):
+            response = self.client.get(reverse('main:security_dashboard'))
+        self.assertContains(response, 'EventSource(')
+
+    async def test_broker_delivers_logged_events(self):
+        from asgiref.sync import sync_to_async
+        from main.event_stream import broker
+
+        queue = broker.subscribe()
+        try:
+            await sync_to_async(SecurityEvent.log_event)('suspicious_request', '10.1.1.1', 'probe', severity='high')
+            message = await asyncio.wait_for(queue.get(), 1)
+        finally:
+            broker.unsubscribe(queue)
+        self.assertEqual(message['type'], 'event')
+        self.assertEqual(message['data']['event_type'], 'suspicious_request')
+        self.assertEqual(message['data']['ip_address'], '10.1.1.1')
+        self.assertFalse(broker.has_subscribers)
+
+    def test_metrics_delta_only_sends_changes(self):
+        from main.event_stream import EventBroker
+
+        broker = EventBroker()
+        self.assertEqual(broker.metrics_delta({'failed_logins': 1, 'rate_violations': 0}),
+                         {'failed_logins': 1, 'rate_violations': 0})
+        self.assertEqual(broker.metrics_delta({'failed_logins': 2, 'rate_violations': 0}), {'failed_logins': 2})
+
+    async def test_stream_sends_metrics_snapshot(self):
+        from django.test import AsyncRequestFactory
+        from main.views import asecurity_stream
+
+        async def auser():
+            return self.staff
+
+        request = AsyncRequestFactory().get(reverse('main:security_stream'))
+        request.auser = auser
+        response = await asecurity_stream(request)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        self.assertEqual(await anext(chunks), b'retry: 5000\n\n')
+        snapshot = (await anext(chunks)).decode()
+        await chunks.aclose()
+        self.assertTrue(snapshot.startswith('event: metrics\ndata: '))
+        self.assertIn('"threat_level": "LOW"', snapshot)
+
+    def test_hyperloglog_estimates_distinct_count(self):
+        from main.hyperloglog import HyperLogLog
+
+        first, second = HyperLogLog(), HyperLogLog()
+        for i in range(5000):
+            first.add(f'192.168.{i // 256}.{i % 256}')
+            second.add(f'192.168.{(i + 2500) // 256}.{(i + 2500) % 256}')
+        merged = HyperLogLog.from_bytes(first.to_bytes()).merge(second)
+        self.assertAlmostEqual(merged.count(), 7500, delta=7500 * 0.1)
+
+
+class RetentionTest(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, True)
+        # Rows count as soon as they are written
+        self.lag_override = self.settings(ROLLUP_SCAN_LAG=0)
+        self.lag_override.enable()
+        self.addCleanup(self.lag_override.disable)
+
+    def _age(self, queryset, days, field='created_at'):
+        from datetime import timedelta
+        from django.utils import timezone
+        queryset.update(**{field: timezone.now() - timedelta(days=days)})
+
+    def test_prunes_expired_events_in_chunks_and_archives_them(self):
+        import gzip
+        from django.test import override_settings
+        from main.retention import run_retention
+        from main.rollups import rollup_totals
+        from datetime import timedelta
+        from django.utils import timezone
+
+        for i in range(5):
+            SecurityEvent.log_event('login_failed', '10.0.0.1', f'old failure {i}')
+        SecurityEvent.log_event('login_success', '10.0.0.2', 'old login')
+        self._age(SecurityEvent.objects.all(), 40)
+        SecurityEvent.log_event('login_failed', '10.0.0.3', 'recent failure')
+
+        policies = {'security_event': {'default': 90, 'login_failed': 30}}
+        with override_settings(RETENTION_POLICIES=policies, RETENTION_ARCHIVE_DIR=self.archive_dir):
+            self.assertEqual(run_retention(dry_run=True)['security_events'], 0)  # not counted by the rollups yet
+            results = run_retention(chunk_size=2)
+
+        self.assertEqual(results['security_events'], 5)
+        self.assertEqual(
+            sorted(SecurityEvent.objects.values_list('description', flat=True)),
+            ['old login', 'recent failure'],
+        )
+        # Rollups were brought up to date before pruning, so totals are unchanged
+        totals = rollup_totals(['event:login_failed'], timezone.now() - timedelta(days=60), period='day')
+        self.assertEqual(totals['event:login_failed'], 6)
+
+        [archive] = os.listdir(self.archive_dir)
+        with gzip.open(os.path.join(self.archive_dir, archive), 'rt') as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual(len(rows), 5)
+        self.assertEqual(rows[0]['description'], 'old failure 0')
+
+
+class LogIngestTest(TestCase):
+    ACCESS_LINES = [
+        '203.0.113.5 - - [19/Oct/2026:10:00:00 +0000] "GET / HTTP/1.1" 200 512 "-" "Mozilla/5.0"\n',
+        '203.0.113.6 - - [19/Oct/2026:10:00:01 +0000] "GET /index.php HTTP/1.1" 403 12 "-" "Mozilla/5.0"\n',
+        '203.0.113.7 - - [19/Oct/2026:10:00:02 +0200] "GET /?q=1%20union%20select HTTP/1.1" 403 12 "-" "sqlmap/1.7"\n',
+        '203.0.113.8 - - [19/Oct/2026:10:00:03 +0000] "GET /../etc/passwd HTTP/1.1" 404 0 "-" "curl/8.0"\n',
+    ]
+
+    def setUp(self):
+        import tempfile
+        handle, self.path = tempfile.mkstemp(suffix='access.log')
+        os.close(handle)
+        self.addCleanup(os.remove, self.path)
+
+    def _append(self, lines):
+        with open(self.path, 'a') as f:
+            f.writelines(lines)
+
+    def test_ingests_and_resumes_from_offset(self):
+        from datetime import datetime, timezone as dt_timezone
+        from main.log_ingest import ingest_file
+
+        self._append(self.ACCESS_LINES[:2])
+        self.assertEqual(ingest_file(self.path, chunk_size=1), (2, 1))
+        self._append(self.ACCESS_LINES[2:] + ['198.51.100.1 - - [19/Oct/2026:10:00:04 +0000] "GET /adm'])
+        self.assertEqual(ingest_file(self.path), (2, 2))  # partial last line left for the next run
+        self.assertEqual(ingest_file(self.path), (0, 0))
+
+        events = {event.ip_address: event for event in SecurityEvent.objects.all()}
+        self.assertEqual(events['203.0.113.6'].event_type, 'security_scan')
+        self.assertEqual(events['203.0.113.7'].description, 'Malicious user agent detected: sqlmap')
+        self.assertEqual(events['203.0.113.7'].created_at, datetime(2026, 10, 19, 8, 0, 2, tzinfo=dt_timezone.utc))
+        self.assertEqual(events['203.0.113.8'].event_type, 'suspicious_request')
+
+    def test_rotated_file_is_read_from_start(self):
+        from main.log_ingest import ingest_file
+
+        self._append(self.ACCESS_LINES)
+        self.assertEqual(ingest_file(self.path), (4, 3))
+        with open(self.path, 'w') as f:
+            f.write(self.ACCESS_LINES[3].replace('203.0.113.8', '203.0.113.9'))
+        self.assertEqual(ingest_file(self.path), (1, 1))
+
+    def test_parses_security_log(self):
+        from main.log_ingest import parse_security_line
+        from main.security_rules import classify_request
+
+        record = parse_security_line(
+            'WARNING 2026-10-19 10:00:00,123 middleware 12 140 Rate limit exceeded for IP 2001:db8::1 on /contact/'
+        )
+        self.assertEqual((record['ip'], record['path'], record['status']), ('2001:db8::1', '/contact/', 429))
+        self.assertEqual(classify_request(record['path'], status=record['status'])[0], 'rate_limit')
+
+    def test_parses_json_security_log(self):
+        import logging
+        from datetime import datetime, timezone as dt_timezone
+        from main.log_ingest import parse_security_line
+        from portfolio_site.log_pipeline import JsonFormatter
+
+        record = logging.LogRecord('django.security', logging.WARNING, __file__, 1,
+                                   'Suspicious request from IP %s: %s', ('203.0.113.5', '/wp-login.php'), None)
+        record.created = datetime(2026, 10, 19, 10, 0, tzinfo=dt_timezone.utc).timestamp()
+        parsed = parse_security_line(JsonFormatter().format(record))
+        self.assertEqual((parsed['ip'], parsed['path']), ('203.0.113.5', '/wp-login.php'))
+        self.assertEqual(parsed['created_at'], datetime(2026, 10, 19, 10, 0, tzinfo=dt_timezone.utc))
+
+    def test_client_ip_comes_from_x_forwarded_for(self):
+        from main.log_ingest import parse_access_line
+
+        line = self.ACCESS_LINES[1].rstrip('\n')
+        self.assertEqual(parse_access_line(line + ' "198.51.100.7, 10.0.0.2"')['ip'], '198.51.100.7')
+        self.assertEqual(parse_access_line(line + ' "-"')['ip'], '203.0.113.6')
+
+    def test_command_needs_files_and_until(self):
+        # Later requests already have SecurityEvents, written live by the middleware
+        from io import StringIO
+        from django.core.management import CommandError, call_command
+
+        with self.assertRaises(CommandError):
+            call_command('ingest_logs')
+        with self.assertRaises(CommandError):
+            call_command('ingest_logs', self.path)
+        self._append(self.ACCESS_LINES)
+        call_command('ingest_logs', self.path, until='2026-10-19T10:00:02+00:00', stdout=StringIO())
+        self.assertEqual(SecurityEvent.objects.count(), 2)
+
+
+class LoggingPipelineTest(TestCase):
+    def _handler(self, path, **kwargs):
+        from portfolio_site.log_pipeline import QueueingHandler
+
+        handler = QueueingHandler({'class': 'logging.handlers.WatchedFileHandler', 'filename': path}, **kwargs)
+        handler.name = 'test'
+        self.addCleanup(handler.close)
+        return handler
+
+    def test_records_are_written_by_the_listener_thread(self):
+        import logging
+        import sys
+        import tempfile
+        from portfolio_site.log_pipeline import JsonFormatter
+
+        path = os.path.join(tempfile.mkdtemp(), 'app.log')
+        handler = self._handler(path)
+        handler.setFormatter(JsonFormatter())
+        try:
+            raise ValueError('boom')
+        except ValueError:
+            record = logging.getLogger('portfolio_site').makeRecord(
+                'portfolio_site', logging.ERROR, __file__, 1, 'failed for %s', ('10.0.0.1',), sys.exc_info()
+            )
+        handler.handle(record)
+        handler.flush()
+        self.assertIsNot(handler._listener._thread, None)
+
+        with open(path) as f:
+            data = json.loads(f.readline())
+        self.assertEqual(data['message'], 'failed for 10.0.0.1')
+        self.assertEqual(data['level'], 'ERROR')
+        self.assertIn('ValueError: boom', data['exc_info'])
+
+    def test_file_renamed_by_logrotate_is_reopened(self):
+        import logging
+        import tempfile
+
+        path = os.path.join(tempfile.mkdtemp(), 'app.log')
+        handler = self._handler(path)
+        handler.handle(logging.makeLogRecord({'msg': 'before', 'levelno': logging.INFO}))
+        handler.flush()
+        os.rename(path, f'{path}.1')
+        handler.handle(logging.makeLogRecord({'msg': 'after', 'levelno': logging.INFO}))
+        handler.flush()
+        with open(path) as f:
+            self.assertEqual(f.read().strip(), 'after')
+
+    def test_full_queue_drops_and_counts_records(self):
+        import logging
+        import tempfile
+        from portfolio_site.log_pipeline import dropped_records
+
+        handler = self._handler(os.path.join(tempfile.mkdtemp(), 'app.log'), queue_size=2)
+        handler._ensure_listener()
+        handler._listener.stop()  # nothing drains the queue now
+        before = dropped_records().get('test', 0)
+        for i in range(5):
+            handler.handle(logging.makeLogRecord({'msg': f'record {i}', 'levelno': logging.INFO}))
+        self.assertEqual(dropped_records()['test'] - before, 3)
+        handler._pid = None  # listener already stopped; close() must not stop it again
+
+
+class ResilientCacheTest(TestCase):
+    def _cache(self):
+        from portfolio_site.cache_backends import ResilientRedisCache
+
+        # Nothing listens on port 1, so every Redis call fails fast
+        return ResilientRedisCache('redis://127.0.0.1:1/0', {
+            'OPTIONS': {'socket_connect_timeout': 0.2, 'REPROBE_INTERVAL': 0.05},
+        })
+
+    def test_fails_over_to_local_cache(self):
+        cache = self._cache()
+        cache.set('key', 'value')
+        self.assertFalse(cache.healthy)
+        self.assertEqual(cache.get('key'), 'value')
+        self.assertTrue(cache.add('counter', 1))
+        self.assertEqual(cache.incr('counter'), 2)
+
+    def test_recovers_when_redis_answers_again(self):
+        import time
+        from unittest import mock
+
+        cache = self._cache()
+        cache.set('key', 'stale')
+        self.assertFalse(cache.healthy)
+        with mock.patch.object(cache.primary._cache, 'get_client') as get_client:
+            for _ in range(100):
+                if cache.healthy:
+                    break
+                time.sleep(0.02)
+            get_client.return_value.ping.assert_called()
+        self.assertTrue(cache.healthy)
+        self.assertIsNone(cache.fallback.get('key'))
+
+
+class TieredCacheTest(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from portfolio_site.cache_backends import TieredCache
+
+        cache.clear()
+        # The test settings' locmem 'default' cache stands in for Redis as L2
+        self.tiered = TieredCache(None, {'OPTIONS': {
+            'SHARED_CACHE': 'default', 'L1_TIMEOUT': 60, 'L1_EXCLUDE_PREFIXES': ('rate_limit_',),
+        }})
+        self.shared = cache
+
+    def test_reads_are_served_from_l1_until_invalidated(self):
+        self.tiered.set('page', 'v1')
+        self.assertEqual(self.tiered.get('page'), 'v1')
+        self.shared.set('page', 'v2')  # changed by another worker without a broadcast
+        self.assertEqual(self.tiered.get('page'), 'v1')
+        self.tiered.delete('page')
+        self.assertIsNone(self.tiered.get('page'))
+
+    def test_excluded_prefixes_bypass_l1(self):
+        self.tiered.set('rate_limit_general_10.0.0.1', 1)
+        self.shared.set('rate_limit_general_10.0.0.1', 5)
+        self.assertEqual(self.tiered.get('rate_limit_general_10.0.0.1'), 5)
+        self.assertEqual(len(self.tiered.local), 0)
+
+    def test_excluded_prefixes_are_not_broadcast(self):
+        from unittest.mock import MagicMock, patch
+
+        client = MagicMock()
+        with patch.object(self.tiered, '_redis_client', return_value=client):
+            self.tiered.set('rate_limit_general_10.0.0.1', 1)
+            self.tiered.incr('rate_limit_general_10.0.0.1')
+            self.tiered.delete('rate_limit_general_10.0.0.1')
+            client.publish.assert_not_called()
+            self.tiered.set('page', 'v1')
+        self.assertEqual(client.publish.call_count, 1)
+
+    def test_get_or_set_computes_once_for_concurrent_callers(self):
+        import threading
+        import time
+
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.1)
+            return 'expensive'
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.tiered.get_or_set('hot', compute, 300)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, ['expensive'] * 8)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.tiered.get('hot'), 'expensive')
+
+    def test_early_expiration_refreshes_before_expiry(self):
+        import time
+        from portfolio_site.cache_backends import EarlyExpiringValue
+
+        # Expires in 10s but took hours to compute: due for an early refresh
+        self.shared.set('report', EarlyExpiringValue('old', 1e6, time.time() + 10), 300)
+        self.assertEqual(self.tiered.get('report'), 'old')
+        self.tiered.local.clear()
+        self.assertEqual(self.tiered.get_or_set('report', lambda: 'new', 300), 'new')
+        self.assertFalse(EarlyExpiringValue('v', 0.001, time.time() + 300).should_refresh())
+
+
+class SessionWritesTest(TestCase):
+    def setUp(self):
+        # Downloading without an uploaded CV starts a PDF build
+        use_temporary_pdf_dir(self)
+
+    def test_anonymous_visitors_do_not_create_sessions(self):
+        from django.contrib.sessions.models import Session
+
+        response = self.client.get(reverse('main:download_resume'))
+        self.client.get(reverse('main:home'))
+        self.client.post(reverse('main:contact'), {'name': '', 'email': '', 'subject': '', 'message': ''})
+        self.assertEqual(Session.objects.count(), 0)
+        self.assertNotIn('sessionid', response.cookies)
+
+    def test_logged_in_session_refreshed_only_near_expiry(self):
+        import time
+        from django.conf import settings
+        from main.middleware import SessionRefreshMiddleware
+
+        staff = User.objects.create_user('staff', password='x', is_staff=True)
+        self.client.force_login(staff)
+        self.assertIn('sessionid', self.client.get(reverse('main:home')).cookies)
+        self.assertNotIn('sessionid', self.client.get(reverse('main:home')).cookies)
+
+        session = self.client.session
+        session[SessionRefreshMiddleware.REFRESHED_AT_KEY] = int(time.time()) - settings.SESSION_COOKIE_AGE + 60
+        session.save()
+        self.assertIn('sessionid', self.client.get(reverse('main:home')).cookies)
+
+    def test_request_just_before_the_threshold_keeps_the_session_alive(self):
+        import time
+        from datetime import timedelta
+        from django.conf import settings
+        from django.contrib.sessions.models import Session
+        from django.utils import timezone
+        from main.middleware import SessionRefreshMiddleware
+
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+        # Last refreshed 44 minutes ago, so the stored session expires in 16
+        elapsed = settings.SESSION_COOKIE_AGE - settings.SESSION_REFRESH_THRESHOLD - 60
+        session = self.client.session
+        session[SessionRefreshMiddleware.REFRESHED_AT_KEY] = int(time.time()) - elapsed
+        session.save()
+        Session.objects.filter(session_key=session.session_key).update(
+            expire_date=timezone.now() + timedelta(seconds=settings.SESSION_COOKIE_AGE - elapsed)
+        )
+
+        self.client.get(reverse('main:home'))
+        expire_date = Session.objects.get(session_key=session.session_key).expire_date
+        idle_timeout = timedelta(seconds=settings.SESSION_COOKIE_AGE - settings.SESSION_REFRESH_THRESHOLD)
+        self.assertGreaterEqual(expire_date, timezone.now() + idle_timeout)
+
+
+class ReplicaRoutingTest(TestCase):
+    def _route(self, method, url, cookies=None):
+        from django.test import RequestFactory
+        from django.urls import resolve
+        from blog.models import BlogPost
+        from portfolio_site.db_routers import ReplicaRouter, ReplicaRoutingMiddleware
+
+        request = getattr(RequestFactory(), method)(url)
+        request.COOKIES.update(cookies or {})
+        request.resolver_match = resolve(request.path_info)
+        routed = []
+
+        def view(request):
+            from django.http import HttpResponse
+            routed.append(ReplicaRouter().db_for_read(BlogPost) or 'default')
+            return HttpResponse()
+
+        middleware = ReplicaRoutingMiddleware(
+            lambda request: middleware.process_view(request, view, (), {}) or view(request)
+        )
+        response = middleware(request)
+        return routed[0], response
+
+    def test_read_only_views_use_the_replica(self):
+        from django.conf import settings
+        from django.test import override_settings
+
+        with override_settings(DATABASES={**settings.DATABASES, 'replica': {}}, DATABASE_REPLICA_ALIAS='replica'):
+            self.assertEqual(self._route('get', reverse('blog:blog_list'))[0], 'replica')
+            self.assertEqual(self._route('get', reverse('main:contact'))[0], 'default')
+            self.assertEqual(self._route('get', reverse('blog:blog_list'), {'db_primary': '1'})[0], 'default')
+
+            db, response = self._route('post', reverse('main:contact'))
+            self.assertEqual(db, 'default')
+            self.assertIn('db_primary', response.cookies)
+
+    def test_without_replica_everything_uses_primary(self):
+        from django.test import override_settings
+
+        with override_settings(DATABASE_REPLICA_ALIAS=None):
+            db, response = self._route('get', reverse('blog:blog_list'))
+            self.assertEqual(db, 'default')
+            db, response = self._route('post', reverse('main:contact'))
+            self.assertNotIn('db_primary', response.cookies)
+
+
+class QueryPlanTest(TestCase):
+    def setUp(self):
+        from main.content_fixtures import create_post
+        for i in range(3):
+            create_post(f'post-{i}', is_featured=i == 0)
+
+    def test_listing_queries_use_the_published_index(self):
+        from blog.models import PostView
+        from main.query_plans import explain_view
+
+        report = explain_view(reverse('blog:blog_list'), client=Client())
+        self.assertEqual(report.status, 200)
+        self.assertTrue(report.queries)
+        self.assertNotIn('blog_blogpost', report.seq_scans)
+
+        # Detail pages record a view; the request's writes are rolled back
+        report = explain_view(reverse('blog:post_detail', kwargs={'slug': 'post-0'}), client=Client())
+        self.assertEqual(report.status, 200)
+        self.assertEqual(PostView.objects.count(), 0)
+
+    def test_sequential_scans_are_parsed_from_sqlite_plans(self):
+        from main.query_plans import sequential_scans
+
+        plan = [
+            'SCAN blog_blogpost',
+            'SCAN portfolio_project USING INDEX portfolio_project_order_idx',
+            'SEARCH blog_blogcategory USING INTEGER PRIMARY KEY (rowid=?)',
+            'SCAN CONSTANT ROW',
+            'USE TEMP B-TREE FOR ORDER BY',
+        ]
+        self.assertEqual(sequential_scans(plan), ['blog_blogpost'])
+
+    def test_command_reports_each_view(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        call_command('explain_queries', reverse('blog:blog_list'), reverse('main:home'), stdout=out)
+        self.assertIn('/blog/ [200]', out.getvalue())
+        self.assertIn('No sequential scans found', out.getvalue())
+
+
+class PerformanceBudgetTest(TestCase):
+    """Query and time budgets for every public page against realistic volumes (see main.perf_budgets)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        from main.health import checker
+        from main.perf_fixtures import seed_performance_data
+        seed_performance_data()
+        # As at worker boot (gunicorn.conf.py), so /health/ is measured answering from cached results
+        checker.ensure_started()
+
+    def test_public_pages_within_budget(self):
+        import warnings
+        from main.perf_budgets import load_baseline, measure_pages, regressions, save_baseline, time_overruns
+
+        results = measure_pages(Client())
+        for name, result in results.items():
+            self.assertEqual(result['status'], 200, f"{name} ({result['path']})")
+
+        if os.getenv('PERF_UPDATE_BASELINE', '').lower() in ('true', '1', 'yes'):
+            save_baseline(results)
+            return
+        baseline = load_baseline()
+        self.assertEqual(regressions(results, baseline), [])
+        # Advisory: the recorded times are from another machine (PERF_CHECK_TIME=1 enforces them)
+        for overrun in time_overruns(results, baseline):
+            warnings.warn(f'Over time budget: {overrun}')
+
+    def test_regressions_are_reported(self):
+        from main.perf_budgets import regressions
+
+        baseline = {'blog_list': {'queries': 5, 'ms': 10}}
+        results = {
+            'blog_list': {'path': '/blog/', 'queries': 6, 'ms': 100},
+            'new_page': {'path': '/new/', 'queries': 1, 'ms': 1},
+        }
+        problems = regressions(results, baseline, check_time=False, time_tolerance=2, time_slack_ms=5)
+        self.assertEqual(len(problems), 2)
+        self.assertIn('6 queries, budget 5', problems[0])
+        self.assertIn('no budget recorded', problems[1])
+
+        problems = regressions(results, baseline, check_time=True, time_tolerance=2, time_slack_ms=5)
+        self.assertEqual(len(problems), 3)
+        self.assertIn('budget 25ms', problems[2])
+
+
+class ProfilingTest(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        self.profile_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.profile_dir, True)
+
+    def test_server_timing_header_only_when_enabled(self):
+        from django.test import override_settings
+
+        self.assertNotIn('Server-Timing', Client().get(reverse('blog:blog_list')))
+
+        with override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1):
+            with self.assertLogs('portfolio_site.profiling', 'INFO') as logs:
+                response = Client().get(reverse('blog:blog_list'))
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="[1-9]\d* queries"')
+        self.assertIn('tpl;dur=', timing)
+        self.assertIn('mw-RateLimit;dur=', timing)
+        self.assertIn('mw-ReplicaRouting;dur=', timing)
+        logged = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(logged['path'], reverse('blog:blog_list'))
+        self.assertGreater(logged['db_queries'], 0)
+
+    def test_cache_hits_and_misses_are_counted(self):
+        from contextlib import ExitStack
+        from django.core.cache import cache
+        from portfolio_site.profiling import RequestMetrics, _current, instrument_caches
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        try:
+            with ExitStack() as stack:
+                instrument_caches(stack)
+                cache.set('profiled', 1)
+                self.assertEqual(cache.get('profiled'), 1)
+                self.assertEqual(cache.get('absent', 'fallback'), 'fallback')
+                cache.get_many(['profiled', 'absent'])
+                cache.get_or_set('computed', lambda: 2)
+                cache.get_or_set('computed', lambda: 3)
+        finally:
+            _current.reset(token)
+        self.assertEqual((metrics.cache_hits, metrics.cache_misses, metrics.cache_calls), (3, 3, 6))
+        self.assertNotIn('get', cache.__dict__)  # unwrapped after the request
+
+    def test_signed_header_profiles_one_request_for_staff(self):
+        from django.test import override_settings
+        from portfolio_site.profiling import make_profiling_token
+
+        staff = User.objects.create_user('staff', password='x', is_staff=True)
+        visitor = User.objects.create_user('visitor', password='x')
+        with override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0, PROFILING_DIR=self.profile_dir):
+            response = Client().get(reverse('main:home'), HTTP_X_PROFILE=make_profiling_token(staff))
+            self.assertIn('X-Profile-File', response)
+            self.assertTrue(os.path.exists(os.path.join(self.profile_dir, response['X-Profile-File'])))
+
+            response = Client().get(reverse('main:home'), HTTP_X_PROFILE=make_profiling_token(visitor))
+            self.assertNotIn('X-Profile-File', response)
+            with self.assertLogs('portfolio_site.profiling', 'WARNING'):
+                response = Client().get(reverse('main:home'), HTTP_X_PROFILE=make_profiling_token(staff) + 'x')
+            self.assertNotIn('X-Profile-File', response)
+        self.assertEqual(len(os.listdir(self.profile_dir)), 1)
+
+
+class MetricsTest(TestCase):
+    def _scrape(self, **headers):
+        return Client().get('/metrics', **headers)
+
+    def test_scrape_reports_requests_and_events(self):
+        Client().get(reverse('blog:blog_list'))
+        SecurityEvent.log_event('login_failed', '10.0.0.1', 'bad password', severity='medium')
+
+        response = self._scrape()
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertRegex(text, r'http_request_duration_seconds_count\{route="blog/",method="GET",status="2xx"\} [1-9]')
+        self.assertIn('http_request_duration_seconds_bucket{route="blog/",method="GET",status="2xx",le="+Inf"}', text)
+        self.assertIn('http_request_db_queries_bucket{route="blog/",le="0"}', text)
+        self.assertRegex(text, r'security_events_total\{event_type="login_failed",severity="medium"\} [1-9]')
+        self.assertIn('email_outbox_messages{status="pending"} 0', text)
+        self.assertIn('# TYPE rate_limit_decisions_total counter', text)
+
+    def test_unknown_methods_share_one_label(self):
+        Client().generic('XSCAN', reverse('blog:blog_list'))
+        text = self._scrape().content.decode()
+        self.assertIn('method="OTHER"', text)
+        self.assertNotIn('XSCAN', text)
+
+    def test_scrape_requires_token_when_configured(self):
+        from django.test import override_settings
+
+        with override_settings(METRICS_TOKEN='s3cret'):
+            self.assertEqual(self._scrape().status_code, 404)
+            self.assertEqual(self._scrape(HTTP_AUTHORIZATION='Bearer wrong').status_code, 404)
+            self.assertEqual(self._scrape(HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+        self.assertEqual(self._scrape(REMOTE_ADDR='203.0.113.9').status_code, 404)
+
+    def test_proxied_requests_are_not_local(self):
+        # nginx on the same host connects from 127.0.0.1 for every internet client
+        self.assertEqual(self._scrape(HTTP_X_FORWARDED_FOR='203.0.113.9').status_code, 404)
+        self.assertEqual(self._scrape(HTTP_X_REAL_IP='203.0.113.9').status_code, 404)
+        with self.settings(METRICS_TOKEN='s3cret'):
+            response = self._scrape(HTTP_X_FORWARDED_FOR='203.0.113.9', HTTP_AUTHORIZATION='Bearer s3cret')
+        self.assertEqual(response.status_code, 200)
+
+    def test_workers_are_aggregated_through_the_directory(self):
+        import shutil
+        import tempfile
+        from django.test import override_settings
+        from portfolio_site.metrics import RATE_LIMIT_DECISIONS, collect_all
+
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, True)
+        own = RATE_LIMIT_DECISIONS.values.get(('general', 'blocked'), 0)
+        dead_pid = 2 ** 22 + 1  # above the default pid_max, so never a live process
+        for pid, blocked, depth in ((dead_pid, 5, 7), (os.getppid(), 2, 3)):
+            with open(os.path.join(directory, f'{pid}.json'), 'w') as f:
+                json.dump({'pid': pid, 'metrics': {
+                    'rate_limit_decisions_total': [[['general', 'blocked'], blocked]],
+                    'log_queue_depth': [[['file'], depth]],
+                }}, f)
+
+        with override_settings(METRICS_DIR=directory):
+            totals = collect_all()
+            self.assertEqual(totals['rate_limit_decisions_total'][('general', 'blocked')], own + 7)
+            self.assertEqual(totals['log_queue_depth'][('file',)], 3)  # the exited worker's gauge is gone
+            self.assertFalse(os.path.exists(os.path.join(directory, f'{dead_pid}.json')))
+            self.assertTrue(os.path.exists(os.path.join(directory, 'archive.json')))
+            # Counters of exited workers stay in the total
+            self.assertEqual(collect_all()['rate_limit_decisions_total'][('general', 'blocked')], own + 7)
+
+
+class HealthCheckTest(TestCase):
+    def test_liveness_does_no_io(self):
+        with self.assertNumQueries(0):
+            response = Client().get(reverse('main:health_live'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'status': 'alive'})
+
+    def test_readiness_reads_cached_results(self):
+        from main.health import checker
+
+        checker.ensure_started()
+        checker.run_checks()
+        with self.assertNumQueries(0):
+            response = Client().get(reverse('main:health_ready'))
+        self.assertEqual(response.status_code, 200)
+        checks = response.json()['checks']
+        self.assertEqual(set(checks), {'database', 'cache', 'storage'})
+        self.assertEqual(checks['database']['status'], 'ok')
+
+        from django.test import override_settings
+        with override_settings(HEALTH_CHECK_TTL=-1):
+            response = Client().get(reverse('main:health_ready'))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.json()['checks']['cache']['status'], 'stale')
+
+    def test_failures_and_pending_checks_are_not_ready(self):
+        from main.health import HealthChecker
+
+        def broken():
+            raise ConnectionError('connection refused')
+
+        health = HealthChecker({'database': broken, 'cache': lambda: ('degraded', 'fallback')})
+        ready, checks = health.report()
+        self.assertFalse(ready)
+        self.assertEqual(checks['database']['status'], 'pending')
+
+        health.run_checks()
+        ready, checks = health.report()
+        self.assertFalse(ready)
+        self.assertEqual(checks['database']['status'], 'error')
+        self.assertEqual(checks['database']['detail'], 'connection refused')
+        self.assertEqual(checks['cache']['status'], 'degraded')
+
+    def test_new_worker_is_ready_on_its_first_probe(self):
+        from main.health import HealthChecker
+
+        health = HealthChecker({'database': lambda: ('ok', '1 connection(s)')})
+        health.ensure_started()
+        ready, checks = health.report()
+        self.assertTrue(ready)
+        self.assertEqual(checks['database']['status'], 'ok')
+
+    async def test_async_probe_runs_the_first_round_off_the_event_loop(self):
+        from unittest import mock
+        from django.test import AsyncRequestFactory
+        from main import health
+        from main.views import ahealth_ready
+
+        with mock.patch.object(health, 'checker', health.HealthChecker()):
+            response = await ahealth_ready(AsyncRequestFactory().get('/health/ready/'))
+        checks = json.loads(response.content)['checks']
+        self.assertEqual(checks['database']['status'], 'ok', checks['database'])
+        self.assertEqual(response.status_code, 200)
+
+
+class AsgiModeTest(TestCase):
+    def test_every_middleware_is_async_capable(self):
+        from django.conf import settings
+        from django.utils.module_loading import import_string
+
+        for path in settings.MIDDLEWARE:
+            self.assertTrue(getattr(import_string(path), 'async_capable', False), path)
+
+
+class WarmupTest(TestCase):
+    def test_warm_up_loads_templates_and_url_patterns(self):
+        from portfolio_site.warmup import warm_templates, warm_urls
+
+        self.assertGreater(warm_templates(), 10)
+        self.assertGreater(warm_urls(), 10)
+
+    def test_context_processor_snapshot_is_taken_once(self):
+        from main.context_processors import personal_info, personal_info_snapshot
+
+        self.assertIs(personal_info(None), personal_info_snapshot())
+        self.assertIn('PERSONAL_NAME', personal_info(None))
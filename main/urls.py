@@ -1,4 +1,5 @@
 from django.urls import path
+from portfolio_site.asgi_support import view_for_server
 from . import views
 
 app_name = 'main'
@@ -8,11 +9,15 @@ urlpatterns = [
     path('about/', views.about, name='about'),
     path('resume/', views.resume, name='resume'),
     path('resume/download/', views.download_resume, name='download_resume'),
-    path('contact/', views.contact, name='contact'),
+    path('contact/', view_for_server(views.contact, views.acontact), name='contact'),
     path('security-dashboard/', views.security_dashboard, name='security_dashboard'),
-    path('health/', views.health_check, name='health_check'),  # Health check endpoint for Fly.io
+    path('security-dashboard/report/', views.download_security_report, name='download_security_report'),
+    path('security-dashboard/stream/', view_for_server(views.security_stream, views.asecurity_stream), name='security_stream'),
+    path('health/', view_for_server(views.health_check, views.ahealth_check), name='health_check'),
+    path('health/live/', view_for_server(views.health_live, views.ahealth_live), name='health_live'),  # Liveness probe (Docker HEALTHCHECK)
+    path('health/ready/', view_for_server(views.health_ready, views.ahealth_ready), name='health_ready'),  # Readiness probe (Fly.io, load balancers)
     path('test-social-links/', views.test_social_links, name='test_social_links'),
-    path('cloudinary-test/', views.cloudinary_test, name='cloudinary_test'),
-    path('cloudinary-debug/', views.cloudinary_debug, name='cloudinary_debug'),
-    path('cloudinary-upload-test/', views.cloudinary_upload_test, name='cloudinary_upload_test'),
+    path('cloudinary-test/', view_for_server(views.cloudinary_test, views.acloudinary_test), name='cloudinary_test'),
+    path('cloudinary-debug/', view_for_server(views.cloudinary_debug, views.acloudinary_debug), name='cloudinary_debug'),
+    path('cloudinary-upload-test/', view_for_server(views.cloudinary_upload_test, views.acloudinary_upload_test), name='cloudinary_upload_test'),
 ]
\ No newline at end of file
@@ -1,16 +1,29 @@
 import logging
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from django.core.mail import send_mail
+from django.db import transaction
 from django.conf import settings
+from asgiref.sync import sync_to_async
 from django.contrib.admin.views.decorators import staff_member_required
 from django.http import JsonResponse
 from django.utils import timezone
 from .models import Testimonial, Skill, Education, Certification, Achievement, Experience, ContactSubmission
+from .outbox import enqueue_email
+from .spam import check_contact_submission, mark_submitted
 
 # Get the logger
 logger = logging.getLogger('portfolio_site')
 
+
+def get_client_ip(request):
+    """Get client IP address, considering proxy headers"""
+    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0].strip()
+    else:
+        ip = request.META.get('REMOTE_ADDR')
+    return ip
+
 def home(request):
     """Render the home page"""
     # Fetch active testimonials ordered by display order
@@ -29,75 +42,40 @@ def about(request):
 
 def resume(request):
     """Render the resume page"""
-    # Fetch all resume-related data
-    education_items = getattr(Education, 'objects').all()
-    certifications = getattr(Certification, 'objects').all()
-    achievements = getattr(Achievement, 'objects').filter(is_active=True)
-    skills = getattr(Skill, 'objects').all()
-    experiences = getattr(Experience, 'objects').all()
-    
-    # Organize skills by category
-    skills_by_category = {}
-    category_mapping = {
-        'skill': 'Skills',
-        'tools': 'Tools',
-        'soft': 'Special Skills',
-    }
-    
-    for skill in skills:
-        mapped_category = category_mapping.get(skill.category, skill.category)
-        if mapped_category not in skills_by_category:
-            skills_by_category[mapped_category] = []
-        skills_by_category[mapped_category].append(skill)
-    
-    return render(request, 'main/resume.html', {
-        'education_items': education_items,
-        'certifications': certifications,
-        'achievements': achievements,
-        'experiences': experiences,
-        'skills_by_category': skills_by_category,
-    })
+    from .resume import get_resume_context
+    return render(request, 'main/resume.html', get_resume_context())
 
 def download_resume(request):
     """Handle resume download - serves uploaded CV or fallback static file"""
+    import os
+    from .resume import get_cv_document, DEFAULT_RESUME_FILENAME
+    from .sendfile import serve_file
+
+    from .resume_pdf import get_cached_resume_pdf, schedule_resume_pdf
+
     try:
-        # Try to get the admin user's profile
-        from django.contrib.auth.models import User
-        admin_user = User.objects.filter(is_staff=True).first()
-        
-        if admin_user and hasattr(admin_user, 'profile'):
-            user_profile = admin_user.profile
-            # Check if a CV document is uploaded
-            if user_profile.cv_document:
-                # Serve the uploaded CV file
-                from django.http import FileResponse
-                import os
-                
-                # Get the file path
-                file_path = user_profile.cv_document.path
-                
-                # Check if file exists
-                if os.path.exists(file_path):
-                    # Get the filename for the download
-                    filename = user_profile.cv_filename or 'Christopher_Erick_Resume.pdf'
-                    
-                    # Serve the file
-                    response = FileResponse(
-                        open(file_path, 'rb'),
-                        as_attachment=True,
-                        filename=filename
-                    )
-                    return response
-                else:
-                    # File doesn't exist on disk
-                    messages.warning(request, 'The uploaded CV file could not be found.')
-            else:
-                # No CV uploaded
-                messages.info(request, 'No CV has been uploaded yet.')
+        # Resolved CV path is cached, so repeat downloads skip the DB
+        status, file_path, filename = get_cv_document()
+
+        if status == 'ok' and os.path.exists(file_path):
+            return serve_file(request, file_path, filename=filename)
+
+        # No usable upload: serve the generated PDF if it is already rendered,
+        # otherwise render it in the background for the next request
+        generated_path = get_cached_resume_pdf()
+        if generated_path:
+            return serve_file(request, generated_path, filename=DEFAULT_RESUME_FILENAME)
+        schedule_resume_pdf()
+
+        if status == 'ok':
+            # File doesn't exist on disk
+            messages.warning(request, 'The uploaded CV file could not be found.')
+        elif status == 'no_cv':
+            messages.info(request, 'No CV has been uploaded yet.')
         else:
             # No admin user or profile
             messages.info(request, 'No user profile found.')
-            
+
     except Exception as e:
         # Log the error for debugging
         logger.error(f"Error serving CV: {str(e)}")
@@ -105,18 +83,9 @@ def download_resume(request):
     
     # Fallback: Try to serve static resume.pdf if it exists
     try:
-        import os
-        from django.conf import settings
-        from django.http import FileResponse
-        
         static_resume_path = os.path.join(settings.MEDIA_ROOT, 'resume.pdf')
         if os.path.exists(static_resume_path):
-            response = FileResponse(
-                open(static_resume_path, 'rb'),
-                as_attachment=True,
-                filename='Christopher_Erick_Resume.pdf'
-            )
-            return response
+            return serve_file(request, static_resume_path, filename=DEFAULT_RESUME_FILENAME)
     except Exception as e:
         logger.error(f"Error serving static resume: {str(e)}")
     
@@ -127,87 +96,241 @@ def download_resume(request):
 def contact(request):
     """Handle contact form"""
     if request.method == 'POST':
-        # Simple form handling without a form class
-        name = request.POST.get('name', '')
-        email = request.POST.get('email', '')
-        subject = request.POST.get('subject', '')
-        message = request.POST.get('message', '')
+        response = _handle_contact_post(request)
+        if response is not None:
+            return response
+    
+    return render(request, 'main/contact.html')
+
+async def acontact(request):
+    """contact for ASGI mode: the submission (one transaction) and the page render run in a thread"""
+    if request.method == 'POST':
+        response = await sync_to_async(_handle_contact_post)(request)
+        if response is not None:
+            return response
+    
+    return await sync_to_async(render)(request, 'main/contact.html')
+
+def _handle_contact_post(request):
+    """Process a contact form POST; returns the redirect, or None to show the form again"""
+    # Simple form handling without a form class
+    name = request.POST.get('name', '')
+    email = request.POST.get('email', '')
+    subject = request.POST.get('subject', '')
+    message = request.POST.get('message', '')
+    
+    if name and email and subject and message:
+        # Score for spam before anything is written; rejected and
+        # duplicate submissions get the normal response but are dropped
+        client_ip = get_client_ip(request)
+        verdict = check_contact_submission(name, email, subject, message, client_ip)
+        if verdict.rejected:
+            logger.warning(
+                f"Rejected contact submission from {client_ip} ({email}): "
+                f"score={verdict.score} duplicate={verdict.duplicate} rules={verdict.rules}"
+            )
+            messages.success(request, 'Thank you for your message. We will contact you soon!')
+            return redirect('main:contact')
         
-        if name and email and subject and message:
-            # Save to database
-            try:
+        # Save to database and queue the notification email in one
+        # transaction; delivery happens in the outbox worker
+        try:
+            with transaction.atomic():
                 contact_submission = getattr(ContactSubmission, 'objects').create(
                     name=name,
                     email=email,
                     subject=subject,
-                    message=message
+                    message=message,
+                    ip_address=client_ip,
+                    spam_score=verdict.score,
+                    is_spam=verdict.is_spam,
+                    content_hash=verdict.content_hash,
                 )
-                logger.info(f"Contact submission saved to database: {contact_submission.id}")
-                database_success = True
-            except Exception as e:
-                logger.error(f"Failed to save contact submission to database: {str(e)}")
-                database_success = False
-            
-            # Log the contact attempt
-            logger.info(f"Contact form submitted by {name} ({email}) with subject: {subject}")
-            
-            # Try to send email (in production, you'd use a proper email backend)
-            email_success = False
-            try:
-                # Check if email settings are configured
-                if hasattr(settings, 'CONTACT_EMAIL') and settings.CONTACT_EMAIL:
-                    send_mail(
+                # Only a stored submission makes later copies duplicates; a failed save can be retried
+                transaction.on_commit(lambda: mark_submitted(verdict.content_hash))
+                # Flagged submissions are kept for review but never emailed
+                if verdict.is_spam:
+                    logger.warning(f"Flagged contact submission as spam: score={verdict.score} rules={verdict.rules}")
+                elif hasattr(settings, 'CONTACT_EMAIL') and settings.CONTACT_EMAIL:
+                    enqueue_email(
                         f"Contact Form: {subject}",
                         f"From: {name} <{email}>\n\n{message}",
                         email,  # From email
                         [settings.CONTACT_EMAIL],  # To email
-                        fail_silently=False,
                     )
-                    email_success = True
-                    logger.info(f"Contact email sent successfully from {email}")
                 else:
                     # Email not configured, but that's okay
                     logger.info("Email not configured, skipping email send")
-            except Exception as e:
-                logger.error(f"Failed to send contact email: {str(e)}")
-            
-            # Show appropriate message based on what worked
-            if database_success:
-                messages.success(request, 'Thank you for your message. We will contact you soon!')
-            else:
-                messages.success(request, 'Thank you for your message. We will contact you soon! (Note: There was an issue saving your message, but it was sent via email)')
-            
-            return redirect('main:contact')
+            logger.info(f"Contact submission saved to database: {contact_submission.id}")
+            database_success = True
+        except Exception as e:
+            logger.error(f"Failed to save contact submission to database: {str(e)}")
+            database_success = False
+        
+        # Log the contact attempt
+        logger.info(f"Contact form submitted by {name} ({email}) with subject: {subject}")
+        
+        # Show appropriate message based on what worked
+        if database_success:
+            messages.success(request, 'Thank you for your message. We will contact you soon!')
         else:
-            messages.error(request, 'Please fill in all required fields.')
-    
-    return render(request, 'main/contact.html')
+            messages.success(request, 'Thank you for your message. We will contact you soon! (Note: There was an issue saving your message, please try again later)')
+        
+        return redirect('main:contact')
+    else:
+        messages.error(request, 'Please fill in all required fields.')
+    return None
 
+@staff_member_required
 def security_dashboard(request):
-    """Render the security dashboard"""
-    # This would typically fetch security event data from the database
-    # For now, we'll just render the template
-    return render(request, 'main/security_dashboard.html')
+    """Render the security dashboard from the rollup tables"""
+    from .dashboard import get_dashboard_context
+    context = get_dashboard_context()
+    # Live updates only stream under ASGI (see security_stream)
+    context['live_updates'] = settings.ASGI_MODE
+    return render(request, 'main/security_dashboard.html', context)
+
+@staff_member_required
+def download_security_report(request):
+    """Download a plain-text security report built from the rollup tables"""
+    from datetime import timedelta
+    from django.http import HttpResponse
+    from .dashboard import refresh_rollups, get_security_metrics
+    from .rollups import rollup_totals
+
+    refresh_rollups()
+    now = timezone.now()
+    metrics = get_security_metrics(now)
+    totals_30d = rollup_totals(['events', 'contact_submissions', 'contact_spam'], now - timedelta(days=29), period='day')
+
+    lines = [
+        "PORTFOLIO SECURITY REPORT",
+        "=" * 50,
+        f"Generated: {now.strftime('%Y-%m-%d %H:%M:%S')} UTC",
+        "",
+        f"THREAT LEVEL: {metrics['threat_level']} (Score: {metrics['threat_score']})",
+        "",
+        "LAST 24 HOURS:",
+        f"- Failed logins: {metrics['failed_logins']}",
+        f"- Suspicious requests: {metrics['suspicious_requests']}",
+        f"- Rate limit violations: {metrics['rate_violations']}",
+        f"- Admin access: {metrics['admin_access']}",
+        f"- Contact submissions: {metrics['contact_submissions']}",
+        f"- Unique IPs (approx.): {metrics['unique_ips']}",
+        "",
+        "LAST 30 DAYS:",
+        f"- Security events: {totals_30d['events']}",
+        f"- Contact submissions: {totals_30d['contact_submissions']}",
+        f"- Flagged as spam: {totals_30d['contact_spam']}",
+        "",
+    ]
+    response = HttpResponse('\n'.join(lines), content_type='text/plain; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="security_report_{now:%Y%m%d}.txt"'
+    return response
+
+def security_stream(request):
+    """
+    The live dashboard feed needs ASGI. Under WSGI an endless stream would hold
+    a worker thread forever without ever flushing, so answer 204 instead, which
+    tells EventSource not to reconnect; the page keeps its rendered data.
+    """
+    from django.http import HttpResponse, HttpResponseForbidden
+
+    if not (request.user.is_active and request.user.is_staff):
+        return HttpResponseForbidden('Staff access required')
+    return HttpResponse(status=204)
+
+async def asecurity_stream(request):
+    """
+    Server-Sent Events feed for the security dashboard.
+
+    Streams new SecurityEvents and metric deltas from the in-process broker.
+    Served without blocking a worker under ASGI (portfolio_site/asgi.py).
+    """
+    import asyncio
+    import json
+    from asgiref.sync import sync_to_async
+    from django.http import HttpResponseForbidden, StreamingHttpResponse
+    from .dashboard import get_security_metrics
+    from .event_stream import broker
+
+    user = await request.auser()
+    if not (user.is_active and user.is_staff):
+        return HttpResponseForbidden('Staff access required')
+
+    keepalive = getattr(settings, 'SSE_KEEPALIVE_SECONDS', 15)
+
+    def format_message(message):
+        return f"event: {message['type']}\ndata: {json.dumps(message['data'], default=str)}\n\n"
+
+    async def stream():
+        queue = broker.subscribe()
+        try:
+            yield 'retry: 5000\n\n'
+            metrics = await sync_to_async(get_security_metrics)()
+            yield format_message({'type': 'metrics', 'data': metrics})
+            while True:
+                try:
+                    message = await asyncio.wait_for(queue.get(), keepalive)
+                except asyncio.TimeoutError:
+                    yield ': keepalive\n\n'
+                    continue
+                yield format_message(message)
+        finally:
+            broker.unsubscribe(queue)
+
+    response = StreamingHttpResponse(stream(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+def health_live(request):
+    """Liveness probe: answers as long as the worker does; no database, cache or disk access"""
+    return JsonResponse({'status': 'alive'})
+
+async def ahealth_live(request):
+    return health_live(request)
+
+def health_ready(request):
+    """Readiness probe: database, cache and storage status from the background checker (main.health)"""
+    from .health import checker
+    checker.ensure_started()
+    return _health_ready_response()
+
+async def ahealth_ready(request):
+    from .health import checker
+    # A new worker's first call runs one round of checks, which must not block the event loop
+    await sync_to_async(checker.ensure_started)()
+    return _health_ready_response()
+
+def _health_ready_response():
+    from .health import checker
+    ready, checks = checker.report()
+    return JsonResponse({'status': 'ready' if ready else 'unavailable', 'checks': checks}, status=200 if ready else 503)
+
+async def ahealth_check(request):
+    from .health import checker
+    await sync_to_async(checker.ensure_started)()
+    return _health_check_response()
 
 def health_check(request):
     """Health check endpoint for monitoring"""
-    try:
-        # Test database connection
-        from django.db import connection
-        with connection.cursor() as cursor:
-            cursor.execute("SELECT 1")
-            db_status = "OK"
-    except Exception as e:
-        db_status = f"Error: {str(e)}"
+    from .health import checker
+    checker.ensure_started()
+    return _health_check_response()
+
+def _health_check_response():
+    # Component status comes from the background checker, so this never queries the database itself
+    from .health import checker
+    ready, checks = checker.report()
+    db_status = "OK" if checks['database']['status'] == 'ok' else f"{checks['database']['status']}: {checks['database']['detail']}"
     
     # Check if we're in debug mode
-    from django.conf import settings
     debug_mode = getattr(settings, 'DEBUG', False)
     
     # Check Cloudinary configuration
     cloudinary_status = "Not checked"
     try:
-        from django.conf import settings
         default_storage = getattr(settings, 'DEFAULT_FILE_STORAGE', '')
         if 'cloudinary' in default_storage.lower():
             cloudinary_status = "Configured"
@@ -216,14 +339,22 @@ def health_check(request):
     except:
         cloudinary_status = "Error checking"
     
+    # Log records dropped by the non-blocking logging pipeline in this worker
+    from portfolio_site.log_pipeline import dropped_records
+    
     return JsonResponse({
-        'status': 'healthy',
+        'status': 'healthy' if ready else 'unhealthy',
         'timestamp': timezone.now().isoformat(),
         'database': db_status,
         'debug': debug_mode,
-        'cloudinary': cloudinary_status
+        'cloudinary': cloudinary_status,
+        'logging': {'dropped_records': sum(dropped_records().values())},
     })
 
+async def acloudinary_test(request):
+    # Only reads the configuration, so it runs on the event loop as is
+    return cloudinary_test(request)
+
 def cloudinary_test(request):
     """Test endpoint to check Cloudinary configuration"""
     import os
@@ -285,45 +416,77 @@ def cloudinary_upload_test(request):
         
         # Upload to Cloudinary
         result = cloudinary.uploader.upload(uploaded_file)
-        
+        return _upload_result(result)
+    except Exception as e:
         return JsonResponse({
-            'success': True,
-            'public_id': result.get('public_id'),
-            'url': result.get('secure_url'),
-            'format': result.get('format'),
-            'bytes': result.get('bytes')
+            'success': False,
+            'error': str(e)
         })
+
+async def acloudinary_upload_test(request):
+    """cloudinary_upload_test for ASGI mode"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST method required'})
+    
+    if 'file' not in request.FILES:
+        return JsonResponse({'error': 'No file provided'})
+    
+    try:
+        import cloudinary
+        import cloudinary.uploader
+        
+        # The upload is a blocking HTTP call; it does not touch the database, so it
+        # runs in the shared thread pool rather than this request's sync thread
+        result = await sync_to_async(cloudinary.uploader.upload, thread_sensitive=False)(request.FILES['file'])
+        return _upload_result(result)
     except Exception as e:
         return JsonResponse({
             'success': False,
             'error': str(e)
         })
 
+def _upload_result(result):
+    return JsonResponse({
+        'success': True,
+        'public_id': result.get('public_id'),
+        'url': result.get('secure_url'),
+        'format': result.get('format'),
+        'bytes': result.get('bytes')
+    })
+
 def cloudinary_debug(request):
     """Debug endpoint to check actual file paths in database"""
     from portfolio.models import Project
-    import os
     
     # Get all projects
-    projects = getattr(Project, 'objects').all()
+    project_data = [_media_paths(project) for project in getattr(Project, 'objects').all()]
     
-    project_data = []
-    for project in projects:
-        project_info = {
-            'title': project.title,
-            'slug': project.slug,
-            'featured_image_path': str(project.featured_image) if project.featured_image else 'None',
-            'writeup_document_path': str(project.writeup_document) if project.writeup_document else 'None',
-            'featured_image_url': project.featured_image.url if project.featured_image else 'None',
-            'writeup_document_url': project.writeup_document.url if project.writeup_document else 'None',
-        }
-        project_data.append(project_info)
+    return JsonResponse({
+        'projects': project_data,
+        'total_projects': len(project_data)
+    })
+
+async def acloudinary_debug(request):
+    """cloudinary_debug for ASGI mode, on the async ORM"""
+    from portfolio.models import Project
+    
+    project_data = [_media_paths(project) async for project in getattr(Project, 'objects').all()]
     
     return JsonResponse({
         'projects': project_data,
         'total_projects': len(project_data)
     })
 
+def _media_paths(project):
+    return {
+        'title': project.title,
+        'slug': project.slug,
+        'featured_image_path': str(project.featured_image) if project.featured_image else 'None',
+        'writeup_document_path': str(project.writeup_document) if project.writeup_document else 'None',
+        'featured_image_url': project.featured_image.url if project.featured_image else 'None',
+        'writeup_document_url': project.writeup_document.url if project.writeup_document else 'None',
+    }
+
 def test_social_links(request):
     """Test view to check social links rendering"""
     return render(request, 'test_social_links.html')
\ No newline at end of file
@@ -0,0 +1,44 @@
+from django.contrib.syndication.views import Feed
+from django.urls import reverse
+from django.utils.feedgenerator import Atom1Feed
+
+from main.context_processors import personal_info_snapshot
+
+from .models import Project
+
+FEED_ITEMS = 20
+
+
+class LatestProjectsFeed(Feed):
+    """RSS feed of the most recently added projects"""
+
+    description = 'Recent cybersecurity and IT projects.'
+
+    def title(self):
+        return f"{personal_info_snapshot()['PERSONAL_NAME']} - Projects"
+
+    def link(self):
+        return reverse('portfolio:portfolio_list')
+
+    def items(self):
+        return Project.objects.select_related('category').order_by('-created_at')[:FEED_ITEMS]
+
+    def item_title(self, project):
+        return project.title
+
+    def item_description(self, project):
+        return project.short_description
+
+    def item_pubdate(self, project):
+        return project.created_at
+
+    def item_updateddate(self, project):
+        return project.updated_at
+
+    def item_categories(self, project):
+        return [project.category.name]
+
+
+class LatestProjectsAtomFeed(LatestProjectsFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestProjectsFeed.description
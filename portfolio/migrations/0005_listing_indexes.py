@@ -0,0 +1,21 @@
+# Generated by Django 5.2.6 on 2026-10-19 19:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('portfolio', '0004_remove_category_portfolio_c_name_f2e04c_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(fields=['-is_featured', 'order', '-created_at'], name='portfolio_project_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='project',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['order', '-created_at'], name='portfolio_project_featured_idx'),
+        ),
+    ]
@@ -73,6 +73,15 @@ class Project(models.Model):
     
     class Meta:
         ordering = ['-is_featured', 'order', '-created_at']
+        indexes = [
+            models.Index(fields=['-is_featured', 'order', '-created_at'], name='portfolio_project_order_idx'),
+            # Listing and filter endpoint only show featured projects
+            models.Index(
+                fields=['order', '-created_at'],
+                condition=models.Q(is_featured=True),
+                name='portfolio_project_featured_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
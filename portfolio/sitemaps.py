@@ -0,0 +1,22 @@
+from django.contrib.sitemaps import Sitemap
+from django.db.models import Max
+
+from portfolio_site.syndication import SITEMAP_PAGE_SIZE
+
+from .models import Project
+
+
+class ProjectSitemap(Sitemap):
+    changefreq = 'monthly'
+    priority = 0.8
+    limit = SITEMAP_PAGE_SIZE
+
+    def items(self):
+        return Project.objects.only('slug', 'updated_at').order_by('order', 'pk')
+
+    def lastmod(self, project):
+        return project.updated_at
+
+    def get_latest_lastmod(self):
+        # One query rather than a lastmod() call per project
+        return self.items().aggregate(latest=Max('updated_at'))['latest']
@@ -1 +1,55 @@
-# Empty tests file
\ No newline at end of file
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, RequestFactory, TestCase
+from django.urls import reverse
+
+from main.cache_warmer import public_urls
+from main.content_fixtures import create_project
+from portfolio.views import afilter_projects, filter_projects
+
+
+class ProjectAsyncViewTest(TestCase):
+    def setUp(self):
+        create_project(is_featured=True)
+
+    async def test_async_filter_answers_like_the_sync_one(self):
+        response = await afilter_projects(AsyncRequestFactory().get('/portfolio/filter/', {'category': 'tools'}))
+        expected = await sync_to_async(filter_projects)(RequestFactory().get('/portfolio/filter/', {'category': 'tools'}))
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+        self.assertEqual([project['slug'] for project in json.loads(response.content)['projects']], ['scanner'])
+
+
+class ProjectCacheWarmerTest(TestCase):
+    def test_public_urls_cover_projects_and_filters(self):
+        create_project(is_featured=True)
+
+        urls = public_urls()
+        self.assertIn(reverse('portfolio:project_detail', kwargs={'slug': 'scanner'}), urls)
+        self.assertIn(reverse('portfolio:portfolio_list') + '?category=tools', urls)
+        self.assertEqual(len(urls), len(set(urls)))
+
+
+class ProjectSyndicationTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.project = create_project()
+
+    def test_sitemap_and_feed_list_projects(self):
+        index = self.client.get(reverse('sitemap')).content.decode()
+        self.assertIn('http://testserver/sitemap-projects.xml', index)
+        projects = self.client.get(reverse('sitemap_section', kwargs={'section': 'projects'})).content.decode()
+        self.assertIn('http://testserver/portfolio/scanner/', projects)
+        self.assertContains(self.client.get(reverse('projects_feed')), 'Scanner')
+
+    def test_project_change_gives_the_feed_a_new_version(self):
+        url = reverse('projects_feed')
+        etag = self.client.get(url)['ETag']
+
+        self.project.title = 'Port scanner'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.project.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, 'Port scanner')
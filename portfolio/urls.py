@@ -1,10 +1,11 @@
 from django.urls import path
+from portfolio_site.asgi_support import view_for_server
 from . import views
 
 app_name = 'portfolio'
 
 urlpatterns = [
     path('', views.portfolio_list, name='portfolio_list'),
-    path('filter/', views.filter_projects, name='filter_projects'),
+    path('filter/', view_for_server(views.filter_projects, views.afilter_projects), name='filter_projects'),
     path('<slug:slug>/', views.project_detail, name='project_detail'),
 ]
\ No newline at end of file
@@ -4,6 +4,8 @@ from django.core.paginator import Paginator
 from django.db.models import Q
 from .models import Project, Category, Technology
 
+PROJECTS_PER_PAGE = 9
+
 
 def portfolio_list(request):
     """Portfolio listing page with filtering"""
@@ -31,7 +33,7 @@ def portfolio_list(request):
         )
     
     # Pagination
-    paginator = Paginator(projects, 9)  # Show 9 projects per page
+    paginator = Paginator(projects, PROJECTS_PER_PAGE)
     page_number = request.GET.get('page')
     page_obj = paginator.get_page(page_number)
     
@@ -57,7 +59,7 @@ def project_detail(request, slug):
     # Get related projects (same category, exclude current project)
     related_projects = Project.objects.filter(
         category=project.category
-    ).exclude(id=project.id).select_related('category')[:3]
+    ).exclude(id=project.id).select_related('category').prefetch_related('technologies')[:3]
     
     context = {
         'project': project,
@@ -69,6 +71,15 @@ def project_detail(request, slug):
 
 def filter_projects(request):
     """AJAX endpoint for filtering projects"""
+    return JsonResponse({'projects': [_project_data(project) for project in _filtered_projects(request)]})
+
+
+async def afilter_projects(request):
+    """filter_projects for ASGI mode, on the async ORM"""
+    return JsonResponse({'projects': [_project_data(project) async for project in _filtered_projects(request)]})
+
+
+def _filtered_projects(request):
     category = request.GET.get('category', '')
     technology = request.GET.get('technology', '')
     search = request.GET.get('search', '')
@@ -88,19 +99,18 @@ def filter_projects(request):
             Q(description__icontains=search) |
             Q(short_description__icontains=search)
         )
-    
-    project_data = []
-    for project in projects:
-        project_data.append({
-            'title': project.title,
-            'slug': project.slug,
-            'short_description': project.short_description,
-            'category': project.category.name,
-            'technologies': [tech.name for tech in project.technologies.all()],
-            'featured_image': project.featured_image.url if project.featured_image else '',
-            'live_url': project.live_url,
-            'github_url': project.github_url,
-            'status': project.get_status_display(),
-        })
-    
-    return JsonResponse({'projects': project_data})
\ No newline at end of file
+    return projects
+
+
+def _project_data(project):
+    return {
+        'title': project.title,
+        'slug': project.slug,
+        'short_description': project.short_description,
+        'category': project.category.name,
+        'technologies': [tech.name for tech in project.technologies.all()],
+        'featured_image': project.featured_image.url if project.featured_image else '',
+        'live_url': project.live_url,
+        'github_url': project.github_url,
+        'status': project.get_status_display(),
+    }
@@ -2,6 +2,14 @@
 ASGI config for portfolio_site project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Run under ASGI when the live security dashboard stream
+(/security-dashboard/stream/) is used, so open connections do not each hold
+a worker:
+
+    gunicorn portfolio_site.asgi:application -k uvicorn_worker.UvicornWorker
+
+Importing this module turns on ASGI_MODE, which routes the I/O-bound
+endpoints to their async views (see portfolio_site/asgi_support.py).
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
@@ -12,5 +20,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_site.settings')
+os.environ.setdefault('DJANGO_ASGI_MODE', 'True')
 
 application = get_asgi_application()
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+ASGI mode
+
+`gunicorn -k uvicorn_worker.UvicornWorker portfolio_site.asgi:application`
+(see DEPLOYMENT_GUIDE.md) serves requests from an event loop, so slow
+clients and long-lived connections do not each hold a thread. asgi.py sets
+ASGI_MODE before the settings are loaded; the URL confs then route the
+I/O-bound endpoints to their async variants (view_for_server), which await
+the async ORM or run blocking calls in a thread, while everything else
+keeps its sync view.
+
+For a request to stay on the event loop up to the view, every middleware
+must be async-capable; one sync-only middleware makes Django run the rest
+of the chain in a thread. MiddlewareMixin is async-capable but hands every
+hook to a thread; InlineMiddlewareMixin runs hooks that never block
+directly on the loop.
+"""
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.deprecation import MiddlewareMixin
+from whitenoise.middleware import WhiteNoiseMiddleware as BaseWhiteNoiseMiddleware
+
+
+def view_for_server(sync_view, async_view):
+    """The view to route to: ``async_view`` when serving over ASGI, else ``sync_view``"""
+    return async_view if getattr(settings, 'ASGI_MODE', False) else sync_view
+
+
+class InlineMiddlewareMixin(MiddlewareMixin):
+    """
+    MiddlewareMixin whose process_request/process_response run on the event
+    loop under ASGI. Only for hooks without database, cache or session access;
+    a middleware that sometimes needs them returns True from
+    ``request_blocks(request)`` and that request's process_request runs in a
+    thread as usual.
+    """
+
+    def request_blocks(self, request):
+        return False
+
+    async def __acall__(self, request):
+        response = None
+        if hasattr(self, 'process_request'):
+            if self.request_blocks(request):
+                response = await sync_to_async(self.process_request, thread_sensitive=True)(request)
+            else:
+                response = self.process_request(request)
+        response = response or await self.get_response(request)
+        if hasattr(self, 'process_response'):
+            response = self.process_response(request, response)
+        return response
+
+
+class WhiteNoiseMiddleware(BaseWhiteNoiseMiddleware):
+    """WhiteNoise, which is sync-only, with an async path so it does not push every request into a thread"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
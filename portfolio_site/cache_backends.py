@@ -0,0 +1,440 @@
+"""
+Cache backends
+
+TieredCache keeps a small per-worker LRU (L1) in front of a shared cache
+such as Redis (L2), with single-flight recomputation and probabilistic early
+expiration in get_or_set(). ResilientRedisCache uses Redis when it is reachable and an in-process LRU
+(LocMemCache) when it is not. Nothing connects at import or settings time:
+the first cache call opens the Redis pool. A connection error switches the
+worker to the local cache and starts a background thread that pings Redis
+every REPROBE_INTERVAL seconds; once Redis answers, the worker switches
+back on its own, without a restart.
+
+While failed over, each worker has its own cache, so shared state such as
+rate-limit counters is per worker until Redis returns.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'portfolio_site.cache_backends.ResilientRedisCache',
+            'LOCATION': 'redis://127.0.0.1:6379/1',
+            'OPTIONS': {
+                'socket_connect_timeout': 1,
+                'FALLBACK_MAX_ENTRIES': 1000,
+                'REPROBE_INTERVAL': 15,
+            },
+        }
+    }
+"""
+import logging
+import math
+import os
+import pickle
+import random
+import socket
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.cache.backends.redis import RedisCache
+
+from .metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger('portfolio_site')
+
+
+class ResilientRedisCache(BaseCache):
+    def __init__(self, server, params):
+        super().__init__(params)
+        params = dict(params)
+        options = dict(params.get('OPTIONS', {}))
+        self.reprobe_interval = options.pop('REPROBE_INTERVAL', 15)
+        fallback_entries = options.pop('FALLBACK_MAX_ENTRIES', 1000)
+        params['OPTIONS'] = options
+
+        self.primary = RedisCache(server, params)
+        self.fallback = LocMemCache(f'resilient-{id(self)}', {
+            'TIMEOUT': params.get('TIMEOUT', 300),
+            'KEY_PREFIX': params.get('KEY_PREFIX', ''),
+            'VERSION': params.get('VERSION', 1),
+            'KEY_FUNCTION': params.get('KEY_FUNCTION'),
+            'OPTIONS': {'MAX_ENTRIES': fallback_entries},
+        })
+        self._healthy = True
+        self._lock = threading.Lock()
+        self._prober = None
+        self._prober_pid = None
+
+    @property
+    def healthy(self):
+        return self._healthy
+
+    def _connection_errors(self):
+        import redis
+        return (redis.exceptions.ConnectionError, redis.exceptions.TimeoutError)
+
+    def _mark_down(self, error):
+        with self._lock:
+            if self._healthy:
+                logger.warning(f'Redis cache unavailable, using in-process cache: {error}')
+            self._healthy = False
+            if self._prober is None or self._prober_pid != os.getpid() or not self._prober.is_alive():
+                self._prober = threading.Thread(target=self._probe, name='cache-reprobe', daemon=True)
+                self._prober_pid = os.getpid()
+                self._prober.start()
+
+    def _probe(self):
+        while True:
+            time.sleep(self.reprobe_interval)
+            try:
+                self.primary._cache.get_client(write=True).ping()
+            except Exception:
+                continue
+            with self._lock:
+                # Entries written while failed over may be stale by the next outage
+                self.fallback.clear()
+                self._healthy = True
+                self._prober = None
+            logger.info('Redis cache reachable again')
+            return
+
+    def _call(self, method, *args, **kwargs):
+        if self._healthy:
+            try:
+                return getattr(self.primary, method)(*args, **kwargs)
+            except self._connection_errors() as e:
+                self._mark_down(e)
+        return getattr(self.fallback, method)(*args, **kwargs)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call('add', key, value, timeout, version=version)
+
+    def get(self, key, default=None, version=None):
+        return self._call('get', key, default, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call('set', key, value, timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call('touch', key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        return self._call('delete', key, version=version)
+
+    def get_many(self, keys, version=None):
+        return self._call('get_many', keys, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self._call('set_many', data, timeout, version=version)
+
+    def delete_many(self, keys, version=None):
+        return self._call('delete_many', keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self._call('has_key', key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        return self._call('incr', key, delta, version=version)
+
+    def clear(self):
+        self.fallback.clear()
+        return self._call('clear')
+
+    def close(self, **kwargs):
+        self.primary.close(**kwargs)
+
+
+
+class LocalLRU:
+    """Thread-safe LRU of pickled values with a per-entry expiry"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (found, value)"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False, None
+            expires, payload = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return False, None
+            self._data.move_to_end(key)
+        return True, pickle.loads(payload)
+
+    def set(self, key, value, ttl):
+        payload = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, payload)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class EarlyExpiringValue(namedtuple('EarlyExpiringValue', 'value delta expires')):
+    """
+    A value stored by TieredCache.get_or_set(), with the time it took to
+    compute (``delta``) and its wall-clock expiry, for XFetch early refresh.
+    """
+
+    def should_refresh(self, beta=1.0):
+        if self.expires is None:
+            return False
+        # XFetch: refresh early with a probability that rises as expiry nears
+        # and with the cost of recomputing (Vattani et al.)
+        return time.time() - self.delta * beta * math.log(1 - random.random()) >= self.expires
+
+
+_MISSING = object()
+
+
+def _unwrap(value):
+    return value.value if isinstance(value, EarlyExpiringValue) else value
+
+
+class TieredCache(BaseCache):
+    """
+    Per-worker L1 LRU in front of a shared cache alias (L2).
+
+    Reads are served from L1 for at most L1_TIMEOUT seconds, which bounds
+    how stale a worker can be. Writes go to L2, evict the local entry and,
+    when L2 is Redis, are broadcast over pub/sub so other workers evict
+    theirs immediately. Keys starting with an L1_EXCLUDE_PREFIXES entry
+    (rate-limit counters, dedup markers) and add()/incr() always go to L2.
+
+    get_or_set() computes a missing value once per key across threads and
+    workers (a lock in each process, a short lease in L2) and refreshes hot
+    keys shortly before they expire so they never all miss at once.
+    """
+
+    def __init__(self, server, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.shared_alias = options.get('SHARED_CACHE', 'shared')
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+        self.l1_exclude = tuple(options.get('L1_EXCLUDE_PREFIXES', ()))
+        self.lock_timeout = options.get('LOCK_TIMEOUT', 30)
+        self.lock_wait = options.get('LOCK_WAIT', 2)
+        self.beta = options.get('XFETCH_BETA', 1.0)
+        self.channel = options.get('INVALIDATION_CHANNEL', 'cache-invalidate')
+        self.local = LocalLRU(options.get('L1_MAX_ENTRIES', 2000))
+        self._key_locks = [threading.Lock() for _ in range(64)]
+        self._origin = f'{socket.gethostname()}:{id(self)}'
+        self._listener_pid = None
+        self._listener_lock = threading.Lock()
+
+    @property
+    def shared(self):
+        from django.core.cache import caches
+        return caches[self.shared_alias]
+
+    # L1 helpers
+
+    def _local_key(self, key, version):
+        return self.make_and_validate_key(key, version=version)
+
+    def _cacheable(self, key):
+        return self.l1_timeout > 0 and not key.startswith(self.l1_exclude)
+
+    def _l1_ttl(self, value):
+        if isinstance(value, EarlyExpiringValue) and value.expires is not None:
+            return max(0, min(self.l1_timeout, value.expires - time.time()))
+        return self.l1_timeout
+
+    def _read(self, key, version):
+        """Stored value (possibly an EarlyExpiringValue) from L1, else L2"""
+        cacheable = self._cacheable(key)
+        if cacheable:
+            self._ensure_listener()
+            found, value = self.local.get(self._local_key(key, version))
+            if found:
+                CACHE_LOOKUPS.inc(result='l1_hit')
+                return value
+        value = self.shared.get(key, _MISSING, version=version)
+        CACHE_LOOKUPS.inc(result='miss' if value is _MISSING else 'l2_hit')
+        if cacheable and value is not _MISSING:
+            self.local.set(self._local_key(key, version), value, self._l1_ttl(value))
+        return value
+
+    # Invalidation broadcast
+
+    def _redis_client(self):
+        shared = self.shared
+        if isinstance(shared, ResilientRedisCache):
+            if not shared.healthy:
+                return None
+            shared = shared.primary
+        if isinstance(shared, RedisCache):
+            return shared._cache.get_client(write=True)
+        return None
+
+    def _invalidate_keys(self, keys, version):
+        # Keys that never enter L1 (rate-limit counters, written on every request) have nothing to evict
+        local_keys = [self._local_key(key, version) for key in keys if self._cacheable(key)]
+        if local_keys:
+            self._invalidate(*local_keys)
+
+    def _invalidate(self, *local_keys):
+        for local_key in local_keys:
+            self.local.delete(local_key)
+        try:
+            client = self._redis_client()
+            if client is not None:
+                for local_key in local_keys:
+                    client.publish(self.channel, f'{self._origin}|{os.getpid()}|{local_key}')
+        except Exception as e:
+            # Other workers fall back to the L1 timeout
+            logger.debug(f'Cache invalidation broadcast failed: {e}')
+
+    def _ensure_listener(self):
+        if self._listener_pid == os.getpid():
+            return
+        with self._listener_lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+            threading.Thread(target=self._listen, name='cache-invalidation', daemon=True).start()
+
+    def _listen(self):
+        me = f'{self._origin}|{os.getpid()}|'
+        while True:
+            try:
+                client = self._redis_client()
+            except Exception:
+                client = None
+            if client is None:
+                # Not Redis, or failed over: entries expire after L1_TIMEOUT anyway
+                time.sleep(5)
+                continue
+            try:
+                pubsub = client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                while True:
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    data = message['data']
+                    data = data.decode() if isinstance(data, bytes) else data
+                    if data.startswith(me):
+                        continue
+                    local_key = data.split('|', 2)[-1]
+                    if local_key == '*':
+                        self.local.clear()
+                    else:
+                        self.local.delete(local_key)
+            except Exception as e:
+                # Invalidations may have been missed while disconnected
+                self.local.clear()
+                logger.debug(f'Cache invalidation listener reconnecting: {e}')
+                time.sleep(1)
+
+    # Cache API
+
+    def get(self, key, default=None, version=None):
+        value = self._read(key, version)
+        return default if value is _MISSING else _unwrap(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.shared.set(key, value, timeout, version=version)
+        self._invalidate_keys([key], version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.shared.add(key, value, timeout, version=version)
+        if added:
+            self._invalidate_keys([key], version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.shared.touch(key, timeout, version=version)
+
+    def delete(self, key, version=None):
+        deleted = self.shared.delete(key, version=version)
+        self._invalidate_keys([key], version)
+        return deleted
+
+    def get_many(self, keys, version=None):
+        found = {}
+        for key in keys:
+            value = self.get(key, _MISSING, version=version)
+            if value is not _MISSING:
+                found[key] = value
+        return found
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.shared.set_many(data, timeout, version=version)
+        self._invalidate_keys(data, version)
+        return failed
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self.shared.delete_many(keys, version=version)
+        self._invalidate_keys(keys, version)
+
+    def has_key(self, key, version=None):
+        return self._read(key, version) is not _MISSING
+
+    def incr(self, key, delta=1, version=None):
+        value = self.shared.incr(key, delta, version=version)
+        self._invalidate_keys([key], version)
+        return value
+
+    def clear(self):
+        self.shared.clear()
+        self._invalidate('*')
+        self.local.clear()
+
+    def close(self, **kwargs):
+        self.shared.close(**kwargs)
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        stored = self._read(key, version)
+        if stored is not _MISSING:
+            if not isinstance(stored, EarlyExpiringValue):
+                return stored
+            if not stored.should_refresh(self.beta):
+                return stored.value
+
+        local_key = self._local_key(key, version)
+        with self._key_locks[hash(local_key) % len(self._key_locks)]:
+            # Another thread in this worker may have refreshed it meanwhile
+            fresh = self._read(key, version)
+            if fresh is not _MISSING and (
+                stored is _MISSING or not isinstance(fresh, EarlyExpiringValue) or fresh.expires != stored.expires
+            ):
+                return _unwrap(fresh)
+
+            lease = f'{key}:lock'
+            if not self.shared.add(lease, 1, self.lock_timeout, version=version):
+                if stored is not _MISSING:
+                    return stored.value  # another worker is refreshing; keep serving
+                deadline = time.monotonic() + self.lock_wait
+                while time.monotonic() < deadline:
+                    time.sleep(0.05)
+                    value = self.shared.get(key, _MISSING, version=version)
+                    if value is not _MISSING:
+                        return _unwrap(value)
+                # The other worker is slow or died: compute without the lease
+            try:
+                started = time.monotonic()
+                value = default() if callable(default) else default
+                entry = EarlyExpiringValue(value, time.monotonic() - started, self.get_backend_timeout(timeout))
+                self.set(key, entry, timeout, version=version)
+            finally:
+                self.shared.delete(lease, version=version)
+        return value
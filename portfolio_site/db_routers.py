@@ -0,0 +1,73 @@
+"""
+Read-replica routing
+
+Reads go to the replica only while a view listed in REPLICA_READ_VIEWS is
+handling a GET or HEAD request; everything else, and every write, uses the
+primary. After a client sends a POST (or any unsafe method) it gets a short
+lived cookie that pins its following requests to the primary, so users
+read their own writes even with replication lag.
+
+Enabled by setting DATABASE_REPLICA_URL (see settings.py); without it the
+router always answers 'default'.
+"""
+import contextvars
+
+from django.conf import settings
+
+from .asgi_support import InlineMiddlewareMixin
+from .profiling import TimedMiddlewareMixin
+
+_use_replica = contextvars.ContextVar('use_replica', default=False)
+
+STICKY_COOKIE = 'db_primary'
+
+
+def replica_alias():
+    alias = getattr(settings, 'DATABASE_REPLICA_ALIAS', None)
+    return alias if alias and alias in settings.DATABASES else None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            return replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == 'default'
+
+
+class ReplicaRoutingMiddleware(TimedMiddlewareMixin, InlineMiddlewareMixin):
+    """Turns on replica reads for the read-only views and sets the sticky cookie after writes"""
+
+    def process_request(self, request):
+        _use_replica.set(False)
+
+    def process_response(self, request, response):
+        _use_replica.set(False)
+        if request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE') and replica_alias():
+            response.set_cookie(
+                STICKY_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_STICKY_SECONDS', 10),
+                secure=settings.SESSION_COOKIE_SECURE,
+                httponly=True,
+                samesite='Lax',
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if (
+            request.method in ('GET', 'HEAD')
+            and STICKY_COOKIE not in request.COOKIES
+            and request.resolver_match.view_name in getattr(settings, 'REPLICA_READ_VIEWS', ())
+            and replica_alias()
+        ):
+            _use_replica.set(True)
+        return None
@@ -0,0 +1,160 @@
+"""
+Non-blocking logging pipeline
+
+Each configured handler is a QueueingHandler: the request thread only puts
+the record on a bounded in-memory queue, and a QueueListener thread per
+handler formats it and writes it to the real (file or stream) handler. When a queue is full the record is dropped rather than stalling
+the request, and counted; see dropped_records().
+
+The listener thread is started lazily on the first record in each process,
+so a gunicorn master that logs before forking does not hand workers a dead
+thread. Configure through settings.LOGGING:
+
+    'file': {
+        'class': 'portfolio_site.log_pipeline.QueueingHandler',
+        'sink': {'class': 'logging.handlers.WatchedFileHandler', 'filename': ...},
+        'formatter': 'json',
+    }
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+import weakref
+from datetime import datetime, timezone
+
+from django.utils.module_loading import import_string
+
+QUEUE_SIZE = 10000
+
+_dropped_lock = threading.Lock()
+_dropped = {}
+
+_handlers_lock = threading.Lock()
+_handlers = weakref.WeakSet()
+
+
+def dropped_records():
+    """Return {handler name: records dropped because its queue was full} for this process"""
+    with _dropped_lock:
+        return dict(_dropped)
+
+
+def queue_depths():
+    """Return {handler name: records waiting to be written} for this process"""
+    with _handlers_lock:
+        handlers = list(_handlers)
+    return {
+        handler.name or 'unnamed': handler.queue.qsize()
+        for handler in handlers
+        if handler._pid == os.getpid()
+    }
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for log shippers"""
+
+    def format(self, record):
+        data = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'module': record.module,
+            'process': record.process,
+            'thread': record.thread,
+            'message': record.getMessage(),
+        }
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data['exc_info'] = record.exc_text
+        if record.stack_info:
+            data['stack_info'] = self.formatStack(record.stack_info)
+        return json.dumps(data, default=str)
+
+
+class _Listener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # The queue may be full at shutdown; wait briefly for room instead of failing
+        try:
+            self.queue.put(self._sentinel, timeout=1)
+        except queue.Full:
+            pass
+
+
+class QueueingHandler(logging.Handler):
+    """Hands records to a background thread that writes them to ``sink``"""
+
+    def __init__(self, sink, queue_size=QUEUE_SIZE, level=logging.NOTSET):
+        super().__init__(level)
+        sink = dict(sink)
+        sink_class = sink.pop('class')
+        if isinstance(sink_class, str):
+            sink_class = import_string(sink_class)
+        if issubclass(sink_class, logging.FileHandler):
+            # Open the file in the listener thread, on first write
+            sink.setdefault('delay', True)
+            filename = sink.get('filename')
+            if filename:
+                os.makedirs(os.path.dirname(os.fspath(filename)), exist_ok=True)
+        self.sink = sink_class(**sink)
+        self.queue_size = queue_size
+        self.queue = None
+        self._listener = None
+        self._pid = None
+        self._lock_start = threading.Lock()
+        with _handlers_lock:
+            _handlers.add(self)
+
+    def setFormatter(self, fmt):
+        # Formatting happens in the listener thread
+        self.sink.setFormatter(fmt)
+
+    def _ensure_listener(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock_start:
+            if self._pid == os.getpid():
+                return
+            # New process (or first use): the parent's queue and thread are not usable here
+            self.queue = queue.Queue(self.queue_size)
+            self._listener = _Listener(self.queue, self.sink, respect_handler_level=True)
+            self._listener.start()
+            self._pid = os.getpid()
+
+    def prepare(self, record):
+        """Make the record safe to hand to another thread without formatting it"""
+        record = logging.makeLogRecord(record.__dict__)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def emit(self, record):
+        try:
+            self._ensure_listener()
+            self.queue.put_nowait(self.prepare(record))
+        except queue.Full:
+            with _dropped_lock:
+                _dropped[self.name or 'unnamed'] = _dropped.get(self.name or 'unnamed', 0) + 1
+        except Exception:
+            self.handleError(record)
+
+    def flush(self):
+        """Wait until the queued records are written (logging.shutdown calls this at exit)"""
+        if self._pid == os.getpid():
+            self.queue.join()
+        self.sink.flush()
+
+    def close(self):
+        with self._lock_start:
+            if self._pid == os.getpid():
+                self._listener.stop()
+            self._listener = None
+            self._pid = None
+        self.sink.close()
+        super().close()
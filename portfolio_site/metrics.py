@@ -0,0 +1,449 @@
+"""
+Prometheus metrics shared across gunicorn workers
+
+Counters, histograms and gauges live in memory in each process and are
+written to METRICS_DIR/<pid>.json every METRICS_FLUSH_INTERVAL seconds by
+a lazily started, pid-aware background thread, so the request path never
+touches the disk. A scrape of /metrics (any worker) flushes its own process,
+then adds up the files of every worker:
+
+- counters and histograms are summed, including those of workers that have
+  exited (their files are folded into archive.json so counters never go
+  backwards when gunicorn recycles a worker);
+- per-process gauges (queue depths) are summed over live workers only;
+- database-wide gauges (outbox depth) are computed once, at scrape time.
+
+Without METRICS_DIR (development, tests) each process only reports itself.
+The endpoint answers requests carrying `Authorization: Bearer
+<METRICS_TOKEN>`, or, when no token is configured, requests from
+METRICS_ALLOWED_IPS; everyone else gets a 404.
+"""
+import contextvars
+import fcntl
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger('portfolio_site')
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+ARCHIVE = 'archive.json'
+
+_lock = threading.RLock()
+_registry = {}
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(pairs):
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _number(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.values = {}
+        with _lock:
+            _registry[name] = self
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f'{self.name} takes labels {self.labels}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def snapshot(self):
+        with _lock:
+            return [[list(key), value] for key, value in self.values.items()]
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def merge(self, total, key, value):
+        total[key] = total.get(key, 0) + value
+
+    def samples(self, key, value):
+        yield self.name, list(zip(self.labels, key)), value
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with _lock:
+            counts = self.values.get(key)
+            if counts is None:
+                # One count per bucket (non-cumulative), then +Inf, then the sum
+                counts = self.values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    def snapshot(self):
+        with _lock:
+            return [[list(key), list(value)] for key, value in self.values.items()]
+
+    def merge(self, total, key, value):
+        current = total.get(key)
+        total[key] = value if current is None else [a + b for a, b in zip(current, value)]
+
+    def samples(self, key, value):
+        labels = list(zip(self.labels, key))
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), value[:-1]):
+            cumulative += count
+            yield f'{self.name}_bucket', labels + [('le', _number(bound))], cumulative
+        yield f'{self.name}_sum', labels, value[-1]
+        yield f'{self.name}_count', labels, cumulative
+
+
+class Gauge(Metric):
+    """
+    A gauge read from ``collect()`` -> {label values tuple: value}.
+
+    Per-process gauges are collected when the process flushes and summed
+    over live workers; ``scrape_only`` gauges (database-wide figures) are
+    collected once by the worker answering the scrape.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), collect=None, scrape_only=False):
+        super().__init__(name, documentation, labels)
+        self.collect = collect
+        self.scrape_only = scrape_only
+
+    def snapshot(self):
+        if self.scrape_only or self.collect is None:
+            return []
+        try:
+            return [[list(key), value] for key, value in self.collect().items()]
+        except Exception as e:
+            logger.warning(f'Metric {self.name} could not be collected: {e}')
+            return []
+
+    merge = Counter.merge
+    samples = Counter.samples
+
+
+# ---------------------------------------------------------------------------
+# Multiprocess store
+# ---------------------------------------------------------------------------
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', None)
+
+
+def snapshot():
+    """This process's values: {metric name: [[label values, value], ...]}"""
+    with _lock:
+        metrics = list(_registry.values())
+    return {metric.name: metric.snapshot() for metric in metrics}
+
+
+def _write_json(path, data):
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'w') as f:
+        json.dump(data, f)
+    os.replace(temporary, path)
+
+
+def flush():
+    """Write this process's values to METRICS_DIR/<pid>.json"""
+    directory = metrics_dir()
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    _write_json(os.path.join(directory, f'{os.getpid()}.json'), {'pid': os.getpid(), 'metrics': snapshot()})
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _merge_into(totals, metrics, include_gauges):
+    for name, entries in metrics.items():
+        metric = _registry.get(name)
+        if metric is None or (metric.kind == 'gauge' and not include_gauges):
+            continue
+        bucket = totals.setdefault(name, {})
+        for key, value in entries:
+            metric.merge(bucket, tuple(key), value)
+
+
+def _fold_dead_workers(directory):
+    """Add the counters of exited workers to archive.json and remove their files"""
+    with open(os.path.join(directory, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        archive_path = os.path.join(directory, ARCHIVE)
+        archive = {}
+        _merge_into(archive, (_read_json(archive_path) or {}).get('metrics', {}), include_gauges=False)
+        folded = []
+        for entry in os.listdir(directory):
+            if not entry.endswith('.json') or entry == ARCHIVE:
+                continue
+            pid = int(entry[:-5]) if entry[:-5].isdigit() else None
+            if pid is None or pid == os.getpid() or _alive(pid):
+                continue
+            data = _read_json(os.path.join(directory, entry))
+            if data:
+                _merge_into(archive, data.get('metrics', {}), include_gauges=False)
+            folded.append(entry)
+        if folded:
+            _write_json(archive_path, {'metrics': {
+                name: [[list(key), value] for key, value in values.items()] for name, values in archive.items()
+            }})
+            for entry in folded:
+                os.remove(os.path.join(directory, entry))
+
+
+def collect_all():
+    """{metric name: {label values tuple: value}} over every worker"""
+    directory = metrics_dir()
+    totals = {}
+    if directory:
+        flush()
+        _fold_dead_workers(directory)
+        for entry in sorted(os.listdir(directory)):
+            if entry.endswith('.json'):
+                data = _read_json(os.path.join(directory, entry))
+                if data:
+                    _merge_into(totals, data.get('metrics', {}), include_gauges=entry != ARCHIVE)
+    else:
+        _merge_into(totals, snapshot(), include_gauges=True)
+
+    for metric in list(_registry.values()):
+        if metric.kind == 'gauge' and metric.scrape_only and metric.collect is not None:
+            try:
+                totals[metric.name] = metric.collect()
+            except Exception as e:
+                logger.warning(f'Metric {metric.name} could not be collected: {e}')
+    return totals
+
+
+def render():
+    """The Prometheus text exposition of every metric"""
+    totals = collect_all()
+    lines = []
+    for name, metric in sorted(_registry.items()):
+        lines.append(f'# HELP {name} {metric.documentation}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for key, value in sorted(totals.get(name, {}).items()):
+            for sample, labels, number in metric.samples(key, value):
+                lines.append(f'{sample}{_format_labels(labels)} {_number(number)}')
+    return '\n'.join(lines) + '\n'
+
+
+class _Flusher:
+    """Background thread writing this process's values; restarted after fork"""
+
+    def __init__(self):
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def ensure_started(self):
+        if self._pid == os.getpid() or not metrics_dir():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            threading.Thread(target=self._run, name='metrics-flush', daemon=True).start()
+            self._pid = os.getpid()
+
+    def _run(self):
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        while True:
+            time.sleep(interval)
+            try:
+                flush()
+            except Exception as e:
+                logger.warning(f'Could not write metrics: {e}')
+
+
+_flusher = _Flusher()
+
+
+# ---------------------------------------------------------------------------
+# Metrics
+# ---------------------------------------------------------------------------
+
+def _outbox_depth():
+    from django.db.models import Count
+    from main.models import OutboundEmail
+
+    depth = {('pending',): 0, ('failed',): 0}
+    rows = OutboundEmail.objects.exclude(status='sent').values_list('status').annotate(total=Count('id'))
+    for status, total in rows.order_by():
+        depth[(status,)] = total
+    return depth
+
+
+def _log_queue_depth():
+    from .log_pipeline import queue_depths
+    return {(name,): depth for name, depth in queue_depths().items()}
+
+
+def _log_records_dropped():
+    from .log_pipeline import dropped_records
+    return {(name,): count for name, count in dropped_records().items()}
+
+
+# Any other method token a client sends is counted as OTHER, so it cannot add series
+HTTP_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS', 'CONNECT', 'TRACE'))
+
+REQUEST_LATENCY = Histogram(
+    'http_request_duration_seconds', 'Time to produce a response, by route', ('route', 'method', 'status'),
+)
+REQUEST_QUERIES = Histogram(
+    'http_request_db_queries', 'Database queries per request, by route', ('route',), buckets=QUERY_BUCKETS,
+)
+RATE_LIMIT_DECISIONS = Counter(
+    'rate_limit_decisions_total', 'RateLimitMiddleware decisions', ('scope', 'decision'),
+)
+SECURITY_EVENTS = Counter(
+    'security_events_total', 'Security events recorded (rule hits, logins, scans)', ('event_type', 'severity'),
+)
+CACHE_LOOKUPS = Counter(
+    'cache_lookups_total', 'Tiered cache reads by where they were answered', ('result',),
+)
+OUTBOX_DEPTH = Gauge(
+    'email_outbox_messages', 'Outbound emails not yet sent', ('status',), collect=_outbox_depth, scrape_only=True,
+)
+LOG_QUEUE_DEPTH = Gauge(
+    'log_queue_depth', 'Records waiting in the non-blocking log pipeline', ('handler',), collect=_log_queue_depth,
+)
+LOG_RECORDS_DROPPED = Gauge(
+    'log_records_dropped', 'Log records dropped because the queue was full (live workers)', ('handler',),
+    collect=_log_records_dropped,
+)
+
+
+# ---------------------------------------------------------------------------
+# Django glue
+# ---------------------------------------------------------------------------
+
+_request_queries = contextvars.ContextVar('request_queries', default=None)
+
+
+def _count_query(execute, sql, params, many, context):
+    queries = _request_queries.get()
+    if queries is not None:
+        queries[0] += 1
+    return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """Records latency and query count for every request"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from .profiling import install_query_hook
+
+        if not getattr(settings, 'METRICS_ENABLED', True):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        install_query_hook(_count_query)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        _flusher.ensure_started()
+        queries = [0]
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self._observe(request, response, time.perf_counter() - start, queries[0])
+        return response
+
+    async def __acall__(self, request):
+        _flusher.ensure_started()
+        queries = [0]
+        token = _request_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self._observe(request, response, time.perf_counter() - start, queries[0])
+        return response
+
+    def _observe(self, request, response, elapsed, queries):
+        match = getattr(request, 'resolver_match', None)
+        # Unmatched paths (mostly scanners) share one label to bound cardinality
+        route = match.route if match is not None else '<unmatched>'
+        method = request.method if request.method in HTTP_METHODS else 'OTHER'
+        REQUEST_LATENCY.observe(elapsed, route=route, method=method, status=f'{response.status_code // 100}xx')
+        REQUEST_QUERIES.observe(queries, route=route)
+
+
+def _authorized(request):
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        from django.utils.crypto import constant_time_compare
+        return constant_time_compare(request.META.get('HTTP_AUTHORIZATION', ''), f'Bearer {token}')
+    # Behind a reverse proxy on the same host every client's socket peer is 127.0.0.1,
+    # so a proxied request never counts as local; scrapers talk to the worker directly
+    if 'HTTP_X_FORWARDED_FOR' in request.META or 'HTTP_X_REAL_IP' in request.META:
+        return False
+    return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ('127.0.0.1', '::1'))
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    if not getattr(settings, 'METRICS_ENABLED', True) or not _authorized(request):
+        raise Http404
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
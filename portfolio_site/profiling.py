@@ -0,0 +1,472 @@
+"""
+Opt-in per-request instrumentation
+
+With PROFILING_ENABLED set, ProfilingMiddleware (first in MIDDLEWARE)
+measures for every request:
+
+- database queries, count and time, on every connection
+- cache calls, hits, misses and time, on every configured cache
+- template rendering time
+- the time spent in each of our own middlewares (TimedMiddlewareMixin)
+
+and returns them in a Server-Timing header, which browser dev tools show
+next to the network timings. A PROFILING_SAMPLE_RATE share of requests is
+also logged as one JSON line on the 'portfolio_site.profiling' logger.
+None of this depends on DEBUG.
+
+Staff can profile a single request with cProfile (or pyinstrument, when
+installed) by sending a token from `python manage.py profiling_token` in
+the X-Profile header. Profiles are written to PROFILING_DIR.
+
+When PROFILING_ENABLED is off the middleware removes itself at startup
+(MiddlewareNotUsed) and the hooks below are never installed. Everything
+works the same under ASGI: the metrics live in a context variable, which
+follows a request into the threads its sync code runs in.
+"""
+import contextvars
+import cProfile
+import json
+import logging
+import os
+import random
+import threading
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core import signing
+from django.core.exceptions import MiddlewareNotUsed
+
+logger = logging.getLogger('portfolio_site.profiling')
+
+PROFILE_HEADER = 'HTTP_X_PROFILE'
+TOKEN_SALT = 'portfolio_site.profiling'
+TOKEN_MAX_AGE = 60 * 60
+ENGINES = ('cprofile', 'pyinstrument')
+
+CACHE_METHODS = ('get', 'get_many', 'get_or_set', 'set', 'set_many', 'add', 'delete', 'delete_many', 'incr', 'touch')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+_MISSING = object()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        self.cache_calls = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.cache_time = 0.0
+        self.template_time = 0.0
+        self.middleware = {}
+        # Nesting guards: only the outermost cache call / template render is timed
+        self.cache_depth = 0
+        self.template_depth = 0
+        # Time spent below each TimedMiddlewareMixin in progress, innermost last
+        self.inner_time = []
+
+    def as_dict(self):
+        return {
+            'total_ms': round((time.perf_counter() - self.started) * 1000, 2),
+            'db_queries': self.db_queries,
+            'db_ms': round(self.db_time * 1000, 2),
+            'cache_calls': self.cache_calls,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses,
+            'cache_ms': round(self.cache_time * 1000, 2),
+            'template_ms': round(self.template_time * 1000, 2),
+            'middleware_ms': {name: round(seconds * 1000, 2) for name, seconds in self.middleware.items()},
+        }
+
+    def server_timing(self):
+        data = self.as_dict()
+        entries = [
+            f'db;dur={data["db_ms"]};desc="{data["db_queries"]} queries"',
+            f'cache;dur={data["cache_ms"]};desc="{data["cache_hits"]} hits, {data["cache_misses"]} misses"',
+            f'tpl;dur={data["template_ms"]};desc="templates"',
+        ]
+        for name, milliseconds in data['middleware_ms'].items():
+            entries.append(f'mw-{name};dur={milliseconds}')
+        entries.append(f'total;dur={data["total_ms"]}')
+        return ', '.join(entries)
+
+
+def current_metrics():
+    """The RequestMetrics of the request being handled, or None"""
+    return _current.get()
+
+
+# ---------------------------------------------------------------------------
+# Hooks
+# ---------------------------------------------------------------------------
+
+_query_hooks = []
+_query_hooks_lock = threading.Lock()
+
+
+def _install_query_hooks(**kwargs):
+    from django.db import connections
+
+    for connection in connections.all():
+        for hook in _query_hooks:
+            if hook not in connection.execute_wrappers:
+                connection.execute_wrappers.append(hook)
+
+
+def install_query_hook(hook):
+    """
+    Wrap every query with ``hook`` (a connection.execute_wrapper) from now on.
+    Under ASGI a request's queries run in a worker thread, out of reach of a
+    wrapper installed around the request, so hooks stay on the connections
+    of every thread that handles requests (request_started runs there) and
+    must do nothing outside a measured request.
+    """
+    from django.core.signals import request_started
+
+    with _query_hooks_lock:
+        if hook not in _query_hooks:
+            _query_hooks.append(hook)
+        request_started.connect(_install_query_hooks, dispatch_uid='portfolio_site.profiling.query_hooks')
+    _install_query_hooks()
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if metrics is not None:
+            metrics.db_queries += 1
+            metrics.db_time += time.perf_counter() - start
+
+
+def _timed_cache_method(name, method):
+    def wrapper(*args, **kwargs):
+        metrics = _current.get()
+        if metrics is None or metrics.cache_depth:
+            # Not profiling, or called from inside another cache call (TieredCache -> shared)
+            return method(*args, **kwargs)
+        metrics.cache_depth += 1
+        start = time.perf_counter()
+        try:
+            if name == 'get':
+                return _counted_get(metrics, method, *args, **kwargs)
+            if name == 'get_many':
+                result = method(*args, **kwargs)
+                requested = len(args[0]) if args else len(kwargs.get('keys', ()))
+                metrics.cache_hits += len(result)
+                metrics.cache_misses += requested - len(result)
+                return result
+            if name == 'get_or_set':
+                return _counted_get_or_set(metrics, method, *args, **kwargs)
+            return method(*args, **kwargs)
+        finally:
+            metrics.cache_depth -= 1
+            metrics.cache_calls += 1
+            metrics.cache_time += time.perf_counter() - start
+    return wrapper
+
+
+def _counted_get(metrics, method, key, default=None, version=None):
+    value = method(key, _MISSING, version=version)
+    if value is _MISSING:
+        metrics.cache_misses += 1
+        return default
+    metrics.cache_hits += 1
+    return value
+
+
+def _counted_get_or_set(metrics, method, key, default=None, *args, **kwargs):
+    computed = []
+
+    def produce():
+        computed.append(True)
+        return default() if callable(default) else default
+
+    value = method(key, produce, *args, **kwargs)
+    if computed:
+        metrics.cache_misses += 1
+    else:
+        metrics.cache_hits += 1
+    return value
+
+
+def instrument_caches(stack):
+    """Wrap the cache instances of this thread (or event loop) until ``stack`` closes"""
+    from django.core.cache import caches
+
+    for alias in settings.CACHES:
+        backend = caches[alias]
+        # Requests in flight on the same instance (concurrent ASGI requests, or the
+        # test client inside a view) share the wrappers; the last one removes them
+        users = backend.__dict__.get('_profiling_users', 0)
+        if not users:
+            for name in CACHE_METHODS:
+                setattr(backend, name, _timed_cache_method(name, getattr(backend, name)))
+        backend._profiling_users = users + 1
+        stack.callback(_release_cache, backend)
+
+
+def _release_cache(backend):
+    backend._profiling_users -= 1
+    if not backend._profiling_users:
+        for name in CACHE_METHODS:
+            backend.__dict__.pop(name, None)
+        del backend._profiling_users
+
+
+_template_hook_lock = threading.Lock()
+_template_hook_installed = False
+
+
+def install_template_hook():
+    """Time Template.render (once per process); a no-op outside profiled requests"""
+    global _template_hook_installed
+    from django.template.base import Template
+
+    with _template_hook_lock:
+        if _template_hook_installed:
+            return
+        original = Template.render
+
+        def render(self, context):
+            metrics = _current.get()
+            if metrics is None or metrics.template_depth:
+                return original(self, context)
+            metrics.template_depth += 1
+            start = time.perf_counter()
+            try:
+                return original(self, context)
+            finally:
+                metrics.template_depth -= 1
+                metrics.template_time += time.perf_counter() - start
+
+        Template.render = render
+        _template_hook_installed = True
+
+
+class TimedMiddlewareMixin:
+    """
+    Records the time a middleware spends itself, excluding the layers below
+    it, under its class name. Costs one context variable lookup per request
+    when profiling is off.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        inner = self.get_response
+        if iscoroutinefunction(inner):
+            async def timed_inner(request):
+                start, metrics = time.perf_counter(), _current.get()
+                try:
+                    return await inner(request)
+                finally:
+                    if metrics is not None and metrics.inner_time:
+                        metrics.inner_time[-1] += time.perf_counter() - start
+            markcoroutinefunction(timed_inner)
+        else:
+            def timed_inner(request):
+                start, metrics = time.perf_counter(), _current.get()
+                try:
+                    return inner(request)
+                finally:
+                    if metrics is not None and metrics.inner_time:
+                        metrics.inner_time[-1] += time.perf_counter() - start
+        self.get_response = timed_inner
+
+    def __call__(self, request):
+        metrics = _current.get()
+        if metrics is None:
+            return super().__call__(request)
+        if iscoroutinefunction(self):
+            return self._timed_acall(request, metrics)
+        metrics.inner_time.append(0.0)
+        start = time.perf_counter()
+        try:
+            return super().__call__(request)
+        finally:
+            self._record_own_time(metrics, start)
+
+    async def _timed_acall(self, request, metrics):
+        metrics.inner_time.append(0.0)
+        start = time.perf_counter()
+        try:
+            return await super().__call__(request)
+        finally:
+            self._record_own_time(metrics, start)
+
+    def _record_own_time(self, metrics, start):
+        inner = metrics.inner_time.pop()
+        name = type(self).__name__.removesuffix('Middleware')
+        metrics.middleware[name] = metrics.middleware.get(name, 0.0) + time.perf_counter() - start - inner
+
+
+# ---------------------------------------------------------------------------
+# Per-request profiler
+# ---------------------------------------------------------------------------
+
+def make_profiling_token(user, engine='cprofile'):
+    """Signed X-Profile header value for a staff user"""
+    if engine not in ENGINES:
+        raise ValueError(f'Unknown profiler {engine!r}; choose from {", ".join(ENGINES)}')
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(f'{user.pk}:{engine}')
+
+
+def profiler_for(request):
+    """The engine requested by a valid, unexpired staff token in X-Profile, or None"""
+    from django.contrib.auth.models import User
+
+    token = request.META.get(PROFILE_HEADER)
+    if not token:
+        return None
+    try:
+        value = signing.TimestampSigner(salt=TOKEN_SALT).unsign(
+            token, max_age=getattr(settings, 'PROFILING_TOKEN_MAX_AGE', TOKEN_MAX_AGE)
+        )
+        user_id, engine = value.split(':', 1)
+    except (signing.BadSignature, ValueError):
+        logger.warning(f'Rejected profiling token for {request.path}')
+        return None
+    if engine not in ENGINES or not User.objects.filter(pk=user_id, is_staff=True, is_active=True).exists():
+        return None
+    return engine
+
+
+def _profile_path(request, extension):
+    directory = getattr(settings, 'PROFILING_DIR', os.path.join(settings.BASE_DIR, 'logs', 'profiles'))
+    os.makedirs(directory, exist_ok=True)
+    slug = request.path.strip('/').replace('/', '_') or 'root'
+    return os.path.join(directory, f'{datetime.now(timezone.utc):%Y%m%dT%H%M%S%f}-{request.method}-{slug[:80]}.{extension}')
+
+
+async def arun_profiled(engine, request, get_response):
+    """
+    run_profiled for an async middleware chain. cProfile only sees the event
+    loop thread, including other requests interleaved with this one;
+    pyinstrument follows the request's own awaits.
+    """
+    if engine == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning('pyinstrument is not installed; profiling with cProfile instead')
+        else:
+            profiler = Profiler(async_mode='enabled')
+            profiler.start()
+            try:
+                response = await get_response(request)
+            finally:
+                profiler.stop()
+            path = _profile_path(request, 'html')
+            with open(path, 'w') as f:
+                f.write(profiler.output_html())
+            return response, path
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        response = await get_response(request)
+    finally:
+        profiler.disable()
+        path = _profile_path(request, 'prof')
+        profiler.dump_stats(path)
+    return response, path
+
+
+def run_profiled(engine, request, get_response):
+    """Handle the request under ``engine``; returns (response, profile file)"""
+    if engine == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            logger.warning('pyinstrument is not installed; profiling with cProfile instead')
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                response = get_response(request)
+            finally:
+                profiler.stop()
+            path = _profile_path(request, 'html')
+            with open(path, 'w') as f:
+                f.write(profiler.output_html())
+            return response, path
+
+    profiler = cProfile.Profile()
+    try:
+        response = profiler.runcall(get_response, request)
+    finally:
+        path = _profile_path(request, 'prof')
+        profiler.dump_stats(path)
+    return response, path
+
+
+class ProfilingMiddleware:
+    """Collects RequestMetrics for each request; see the module docstring"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        install_template_hook()
+        install_query_hook(_record_query)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        profile = None
+        try:
+            with ExitStack() as stack:
+                instrument_caches(stack)
+                engine = profiler_for(request)
+                if engine:
+                    response, profile = run_profiled(engine, request, self.get_response)
+                else:
+                    response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, profile)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        profile = None
+        try:
+            with ExitStack() as stack:
+                instrument_caches(stack)
+                # Checking the token reads the user, so only for requests that send one
+                engine = await sync_to_async(profiler_for)(request) if request.META.get(PROFILE_HEADER) else None
+                if engine:
+                    response, profile = await arun_profiled(engine, request, self.get_response)
+                else:
+                    response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, metrics, profile)
+
+    def _finish(self, request, response, metrics, profile):
+        if getattr(settings, 'PROFILING_SERVER_TIMING', True):
+            response['Server-Timing'] = metrics.server_timing()
+        if profile:
+            response['X-Profile-File'] = os.path.basename(profile)
+            logger.info(f'Profiled {request.method} {request.path} to {profile}')
+        if profile or random.random() < getattr(settings, 'PROFILING_SAMPLE_RATE', 0.01):
+            logger.info(json.dumps({
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                **metrics.as_dict(),
+            }))
+        return response
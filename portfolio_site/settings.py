@@ -82,14 +82,21 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.sitemaps',
     'main',
     'portfolio',
     'blog',
 ]
 
+# Set by asgi.py: serving over ASGI (uvicorn workers), where the I/O-bound
+# endpoints use their async views (see portfolio_site/asgi_support.py)
+ASGI_MODE = os.getenv('DJANGO_ASGI_MODE', 'False').lower() in ('true', '1', 'yes')
+
 MIDDLEWARE = [
+    'portfolio_site.profiling.ProfilingMiddleware',  # Server-Timing metrics (only when PROFILING_ENABLED)
+    'portfolio_site.metrics.MetricsMiddleware',  # Prometheus request latency and query counts
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Static files serving
+    'portfolio_site.asgi_support.WhiteNoiseMiddleware',  # Static files serving (WhiteNoise, async-capable)
     'main.middleware.SecurityHeadersMiddleware',  # Custom security headers
     'main.middleware.RateLimitMiddleware',  # Rate limiting
     'main.middleware.SecurityLoggingMiddleware',  # Security logging
@@ -98,10 +105,38 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'main.middleware.SessionRefreshMiddleware',  # Sliding expiry for logged-in sessions
+    'portfolio_site.db_routers.ReplicaRoutingMiddleware',  # Replica reads for read-only views
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Request profiling (see portfolio_site/profiling.py): DB, cache, template and
+# middleware timings in a Server-Timing header, a sampled share logged as JSON,
+# and per-request cProfile for staff holding a `manage.py profiling_token` token.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() in ('true', '1', 'yes')
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', '0.01'))
+PROFILING_SERVER_TIMING = os.getenv('PROFILING_SERVER_TIMING', 'True').lower() in ('true', '1', 'yes')
+PROFILING_TOKEN_MAX_AGE = 60 * 60  # 1 hour
+PROFILING_DIR = BASE_DIR / 'logs' / 'profiles'
+
+# Prometheus metrics at /metrics (see portfolio_site/metrics.py). Workers share
+# their counters through files in METRICS_DIR, which gunicorn.conf.py sets and
+# empties at startup; without it each worker only reports itself. Scrapes need
+# METRICS_TOKEN as a bearer token, or without a token must come from
+# METRICS_ALLOWED_IPS directly (requests forwarded by a proxy are refused).
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True').lower() in ('true', '1', 'yes')
+METRICS_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR') or None
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = ('127.0.0.1', '::1')
+METRICS_FLUSH_INTERVAL = 5  # seconds
+
+# Health probes (see main/health.py): /health/live/ does no I/O; /health/ready/
+# reads database, cache and storage results refreshed in the background every
+# HEALTH_CHECK_INTERVAL seconds, treating results older than HEALTH_CHECK_TTL as failed.
+HEALTH_CHECK_INTERVAL = int(os.getenv('HEALTH_CHECK_INTERVAL', '10'))
+HEALTH_CHECK_TTL = int(os.getenv('HEALTH_CHECK_TTL', '30'))
+
 ROOT_URLCONF = 'portfolio_site.urls'
 
 TEMPLATES = [
@@ -146,8 +181,50 @@ if DATABASE_URL:
     # Parse the database URL for production
     DATABASES['default'] = dj_database_url.parse(DATABASE_URL)
     
-    # Connection pool settings for production (PostgreSQL specific)
-    DATABASES['default']['CONN_MAX_AGE'] = 60
+    # Connection pooling (PostgreSQL). DB_POOL=True uses Django's native pool, which
+    # needs psycopg 3 with the pool extra (pip install "psycopg[binary,pool]");
+    # otherwise connections are kept for CONN_MAX_AGE and health-checked before reuse.
+    DB_POOL = os.getenv('DB_POOL', 'False').lower() in ('true', '1', 'yes')
+    if DB_POOL and 'postgresql' in DATABASES['default']['ENGINE']:
+        try:
+            from psycopg_pool import ConnectionPool
+        except ImportError:
+            print("⚠️  WARNING: DB_POOL is set but psycopg_pool is not installed; using persistent connections.")
+            DB_POOL = False
+        else:
+            DATABASES['default']['CONN_MAX_AGE'] = 0  # required with the native pool
+            DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+                'min_size': int(os.getenv('DB_POOL_MIN_SIZE', '2')),
+                'max_size': int(os.getenv('DB_POOL_MAX_SIZE', '10')),
+                'timeout': int(os.getenv('DB_POOL_TIMEOUT', '10')),
+                # Validate a connection before handing it out
+                'check': ConnectionPool.check_connection,
+            }
+    if not DB_POOL:
+        DATABASES['default']['CONN_MAX_AGE'] = 60
+        DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+
+# Optional read replica: read-only views (REPLICA_READ_VIEWS) read from it, everything
+# else uses the primary (see portfolio_site/db_routers.py). For local testing two
+# SQLite files work, e.g. DATABASE_REPLICA_URL=sqlite:///db-replica.sqlite3
+DATABASE_REPLICA_URL = os.getenv('DATABASE_REPLICA_URL')
+DATABASE_REPLICA_ALIAS = None
+if DATABASE_REPLICA_URL:
+    DATABASE_REPLICA_ALIAS = 'replica'
+    DATABASES['replica'] = dj_database_url.parse(DATABASE_REPLICA_URL)
+    DATABASES['replica']['CONN_MAX_AGE'] = 60
+    DATABASES['replica']['CONN_HEALTH_CHECKS'] = True
+    # Tests run against the primary's test database only
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['portfolio_site.db_routers.ReplicaRouter']
+REPLICA_READ_VIEWS = (
+    'blog:blog_list',
+    'portfolio:portfolio_list',
+    'main:resume',
+    'main:download_resume',
+)
+REPLICA_STICKY_SECONDS = 10  # reads pinned to the primary after a POST
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -222,6 +299,16 @@ else:
     MEDIA_URL = '/media/'
     MEDIA_ROOT = BASE_DIR / 'media'
 
+# File delivery offload
+# Set SENDFILE_BACKEND=x-accel when running behind the nginx frontend in
+# config/nginx so file bodies are sent by nginx instead of a gunicorn worker.
+SENDFILE_BACKEND = os.getenv('SENDFILE_BACKEND', '').lower()
+SENDFILE_ROOT = os.getenv('SENDFILE_ROOT', str(BASE_DIR / 'media'))
+SENDFILE_URL = os.getenv('SENDFILE_URL', '/protected-media/')
+
+# Generated resume PDFs (kept under SENDFILE_ROOT so they can be offloaded too)
+RESUME_PDF_DIR = os.getenv('RESUME_PDF_DIR', str(BASE_DIR / 'media' / 'resume_cache'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -238,6 +325,53 @@ if not DEBUG:
     EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True').lower() in ('true', '1', 'yes')
     EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
     EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
+    EMAIL_TIMEOUT = int(os.getenv('EMAIL_TIMEOUT', '30'))
+
+# Contact form notifications go to this address (skipped when empty)
+CONTACT_EMAIL = os.getenv('CONTACT_EMAIL', '')
+
+# Email outbox: views only insert rows, delivery happens in the background.
+# 'thread' drains the outbox in each web process, from the time it boots; set
+# to 'command' when a separate `python manage.py send_outbox --loop` worker is
+# running. On SQLite run a single sender: concurrent ones may send twice.
+OUTBOX_WORKER = os.getenv('OUTBOX_WORKER', 'thread')
+OUTBOX_BATCH_SIZE = int(os.getenv('OUTBOX_BATCH_SIZE', '20'))
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '5'))
+OUTBOX_RETRY_BASE_DELAY = 60  # seconds, doubled on every retry
+OUTBOX_RETRY_MAX_DELAY = 6 * 60 * 60  # 6 hours
+OUTBOX_POLL_INTERVAL = 30  # seconds between checks for due retries
+
+# Contact form spam scoring (see main/spam.py)
+SPAM_FLAG_SCORE = 30  # stored with is_spam=True, not emailed
+SPAM_REJECT_SCORE = 80  # dropped before any database write
+SPAM_REPEAT_SENDER_SCORE = 30  # added when the IP/email recently sent spam
+SPAM_DEDUP_WINDOW = 24 * 60 * 60  # identical messages dropped for 24 hours
+
+# Security dashboard: run the incremental rollup aggregator at most this often
+ROLLUP_REFRESH_SECONDS = 30
+# Rows newer than this are left for the next scan, so rows whose transactions
+# commit out of id order are not skipped; must exceed the longest write transaction
+ROLLUP_SCAN_LAG = int(os.getenv('ROLLUP_SCAN_LAG', '30'))
+# Live dashboard (Server-Sent Events): metric push interval and keepalive
+SSE_METRICS_INTERVAL = int(os.getenv('SSE_METRICS_INTERVAL', '5'))
+SSE_KEEPALIVE_SECONDS = 15
+
+# Data retention (see main/retention.py): days to keep rows, None keeps them forever.
+# Expired rows are archived to gzip JSONL under RETENTION_ARCHIVE_DIR, then deleted in chunks.
+RETENTION_POLICIES = {
+    'security_event': {
+        'default': int(os.getenv('SECURITY_EVENT_RETENTION_DAYS', '90')),
+        'login_success': 30,
+        'admin_access': 30,
+        'contact_submission': 30,
+        'file_upload': 30,
+    },
+    'post_view': 365,
+    'post_like': None,  # likes are vote state, kept unless explicitly limited
+}
+RETENTION_CHUNK_SIZE = 1000
+RETENTION_ARCHIVE = os.getenv('RETENTION_ARCHIVE', 'True').lower() in ('true', '1', 'yes')
+RETENTION_ARCHIVE_DIR = os.getenv('RETENTION_ARCHIVE_DIR', str(BASE_DIR / 'archive'))
 
 # =============================================================================
 # SECURITY SETTINGS
@@ -272,7 +406,16 @@ if not DEBUG and SECURE_SSL_REDIRECT:
 SESSION_COOKIE_HTTPONLY = True
 SESSION_COOKIE_AGE = 3600  # 1 hour
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
-SESSION_SAVE_EVERY_REQUEST = True
+# Sessions live in the database, so a logout takes effect in every worker at once
+# (a cached copy could outlive it in a fallback cache), and are only saved when
+# modified. Anonymous visitors never get one: flash messages live in a signed
+# cookie. Logged-in sessions are re-saved (sliding expiry) by
+# main.middleware.SessionRefreshMiddleware at most every SESSION_REFRESH_THRESHOLD
+# seconds, so the idle timeout stays between 45 and 60 minutes.
+SESSION_ENGINE = 'django.contrib.sessions.backends.db'
+SESSION_SAVE_EVERY_REQUEST = False
+SESSION_REFRESH_THRESHOLD = 15 * 60  # 15 minutes
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
 
 # CSRF Protection
 CSRF_COOKIE_HTTPONLY = True
@@ -305,6 +448,14 @@ DATA_UPLOAD_MAX_NUMBER_FIELDS = 100
 LOGS_DIR = BASE_DIR / 'logs'
 LOGS_DIR.mkdir(exist_ok=True)
 
+# Handlers only enqueue records; a background thread per handler does the file
+# I/O (see portfolio_site/log_pipeline.py). Set LOG_FORMAT=json for JSON lines.
+# Every worker process appends to the same files, so none of them rotates:
+# logrotate renames the files (see PRODUCTION_DEPLOYMENT.md) and
+# WatchedFileHandler reopens them in each process.
+LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
@@ -317,24 +468,39 @@ LOGGING = {
             'format': '{levelname} {message}',
             'style': '{',
         },
+        'json': {
+            '()': 'portfolio_site.log_pipeline.JsonFormatter',
+        },
     },
     'handlers': {
         'file': {
             'level': 'INFO',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'django.log',
-            'formatter': 'verbose',
+            'class': 'portfolio_site.log_pipeline.QueueingHandler',
+            'sink': {
+                'class': 'logging.handlers.WatchedFileHandler',
+                'filename': BASE_DIR / 'logs' / 'django.log',
+            },
+            'queue_size': LOG_QUEUE_SIZE,
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
         },
         'security_file': {
             'level': 'WARNING',
-            'class': 'logging.FileHandler',
-            'filename': BASE_DIR / 'logs' / 'security.log',
-            'formatter': 'verbose',
+            'class': 'portfolio_site.log_pipeline.QueueingHandler',
+            'sink': {
+                'class': 'logging.handlers.WatchedFileHandler',
+                'filename': BASE_DIR / 'logs' / 'security.log',
+            },
+            'queue_size': LOG_QUEUE_SIZE,
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'verbose',
         },
         'console': {
             'level': 'INFO' if DEBUG else 'WARNING',
-            'class': 'logging.StreamHandler',
-            'formatter': 'simple',
+            'class': 'portfolio_site.log_pipeline.QueueingHandler',
+            'sink': {
+                'class': 'logging.StreamHandler',
+            },
+            'queue_size': LOG_QUEUE_SIZE,
+            'formatter': 'json' if LOG_FORMAT == 'json' else 'simple',
         },
     },
     'loggers': {
@@ -371,63 +537,46 @@ if DEBUG:
         }
     }
 else:
-    # Production: Try Redis cache first, fall back to database cache if Redis is not available
-    redis_available = False
-    try:
-        import redis
-        # Try to create a Redis connection to test if Redis is available
-        # Use a short timeout to avoid hanging
-        # Check if REDIS_URL is provided in environment variables (for Render)
-        redis_url = os.getenv('REDIS_URL')
-        if redis_url:
-            # Use Redis URL from environment
-            test_client = redis.Redis.from_url(redis_url, socket_connect_timeout=1, socket_timeout=1)
-        else:
-            # Fallback to localhost Redis (for local development)
-            test_client = redis.Redis(host='127.0.0.1', port=6379, socket_connect_timeout=1, socket_timeout=1)
-        test_client.ping()
-        redis_available = True
-    except Exception:
-        # Redis is not available
-        redis_available = False
-    
-    if redis_available and os.getenv('REDIS_URL'):
-        # Use Redis with the provided URL
-        CACHES = {
-            'default': {
-                'BACKEND': 'django.core.cache.backends.redis.RedisCache',
-                'LOCATION': os.getenv('REDIS_URL'),
-                'TIMEOUT': 300,  # 5 minutes
-                'OPTIONS': {
-                    'CONNECTION_POOL_KWARGS': {
-                        'socket_connect_timeout': 5,
-                        'socket_timeout': 5,
-                        'retry_on_timeout': True,
-                    }
-                }
-            }
-        }
-    elif redis_available:
-        # Use local Redis
-        CACHES = {
-            'default': {
-                'BACKEND': 'django.core.cache.backends.redis.RedisCache',
-                'LOCATION': 'redis://127.0.0.1:6379/1',
-                'TIMEOUT': 300,  # 5 minutes
-                'OPTIONS': {
-                    'CONNECTION_POOL_KWARGS': {
-                        'socket_connect_timeout': 5,
-                        'socket_timeout': 5,
-                        'retry_on_timeout': True,
-                    }
-                }
-            }
+    # Production: a per-worker LRU (L1) in front of a cache shared by every process
+    # (L2). L1 entries live at most L1_TIMEOUT seconds and, with Redis, are evicted
+    # early by pub/sub invalidations; rate-limit counters and dedup markers always
+    # go to L2.
+    # With REDIS_URL set, L2 is Redis, connected lazily on first use. If it is
+    # unreachable the shared backend serves from an in-process LRU and re-probes
+    # Redis in the background, switching back without a restart (see
+    # portfolio_site/cache_backends.py). Without it, L2 is the database cache
+    # table (created by `python manage.py createcachetable`), so workers and
+    # management commands still share one cache.
+    REDIS_URL = os.getenv('REDIS_URL')
+    if REDIS_URL:
+        shared_cache = {
+            'BACKEND': 'portfolio_site.cache_backends.ResilientRedisCache',
+            'LOCATION': REDIS_URL,
+            'TIMEOUT': 300,  # 5 minutes
+            'OPTIONS': {
+                'socket_connect_timeout': 1,
+                'socket_timeout': 2,
+                'retry_on_timeout': True,
+                'FALLBACK_MAX_ENTRIES': 1000,
+                'REPROBE_INTERVAL': int(os.getenv('CACHE_REPROBE_INTERVAL', '15')),
+            },
         }
     else:
-        # Fallback to database cache if Redis is not available
-        CACHES = {
-            'default': {
-                'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
-                'LOCATION': 'django_cache',
-            }
+        shared_cache = {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            'TIMEOUT': 300,  # 5 minutes
         }
+    CACHES = {
+        'default': {
+            'BACKEND': 'portfolio_site.cache_backends.TieredCache',
+            'TIMEOUT': 300,  # 5 minutes
+            'OPTIONS': {
+                'SHARED_CACHE': 'shared',
+                'L1_TIMEOUT': int(os.getenv('CACHE_L1_TIMEOUT', '5')),
+                'L1_MAX_ENTRIES': 2000,
+                'L1_EXCLUDE_PREFIXES': ('rate_limit_', 'contact_dedup_', 'resume_pdf_building:'),
+            },
+        },
+        'shared': shared_cache,
+    }
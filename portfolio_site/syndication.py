@@ -0,0 +1,95 @@
+"""
+Sitemaps and feeds for crawlers and feed readers
+
+/sitemap.xml (an index of per-section sitemaps, each paginated at
+SITEMAP_PAGE_SIZE URLs) and the RSS and Atom feeds under /feeds/ let
+crawlers and feed readers find every post and project without walking the
+paginated list views.
+
+All of them are derived from the same content: published posts and
+projects. One cached content state (latest updated_at and row counts)
+gives every response its ETag and Last-Modified, so a conditional request
+is answered with 304 from the cache alone. Rendered responses are cached
+under a key that includes the ETag; main.signals replaces the state
+whenever a post or project is saved or deleted, so cached copies never
+outlive the content they were rendered from.
+"""
+import hashlib
+from functools import wraps
+
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+STATE_CACHE_KEY = 'syndication_content_state'
+CACHE_TIMEOUT = 24 * 60 * 60  # Entries are keyed by content, so they only expire to free space
+MAX_AGE = 60 * 60  # How long crawlers and proxies may reuse a response without asking
+SITEMAP_PAGE_SIZE = 1000
+
+
+def _current_state():
+    from django.db.models import Count, Max
+    from blog.models import BlogPost
+    from portfolio.models import Project
+
+    posts = BlogPost.objects.filter(status='published').aggregate(count=Count('pk'), latest=Max('updated_at'))
+    projects = Project.objects.aggregate(count=Count('pk'), latest=Max('updated_at'))
+    latest = max(filter(None, (posts['latest'], projects['latest'])), default=None)
+    fingerprint = f"{posts['count']}:{posts['latest']}:{projects['count']}:{projects['latest']}"
+    return {
+        'etag': hashlib.sha256(fingerprint.encode()).hexdigest()[:16],
+        'last_modified': latest.timestamp() if latest else 0,
+    }
+
+
+def content_state():
+    """{'etag', 'last_modified'} of the published posts and projects, cached until either changes"""
+    return cache.get_or_set(STATE_CACHE_KEY, _current_state, CACHE_TIMEOUT)
+
+
+def content_changed():
+    """Record a post or project change; takes effect for every sitemap and feed at once"""
+    state = _current_state()
+    # A deletion leaves the latest updated_at as it was; clients must still see a newer version
+    state['last_modified'] = max(state['last_modified'], timezone.now().timestamp())
+    cache.set(STATE_CACHE_KEY, state, CACHE_TIMEOUT)
+
+
+def _set_validators(response, etag, last_modified):
+    response['ETag'] = etag
+    if last_modified:
+        response['Last-Modified'] = http_date(last_modified)
+    patch_cache_control(response, public=True, max_age=MAX_AGE)
+
+
+def cached_artifact(view):
+    """Serve ``view`` with the content state's validators, from the cache when rendered before"""
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = content_state()
+        etag = f'"{state["etag"]}"'
+        last_modified = state['last_modified'] or None  # nothing published yet
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            _set_validators(not_modified, etag, last_modified)
+            return not_modified
+
+        # Absolute URLs in the body depend on the scheme and host as well as the path
+        url = request.build_absolute_uri()
+        key = f'syndication:{state["etag"]}:{hashlib.sha256(url.encode()).hexdigest()[:16]}'
+        response = cache.get(key)
+        if response is None:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            if response.status_code != 200:
+                return response
+            if not last_modified:
+                del response['Last-Modified']
+            _set_validators(response, etag, last_modified)
+            cache.set(key, response, CACHE_TIMEOUT)
+        return response
+
+    return wrapper
@@ -4,11 +4,19 @@ portfolio_site URL Configuration
 Secure URL configuration with dynamic admin URL and security headers.
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.contrib.sitemaps import views as sitemap_views
+from django.urls import path, include, reverse
 from django.conf import settings
 from django.conf.urls.static import static
 from django.http import HttpResponse
 
+from blog.feeds import LatestPostsAtomFeed, LatestPostsFeed
+from main.sitemaps import SITEMAPS
+from portfolio.feeds import LatestProjectsAtomFeed, LatestProjectsFeed
+
+from .metrics import metrics_view
+from .syndication import cached_artifact
+
 
 def security_txt(request):
     """Security.txt endpoint for responsible disclosure"""
@@ -21,10 +29,14 @@ Policy: https://localhost/security-policy
 
 def robots_txt(request):
     """Robots.txt with security considerations"""
-    content = """User-agent: *
+    # Posts and projects are all in the sitemap; crawling search and list pagination adds nothing
+    content = f"""User-agent: *
 Disallow: /admin/
 Disallow: /media/private/
-Sitemap: https://localhost/sitemap.xml
+Disallow: /blog/search/
+Disallow: /*?page=
+Disallow: /*&page=
+Sitemap: {request.build_absolute_uri(reverse('sitemap'))}
 """
     return HttpResponse(content.encode('utf-8'), content_type='text/plain')
 
@@ -44,6 +56,17 @@ urlpatterns = [
     path('.well-known/security.txt', security_txt, name='security_txt'),
     path('security.txt', security_txt, name='security_txt_alt'),
     path('robots.txt', robots_txt, name='robots_txt'),
+    
+    # Sitemaps and feeds (cached, conditional GET; see syndication.py)
+    path('sitemap.xml', cached_artifact(sitemap_views.index),
+         {'sitemaps': SITEMAPS, 'sitemap_url_name': 'sitemap_section'}, name='sitemap'),
+    path('sitemap-<section>.xml', cached_artifact(sitemap_views.sitemap),
+         {'sitemaps': SITEMAPS}, name='sitemap_section'),
+    path('feeds/blog.rss', cached_artifact(LatestPostsFeed()), name='blog_feed'),
+    path('feeds/blog.atom', cached_artifact(LatestPostsAtomFeed()), name='blog_atom_feed'),
+    path('feeds/projects.rss', cached_artifact(LatestProjectsFeed()), name='projects_feed'),
+    path('feeds/projects.atom', cached_artifact(LatestProjectsAtomFeed()), name='projects_atom_feed'),
+    path('metrics', metrics_view, name='metrics'),
 ]
 
 # Serve static files in both development and production
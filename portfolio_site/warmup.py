@@ -0,0 +1,80 @@
+"""
+Process warm-up
+
+Work every process would otherwise do on its first requests: loading and
+compiling every template into the cached loader, compiling the URL
+patterns, and taking the context-processor snapshot. gunicorn.conf.py runs
+it in the master before forking (with preload_app, so workers share the
+result and recycled workers start warm) or else in each worker after
+fork. Nothing here touches the database or the cache.
+"""
+import logging
+import os
+import time
+
+logger = logging.getLogger('portfolio_site')
+
+_warmed = False
+
+
+def _template_names(engine):
+    for directory in engine.template_dirs:
+        directory = str(directory)
+        for root, _dirs, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith(('.html', '.txt', '.xml')):
+                    yield os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+
+
+def warm_templates():
+    from django.template import TemplateDoesNotExist, TemplateSyntaxError, engines
+
+    loaded = 0
+    for engine in engines.all():
+        for name in _template_names(engine):
+            try:
+                engine.get_template(name)
+            except (TemplateDoesNotExist, TemplateSyntaxError) as e:
+                # Partials and stray files may not compile on their own; the page that uses them will say so
+                logger.debug(f'Skipped template {name} during warm-up: {e}')
+                continue
+            loaded += 1
+    return loaded
+
+
+def _patterns(resolver):
+    for pattern in resolver.url_patterns:
+        yield pattern
+        if hasattr(pattern, 'url_patterns'):
+            yield from _patterns(pattern)
+
+
+def warm_urls():
+    from django.urls import get_resolver
+
+    resolver = get_resolver()
+    compiled = 0
+    for pattern in _patterns(resolver):
+        pattern.pattern.regex  # compiled lazily and cached on first access
+        compiled += 1
+    resolver.reverse_dict  # populates the reverse lookup tables
+    return compiled
+
+
+def warm_up():
+    """Warm this process (and any process later forked from it); repeated calls are free"""
+    global _warmed
+    if _warmed:
+        return
+    from main import security_rules  # noqa: F401 -- compiles the request screening rules
+    from main.context_processors import personal_info_snapshot
+
+    start = time.perf_counter()
+    templates = warm_templates()
+    patterns = warm_urls()
+    personal_info_snapshot()
+    _warmed = True
+    logger.info(
+        f'Warmed up in {(time.perf_counter() - start) * 1000:.0f}ms: '
+        f'{templates} templates, {patterns} URL patterns'
+    )
@@ -92,6 +92,8 @@ def run_post_deploy():
         # Run migrations to ensure database schema is up to date
         print("🔧 Running migrations...")
         execute_from_command_line(['manage.py', 'migrate'])
+        # The shared cache lives in the database when REDIS_URL is not set
+        execute_from_command_line(['manage.py', 'createcachetable'])
         
         # Populate data
         print("📊 Populating database with initial data...")
@@ -101,6 +103,13 @@ def run_post_deploy():
         print("🔗 Updating database with Cloudinary URLs...")
         update_database_with_cloudinary_urls()
         
+        # Warm the caches so the first visitors do not pay for them
+        print("🔥 Warming caches...")
+        try:
+            execute_from_command_line(['manage.py', 'warm_cache'])
+        except Exception as e:
+            print(f"⚠️ Cache warming failed, continuing: {e}")
+        
         print("✅ Post-deployment tasks completed successfully!")
         
     except Exception as e:
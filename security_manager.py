@@ -8,7 +8,6 @@ import os
 import sys
 import django
 from datetime import datetime, timedelta
-import re
 
 # Setup Django environment
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'portfolio_site.settings')
@@ -16,7 +15,9 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 django.setup()
 
 from django.conf import settings
+from django.utils import timezone
 from main.models import ContactSubmission
+from main.rollups import update_security_rollups, new_rows_since_last_run, rollup_total
 
 
 def security_check():
@@ -97,37 +98,23 @@ def check_suspicious_activity():
     print("🕵️ SUSPICIOUS ACTIVITY CHECK")
     print("=" * 50)
     
-    # Check recent submissions
-    recent_submissions = ContactSubmission.objects.filter(
-        created_at__gte=datetime.now() - timedelta(days=7)
-    ).order_by('-created_at')
+    # Fold new rows into the rollups, then only look at flagged submissions
+    # that arrived since the previous audit
+    update_security_rollups()
+    new_suspicious = new_rows_since_last_run(
+        'audit:suspicious_contacts',
+        ContactSubmission.objects.filter(is_spam=True).only('email', 'spam_score'),
+    )
     
-    suspicious_count = 0
-    
-    for submission in recent_submissions:
-        # Check for suspicious patterns
-        content = f"{submission.name} {submission.email} {submission.subject} {submission.message}".lower()
-        
-        suspicious_patterns = [
-            r'<script',  # XSS attempts
-            r'union\s+select',  # SQL injection
-            r'viagra',  # Spam
-            r'casino',  # Spam
-            r'lottery',  # Spam
-            r'winner',  # Spam
-            r'http[s]?://(?!localhost)',  # External links
-        ]
-        
-        for pattern in suspicious_patterns:
-            if re.search(pattern, content):
-                print(f"⚠️  Suspicious submission from {submission.email}: {pattern}")
-                suspicious_count += 1
-                break
+    for submission in new_suspicious:
+        print(f"⚠️  Suspicious submission from {submission.email}: score {submission.spam_score}")
     
+    suspicious_count = rollup_total('contact_spam', timezone.now() - timedelta(days=7))
     if suspicious_count == 0:
         print("✅ No suspicious submissions found in the last 7 days")
     else:
-        print(f"🚨 Found {suspicious_count} potentially suspicious submissions")
+        print(f"🚨 Found {suspicious_count} potentially suspicious submissions in the last 7 days "
+              f"({len(new_suspicious)} new since the last check)")
     
     print()
 
@@ -153,9 +140,8 @@ def generate_security_report():
         
         # Recent activity
         f.write("RECENT ACTIVITY:\n")
-        recent_submissions = ContactSubmission.objects.filter(
-            created_at__gte=datetime.now() - timedelta(days=30)
-        ).count()
+        update_security_rollups()
+        recent_submissions = rollup_total('contact_submissions', timezone.now() - timedelta(days=30))
         f.write(f"- Contact submissions (last 30 days): {recent_submissions}\n")
         
         f.write("\nFor detailed logs, check:\n")